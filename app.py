@@ -1,9 +1,11 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response
+import functools
+import hashlib
 import os
 import requests
 import urllib3
-from datetime import datetime
-from data.storage import PromoDataManager
+from datetime import date, datetime
+from data.storage import create_data_manager
 from promo.builders import generate_promo_eligibility_sql
 from promo.routes import promo_bp
 
@@ -20,19 +22,62 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Required for flash messages
 
-# Initialize data manager
-data_manager = PromoDataManager()
+# Initialize data manager (backend selected by PAM_STORAGE_BACKEND)
+data_manager = create_data_manager()
+
+# Refuse oversized request bodies before they are read (the promo form carries up to two workbooks)
+app.config['MAX_CONTENT_LENGTH'] = 2 * data_manager.max_upload_bytes + 1024 * 1024
 
 # Register blueprints
 app.register_blueprint(promo_bp)
 
 
+def _template_version() -> str:
+    """Fingerprint of the templates, so a deploy that changes them also changes every ETag"""
+    stamps = []
+    for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stamps.append(f"{os.path.relpath(path, app.root_path)}:{os.stat(path).st_mtime_ns}")
+    return hashlib.sha1("|".join(sorted(stamps)).encode('utf-8')).hexdigest()[:12]
+
+
+TEMPLATE_VERSION = _template_version()
+
+
+def generation_etag(view):
+    """
+    Give a data-driven GET page an ETag derived from the data generation.
+
+    A request whose If-None-Match still matches gets a 304 without running the view.
+    The tag covers the URL (path and query), the day (Active/Expired status depends on
+    it) and the templates, so it changes whenever the rendered page could. Only 200
+    responses are tagged; views render their error pages with a 5xx status.
+    """
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        key = f"{data_manager.generation()}|{date.today().isoformat()}|{TEMPLATE_VERSION}|{request.full_path}"
+        etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Let browsers keep the page but revalidate it on every visit
+        response.cache_control.no_cache = True
+        return response
+    return wrapped
+
+
 @app.route("/")
 def home():
     return render_template("index.html")
 
 
 @app.route("/promotions")
+@generation_etag
 def promotions():
     # Get pagination parameters from query string
     page = request.args.get('page', 1, type=int)
@@ -40,13 +85,23 @@ def promotions():
     search = request.args.get('search', '', type=str)
     owner_filter = request.args.get('owner', 'all', type=str)
     
-    # Load paginated promotions from data manager
-    promo_data = data_manager.get_paginated_promos(
-        page=page, 
-        per_page=per_page, 
-        search=search, 
-        owner_filter=owner_filter
-    )
+    # Load paginated promotions from data manager; a cursor parameter switches to keyset pagination
+    if 'cursor' in request.args:
+        promo_data = data_manager.get_promos_page(
+            cursor=request.args.get('cursor', '', type=str),
+            per_page=per_page,
+            direction=request.args.get('dir', 'next', type=str),
+            search=search,
+            owner_filter=owner_filter,
+            include_total=request.args.get('total', '0') == '1'
+        )
+    else:
+        promo_data = data_manager.get_paginated_promos(
+            page=page, 
+            per_page=per_page, 
+            search=search, 
+            owner_filter=owner_filter
+        )
     
     return render_template(
         "promotions.html", 
@@ -59,23 +114,51 @@ def promotions():
     )
 
 
+@app.route("/api/promotions")
+@generation_etag
+def api_promotions():
+    """JSON listing of promotions with keyset pagination (pass next_cursor/prev_cursor back as cursor)"""
+    promo_data = data_manager.get_promos_page(
+        cursor=request.args.get('cursor', '', type=str),
+        per_page=min(max(request.args.get('per_page', 25, type=int), 1), 500),
+        direction=request.args.get('dir', 'next', type=str),
+        search=request.args.get('search', '', type=str),
+        owner_filter=request.args.get('owner', 'all', type=str),
+        include_total=request.args.get('total', '0') in ('1', 'true')
+    )
+    pagination = promo_data['pagination']
+    return jsonify({
+        'promotions': promo_data['promotions'],
+        'next_cursor': pagination['next_cursor'],
+        'prev_cursor': pagination['prev_cursor'],
+        'total_items': pagination['total_items']
+    })
+
+
 @app.route("/spe")
+@generation_etag
 def spe():
+    search = request.args.get('search', '', type=str)
+    owner_filter = request.args.get('owner', 'all', type=str)
     try:
-        # Load SPE data from data manager
-        spe_data_dict = data_manager.get_all_spe_promos()
+        # Read-only record views of the SPE data; search results come back ranked by match quality
+        if search:
+            spe_data = data_manager.search_promo_records(search, is_spe=True)
+        else:
+            # Sort by code for consistent display
+            spe_data = sorted(data_manager.get_promo_records(is_spe=True), key=lambda record: record.code)
         
-        # Convert to a list and sort by keys for consistent display
-        spe_data = []
-        for key in sorted(spe_data_dict.keys()):
-            item = spe_data_dict[key]
-            item['key'] = key  # Add the key to the item for template use
-            spe_data.append(item)
+        if owner_filter != 'all':
+            spe_data = [record for record in spe_data if record.owner == owner_filter]
         
-        return render_template("spe.html", spe_data=spe_data, active_tab='SPE')
+        return render_template("spe.html", spe_data=spe_data, active_tab='SPE',
+                               owners=data_manager.get_catalog().owners(('SPE',)),
+                               search_query=search, selected_owner=owner_filter)
     except Exception as e:
         flash(f'Error loading SPE data: {str(e)}', 'error')
-        return render_template("spe.html", spe_data=[], active_tab='SPE')
+        # Not a 200, so generation_etag leaves the error page uncached
+        return render_template("spe.html", spe_data=[], active_tab='SPE',
+                               owners=[], search_query=search, selected_owner=owner_filter), 500
 
 
 @app.route("/edit_spe/<promo_code>", methods=["GET", "POST"])
@@ -129,6 +212,8 @@ def edit_spe(promo_code):
                          spe_data=spe_data, 
                          spe_key=promo_code,
                          active_tab=tab or 'Details',
+                         history=data_manager.get_history(promo_code, is_spe=True,
+                                                          page=request.args.get('history_page', 1, type=int)),
                          soc_groupings=data_manager.get_soc_groupings(),
                          soc_grouping_details=data_manager.get_soc_grouping_details(),
                          account_types=data_manager.get_account_types(),
@@ -167,38 +252,11 @@ def approvers():
         # Get the promo_code parameter if provided
         target_promo_code = request.args.get('promo_code', '').strip()
         
-        # Load promotion data
-        data_manager = PromoDataManager()
-        rdc_data = data_manager.get_all_promos()
-        spe_data = data_manager.get_all_spe_promos()
-        rebates_data = data_manager.get_all_rebates()
-        
-        # Combine all promo codes and owners
-        all_promos = []
-        
-        # Add RDC promotions
-        for promo_key, promo in rdc_data.items():
-            all_promos.append({
-                'code': promo.get('code', promo_key),
-                'owner': promo.get('owner', 'Unknown'),
-                'type': 'RDC'
-            })
-        
-        # Add SPE promotions
-        for spe_key, spe in spe_data.items():
-            all_promos.append({
-                'code': spe.get('code', spe_key),
-                'owner': spe.get('owner', 'Unknown'),
-                'type': 'SPE'
-            })
-        
-        # Add Rebate promotions
-        for rebate_key, rebate in rebates_data.items():
-            all_promos.append({
-                'code': rebate.get('code', rebate_key),
-                'owner': rebate.get('owner', 'Unknown'),
-                'type': 'REBATE'
-            })
+        # Combine all promo codes and owners from the cross-type catalog (no full records needed)
+        all_promos = [
+            {'code': entry.code, 'owner': entry.owner or 'Unknown', 'type': entry.type}
+            for entry in data_manager.get_catalog()
+        ]
         
         # If a target promo is specified, sort to put it first
         if target_promo_code:
@@ -247,13 +305,13 @@ def reviewers():
 def debug_capacity():
     """Debug endpoint to see raw data"""
     try:
-        # Get all data
-        rdc_data = data_manager.get_all_promos()
-        spe_data = data_manager.get_all_spe_promos()
+        # Get all data as record views (no copies)
+        rdc_data = data_manager.get_promo_records()
+        spe_data = data_manager.get_promo_records(is_spe=True)
         
         # Show sample data structure
-        sample_rdc = list(rdc_data.values())[:3] if rdc_data else []
-        sample_spe = list(spe_data.values())[:3] if spe_data else []
+        sample_rdc = [record.to_dict() for record in rdc_data[:3]]
+        sample_spe = [record.to_dict() for record in spe_data[:3]]
         
         return {
             "total_rdc": len(rdc_data),
@@ -266,6 +324,7 @@ def debug_capacity():
 
 
 @app.route("/capacity")
+@generation_etag
 def capacity():
     try:
         from datetime import datetime, date, timedelta
@@ -281,77 +340,20 @@ def capacity():
             week_end = week_start + timedelta(days=6)  # Saturday
             return week_start, week_end
         
-        # Helper function to check if a promotion is active on a given date
-        def is_promo_active_on_date(promo_start, promo_end, check_date):
-            """Check if promotion is active on the given date"""
-            try:
-                if not promo_start:
-                    return False
-                
-                promo_start_date = datetime.strptime(promo_start, '%Y-%m-%d').date()
-                
-                # If no end date, assume it's active if start date is in the past
-                if not promo_end or promo_end == '':
-                    return promo_start_date <= check_date
-                
-                promo_end_date = datetime.strptime(promo_end, '%Y-%m-%d').date()
-                
-                # Check if check_date falls within the promo period
-                return promo_start_date <= check_date <= promo_end_date
-            except Exception as e:
-                return False
+        # One normalized view of RDC, SPE and rebates, shared until the data changes
+        catalog = data_manager.get_catalog()
         
         # Get current date for active promotions calculation
         current_date = date.today()  # This will be today's date
         
-        # Get data for all promotion types
-        rdc_data = data_manager.get_all_promos()
-        spe_data = data_manager.get_all_spe_promos()
-        rebates_data = data_manager.get_all_rebates()
-        
-        # Calculate currently active promotions (for summary metrics)
-        active_rdc = {}
-        active_spe = {}
-        active_rebates = {}
-        
-        # Find active RDC promotions
-        for promo_key, promo in rdc_data.items():
-            if is_promo_active_on_date(
-                promo.get('promo_start_date'), 
-                promo.get('promo_end_date'),
-                current_date
-            ):
-                promo_with_type = promo.copy()
-                promo_with_type['type'] = 'RDC'
-                active_rdc[promo_key] = promo_with_type
-
-        # Find active SPE promotions
-        for spe_key, spe in spe_data.items():
-            if is_promo_active_on_date(
-                spe.get('promo_start_date'), 
-                spe.get('promo_end_date'),
-                current_date
-            ):
-                spe_with_type = spe.copy()
-                spe_with_type['type'] = 'SPE'
-                active_spe[spe_key] = spe_with_type
-
-        # Find active Rebate promotions
-        for rebate_key, rebate in rebates_data.items():
-            if is_promo_active_on_date(
-                rebate.get('promo_start_date'), 
-                rebate.get('promo_end_date'),
-                current_date
-            ):
-                rebate_with_type = rebate.copy()
-                rebate_with_type['type'] = 'REBATE'
-                active_rebates[rebate_key] = rebate_with_type
+        # Calculate currently active promotions (for summary metrics) from the date indexes
+        active_today = catalog.active_on(current_date.isoformat())
         
         # Calculate summary metrics for currently active promotions
-        total_active_rdc = len(active_rdc)
-        total_active_spe = len(active_spe)
-        total_active_rebates = len(active_rebates)
-        total_currently_active = total_active_rdc + total_active_spe + total_active_rebates
+        total_active_rdc = sum(1 for entry in active_today if entry.type == 'RDC')
+        total_active_spe = sum(1 for entry in active_today if entry.type == 'SPE')
+        total_active_rebates = sum(1 for entry in active_today if entry.type == 'REBATE')
+        total_currently_active = len(active_today)
         
         # Get date filter parameter for weekly schedule view
         selected_week = request.args.get('week', '08/10/2025-08/16/2025')
@@ -362,97 +364,26 @@ def capacity():
         
         # Get the Sunday-Saturday week for the input date
         start_date, end_date = get_sunday_saturday_week(input_start)
-        start_date_dt = datetime.combine(start_date, datetime.min.time())
-        end_date_dt = datetime.combine(end_date, datetime.min.time())
-        
-        # Filter promotions by date range
-        def is_promo_launching_in_week(promo_start, week_start, week_end):
-            """Check if promotion launches during the selected week"""
-            try:
-                if not promo_start:
-                    return False
-                
-                promo_start_date = datetime.strptime(promo_start, '%Y-%m-%d')
-                
-                # Check if promo start date falls within the selected week
-                return week_start <= promo_start_date <= week_end
-            except Exception as e:
-                return False
-        
-        # Filter RDC promotions for the selected week
-        filtered_rdc = {}
-        for promo_key, promo in rdc_data.items():
-            if is_promo_launching_in_week(
-                promo.get('promo_start_date'), 
-                start_date_dt, 
-                end_date_dt
-            ):
-                # Add type flag for RDC promotions
-                promo_with_type = promo.copy()
-                promo_with_type['type'] = 'RDC'
-                filtered_rdc[promo_key] = promo_with_type
-
-        # Filter SPE promotions for the selected week
-        filtered_spe = {}
-        for spe_key, spe in spe_data.items():
-            if is_promo_launching_in_week(
-                spe.get('promo_start_date'), 
-                start_date_dt, 
-                end_date_dt
-            ):
-                # Add type flag for SPE promotions
-                spe_with_type = spe.copy()
-                spe_with_type['type'] = 'SPE'
-                filtered_spe[spe_key] = spe_with_type
-
-        # Filter Rebate promotions for the selected week
-        filtered_rebates = {}
-        for rebate_key, rebate in rebates_data.items():
-            if is_promo_launching_in_week(
-                rebate.get('promo_start_date'), 
-                start_date_dt, 
-                end_date_dt
-            ):
-                # Add type flag for Rebate promotions
-                rebate_with_type = rebate.copy()
-                rebate_with_type['type'] = 'REBATE'
-                filtered_rebates[rebate_key] = rebate_with_type
+        
+        # Promotions launching during the selected week
+        week_entries = catalog.starting_between(start_date.isoformat(), end_date.isoformat())
         
         # Calculate summary metrics based on filtered data
-        total_rdc = len(filtered_rdc)
-        total_spe = len(filtered_spe)
-        total_rebates = len(filtered_rebates)
-        total_active = total_rdc + total_spe + total_rebates
+        total_rdc = sum(1 for entry in week_entries if entry.type == 'RDC')
+        total_spe = sum(1 for entry in week_entries if entry.type == 'SPE')
+        total_rebates = sum(1 for entry in week_entries if entry.type == 'REBATE')
+        total_active = len(week_entries)
         
         # Calculate owner workload distribution for filtered data
         owner_workload = {}
-        
-        # Count RDC promotions by owner
-        for promo_key, promo in filtered_rdc.items():
-            owner = promo.get('owner', 'Unknown')
+        workload_keys = {'RDC': 'rdc', 'SPE': 'spe', 'REBATE': 'rebates'}
+        for entry in week_entries:
+            owner = entry.owner or 'Unknown'
             if owner not in owner_workload:
                 owner_workload[owner] = {'rdc': 0, 'spe': 0, 'rebates': 0}
-            owner_workload[owner]['rdc'] += 1
+            owner_workload[owner][workload_keys[entry.type]] += 1
             # Debug: print which promo goes to which owner
-            print(f"RDC Debug: {promo_key} -> owner: {owner}, start_date: {promo.get('promo_start_date')}")
-        
-        # Count SPE promotions by owner
-        for spe_key, spe in filtered_spe.items():
-            owner = spe.get('owner', 'Unknown')
-            if owner not in owner_workload:
-                owner_workload[owner] = {'rdc': 0, 'spe': 0, 'rebates': 0}
-            owner_workload[owner]['spe'] += 1
-            # Debug: print which promo goes to which owner
-            print(f"SPE Debug: {spe_key} -> owner: {owner}, start_date: {spe.get('promo_start_date')}")
-
-        # Count Rebate promotions by owner
-        for rebate_key, rebate in filtered_rebates.items():
-            owner = rebate.get('owner', 'Unknown')
-            if owner not in owner_workload:
-                owner_workload[owner] = {'rdc': 0, 'spe': 0, 'rebates': 0}
-            owner_workload[owner]['rebates'] += 1
-            # Debug: print which promo goes to which owner  
-            print(f"REBATE Debug: {rebate_key} -> owner: {owner}, start_date: {rebate.get('promo_start_date')}")
+            print(f"{entry.type} Debug: {entry.code} -> owner: {owner}, start_date: {entry.promo_start_date}")
         
         # Calculate totals and status for each owner
         for owner in owner_workload:
@@ -479,29 +410,8 @@ def capacity():
             week_start = next_week_start + timedelta(weeks=i)
             week_end = week_start + timedelta(days=6)  # Saturday
             
-            week_start_dt = datetime.combine(week_start, datetime.min.time())
-            week_end_dt = datetime.combine(week_end, datetime.min.time())
-            
             # Find promotions launching in this week
-            week_promos = []
-            for promo in rdc_data.values():
-                if is_promo_launching_in_week(promo.get('promo_start_date'), week_start_dt, week_end_dt):
-                    # Add type flag for RDC promotions
-                    promo_with_type = promo.copy()
-                    promo_with_type['type'] = 'RDC'
-                    week_promos.append(promo_with_type)
-            for spe in spe_data.values():
-                if is_promo_launching_in_week(spe.get('promo_start_date'), week_start_dt, week_end_dt):
-                    # Add type flag for SPE promotions
-                    spe_with_type = spe.copy()
-                    spe_with_type['type'] = 'SPE'
-                    week_promos.append(spe_with_type)
-            for rebate in rebates_data.values():
-                if is_promo_launching_in_week(rebate.get('promo_start_date'), week_start_dt, week_end_dt):
-                    # Add type flag for Rebate promotions
-                    rebate_with_type = rebate.copy()
-                    rebate_with_type['type'] = 'REBATE'
-                    week_promos.append(rebate_with_type)
+            week_promos = catalog.starting_between(week_start.isoformat(), week_end.isoformat())
             
             # Format week label
             week_label = f"{week_start.strftime('%m/%d/%Y')} - {week_end.strftime('%m/%d/%Y')}"
@@ -528,7 +438,7 @@ def capacity():
                              selected_week=standardized_week)
     except Exception as e:
         flash(f'Error loading capacity data: {str(e)}', 'error')
-        # Return with default values if there's an error
+        # Return with default values if there's an error (as a 500, so generation_etag does not cache it)
         return render_template("capacity.html",
                              total_active=0,
                              total_rdc=0,
@@ -540,7 +450,7 @@ def capacity():
                              active_rebates=0,
                              owner_workload={},
                              next_four_weeks=[],
-                             selected_week='08/10/2025-08/16/2025')
+                             selected_week='08/10/2025-08/16/2025'), 500
 
 
 @app.route("/admin")
@@ -579,7 +489,7 @@ def download_sql(promo_code):
             return send_file(sql_file_info['path'], as_attachment=True, download_name=sql_file_info['filename'])
         
         # Generate SQL if it doesn't exist
-        sql_statement = generate_promo_eligibility_sql(promo_data)
+        sql_statement = generate_promo_eligibility_sql(promo_data, data_manager)
         
         # Save SQL to temporary file for download
         import tempfile
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for the promotion file format.
+
+Builds a synthetic promotions file with 10,000 records and times the old format
+(stdlib json, 2-space indent) against the compact format written by data.codec.
+
+    python -m benchmarks.codec_benchmark [record_count]
+"""
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict
+from data import codec
+
+
+def synthetic_promos(count: int) -> Dict[str, Any]:
+    """Promotion records shaped like the ones PromoDataManager stores"""
+    rng = random.Random(42)
+    owners = ["Cade Holtzen", "Jordan Lee", "Sam Patel", "Alex Kim", "Taylor Reed"]
+    promos = {}
+    for i in range(count):
+        code = f"PRM{i:06d}"
+        promos[code] = {
+            "code": code,
+            "owner": rng.choice(owners),
+            "orbit_id": str(100000 + i),
+            "bill_facing_name": f"Promo {i} - Buy one get one",
+            "description": "Synthetic promotion used for the codec benchmark " * 3,
+            "promo_start_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "promo_end_date": "2026-12-31",
+            "sku_list": [f"{rng.randint(100000000000, 999999999999)}" for _ in range(20)],
+            "eligibility": {"new_line": True, "port_in": rng.random() < 0.5, "credit_class": ["A", "B"]},
+            "version_history": [f"2025-01-{d:02d}: Updated by {rng.choice(owners)}" for d in range(1, 6)],
+            "updated_at": "2025-08-01T12:00:00"
+        }
+    return promos
+
+
+def best_of(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Fastest of repeat runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main(count: int = 10000):
+    promos = synthetic_promos(count)
+    pretty = json.dumps(promos, indent=2, ensure_ascii=False).encode('utf-8')
+    compact = codec.dumps(promos)
+
+    rows = [
+        ("stdlib pretty", len(pretty),
+         best_of(lambda: json.dumps(promos, indent=2, ensure_ascii=False).encode('utf-8')),
+         best_of(lambda: json.loads(pretty))),
+        (f"{codec.CODEC_NAME} compact", len(compact),
+         best_of(lambda: codec.dumps(promos)),
+         best_of(lambda: codec.loads(compact))),
+    ]
+
+    print(f"{count} promotions, codec: {codec.CODEC_NAME}")
+    print(f"{'format':<20}{'size (KB)':>12}{'dump (ms)':>12}{'load (ms)':>12}")
+    for name, size, dump_ms, load_ms in rows:
+        print(f"{name:<20}{size / 1024:>12.0f}{dump_ms:>12.1f}{load_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,64 @@
+"""
+Cold start benchmark: boot to the first promotion list page, with and without the catalog snapshot.
+
+Writes a temporary data directory of synthetic promotions, then times fresh
+interpreter processes that create the data manager and render the first page of
+get_paginated_promos, once parsing and indexing the JSON files (PAM_SNAPSHOT=0)
+and once starting from data/.catalog.snapshot.
+
+    python -m benchmarks.cold_start_benchmark [record_count]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from data import codec
+from benchmarks.codec_benchmark import synthetic_promos
+
+# Run in a fresh interpreter so nothing is cached; prints milliseconds to the first page
+_BOOT = """
+import sys, time
+start = time.perf_counter()
+from data.storage import create_data_manager
+manager = create_data_manager(sys.argv[1])
+manager.get_paginated_promos(page=1, per_page=25)
+print((time.perf_counter() - start) * 1000)
+"""
+
+_WRITE_SNAPSHOT = """
+import sys
+from data.storage import create_data_manager
+print(create_data_manager(sys.argv[1]).write_snapshot())
+"""
+
+
+def run(script: str, data_dir: str, snapshot: bool) -> str:
+    env = dict(os.environ, PAM_SNAPSHOT='1' if snapshot else '0', PAM_STORAGE_BACKEND='json')
+    result = subprocess.run([sys.executable, '-c', script, data_dir], env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def boot_ms(data_dir: str, snapshot: bool, repeat: int = 5) -> float:
+    """Best boot-to-first-page time over repeat fresh processes"""
+    return min(float(run(_BOOT, data_dir, snapshot)) for _ in range(repeat))
+
+
+def main(count: int = 10000):
+    with tempfile.TemporaryDirectory() as data_dir:
+        with open(os.path.join(data_dir, "promotions.json"), 'wb') as f:
+            f.write(codec.dumps(synthetic_promos(count)))
+
+        json_ms = boot_ms(data_dir, snapshot=False)
+        if run(_WRITE_SNAPSHOT, data_dir, snapshot=True) != 'True':
+            raise RuntimeError("Snapshot was not written")
+        snapshot_ms = boot_ms(data_dir, snapshot=True)
+        snapshot_kb = os.path.getsize(os.path.join(data_dir, ".catalog.snapshot")) / 1024
+
+    print(f"{count} promotions, boot to first list page (best of 5 processes)")
+    print(f"{'JSON files':<20}{json_ms:>10.1f} ms")
+    print(f"{'catalog snapshot':<20}{snapshot_ms:>10.1f} ms  ({snapshot_kb:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
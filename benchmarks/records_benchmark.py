@@ -0,0 +1,80 @@
+"""
+Memory and time benchmark for the promotion record forms.
+
+Starting from a cached document of synthetic records, compares the dict form hot
+paths used to hand out (a shallow copy per record, tagged with its type) against
+read-only PromoRecord views, and times an "active today" filter on each. Views
+are cached per data version (data.records.RecordCache), so their build time is paid
+once after a save rather than on every request.
+
+    python -m benchmarks.records_benchmark [record_count]
+"""
+import sys
+import tracemalloc
+from datetime import date, datetime
+from typing import Any, Callable, Tuple
+from benchmarks.codec_benchmark import best_of, synthetic_promos
+from data.records import RdcPromoRecord
+
+
+def allocated(build: Callable[[], Any]) -> Tuple[Any, int]:
+    """Result of build() and the bytes it left allocated"""
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def copy_dicts(promos):
+    copies = []
+    for promo in promos.values():
+        promo = promo.copy()
+        promo['type'] = 'RDC'
+        copies.append(promo)
+    return copies
+
+
+def build_views(promos):
+    return [RdcPromoRecord(code, promo) for code, promo in promos.items()]
+
+
+def active_dicts(copies, today: date) -> int:
+    count = 0
+    for promo in copies:
+        try:
+            if datetime.strptime(promo.get('promo_end_date', ''), '%Y-%m-%d').date() > today:
+                count += 1
+        except ValueError:
+            continue
+    return count
+
+
+def active_views(views, today_ordinal: int) -> int:
+    return sum(1 for record in views if record.is_active(today_ordinal))
+
+
+def main(count: int = 10000):
+    promos = synthetic_promos(count)
+    today = date.today()
+
+    copies, copies_size = allocated(lambda: copy_dicts(promos))
+    views, views_size = allocated(lambda: build_views(promos))
+
+    rows = [
+        ("dict copies", copies_size, best_of(lambda: copy_dicts(promos)),
+         best_of(lambda: active_dicts(copies, today))),
+        ("record views", views_size, best_of(lambda: build_views(promos)),
+         best_of(lambda: active_views(views, today.toordinal()))),
+    ]
+
+    print(f"{count} promotions, {len(next(iter(promos.values())))} fields each")
+    print(f"{'form':<16}{'memory (KB)':>14}{'build (ms)':>12}{'active (ms)':>13}")
+    for name, size, build_ms, active_ms in rows:
+        print(f"{name:<16}{size / 1024:>14.0f}{build_ms:>12.1f}{active_ms:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,294 @@
+"""
+Storage-layer benchmark over synthetic RDC, SPE and rebate catalogs.
+
+For each catalog size, writes a temporary data directory in the on-disk format of
+an existing deployment (inline version_history, generated_sql on the promotions
+that have generated SQL) and measures a fresh process running the storage API
+against it: p50/p95 latency of each operation, the bytes handed to the JSON codec
+and the peak RSS. The storage backend is taken from PAM_STORAGE_BACKEND as in the
+app. Results are printed (or written with --output) as JSON so runs from two
+commits can be diffed.
+
+    python -m benchmarks.storage_benchmark [--sizes 1000,10000,100000] [--iterations 50] [--output FILE]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+from data import codec
+
+# ru_maxrss is only available on POSIX
+try:
+    import resource
+except ImportError:
+    resource = None
+
+OWNERS = ["Cade Holtzen", "Jordan Lee", "Sam Patel", "Alex Kim", "Taylor Reed",
+          "Michael Pugh", "Hari Kariavula", "Rich Brakenhoff"]
+
+# Share of RDC promotions carrying generated SQL, and its size range in bytes
+SQL_SHARE = 0.25
+SQL_BYTES = (3000, 12000)
+
+_SQL_ROW = ("INSERT INTO PROMO_ELIGIBILITY_RULES (PROMO_CODE, SKU, MK_MDL_GRP_ID, START_DATE, END_DATE) "
+            "VALUES ('{code}', '{sku}', {group}, DATE '{start}', DATE '{end}');\n")
+
+
+def _date(rng: random.Random, year: int) -> str:
+    return f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def _history(rng: random.Random, created: str) -> List[str]:
+    """Free-text version_history lines as written before the history store existed"""
+    lines = [f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2025 {rng.randint(1, 12)}:{rng.randint(0, 59):02d} PM - "
+             f"{rng.choice(OWNERS)} - Updated promo_end_date, amount, description."
+             for _ in range(rng.randint(2, 30))]
+    return lines + [f"{created} - {rng.choice(OWNERS)} - Created promo."]
+
+
+def _generated_sql(rng: random.Random, code: str, start: str, end: str) -> str:
+    target = rng.randint(*SQL_BYTES)
+    rows = []
+    size = 0
+    while size < target:
+        row = _SQL_ROW.format(code=code, sku=rng.randint(100000000000, 999999999999),
+                              group=rng.randint(1000, 9999), start=start, end=end)
+        rows.append(row)
+        size += len(row)
+    return "".join(rows)
+
+
+def synthetic_catalog(count: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Synthetic catalog files: count RDC promotions, count // 4 SPE promotions and count // 10 rebates.
+
+    Returns {file name: document} for promotions.json, spe_promotions.json and rebates.json.
+    """
+    rng = random.Random(seed)
+    promos = {}
+    for i in range(count):
+        code = f"P{i:07d}"
+        start, end = _date(rng, 2025), _date(rng, 2026)
+        promo = {
+            "code": code,
+            "owner": rng.choice(OWNERS),
+            "bill_facing_name": f"{rng.choice(['Samsung', 'Apple', 'Pixel', 'Motorola'])} Trade P{i % 60}",
+            "orbit_id": str(10000 + i),
+            "description": f"Customers can get up to ${rng.randint(1, 10) * 100} off when they trade in an eligible "
+                           f"device on a qualifying rate plan. Synthetic promotion {i}.",
+            "promo_notes": "Two-tiered discount structure.\n1. Tier 1 devices\n2. Tier 2 devices",
+            "discount": rng.randint(5, 50),
+            "amount": rng.randint(1, 10) * 100,
+            "nseip_drop": rng.choice("YN"),
+            "dcd_web_cart": rng.choice("YN"),
+            "product_type": rng.choice("GS"),
+            "promo_start_date": start,
+            "promo_end_date": end,
+            "sku_list": [str(rng.randint(100000000000, 999999999999)) for _ in range(rng.randint(5, 40))],
+            "soc_grouping": f"Group {rng.randint(1, 9)}NS",
+            "account_type": f"A{rng.randint(1, 20):02d}",
+            "sales_application": f"S{rng.randint(1, 20):02d}",
+            "bptcr_details": [f"BPTCR Detail {n}" for n in range(1, 4)],
+            "version_history": _history(rng, start),
+            "created_at": f"{start}T09:00:00",
+            "updated_at": f"{_date(rng, 2025)}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+        }
+        if rng.random() < SQL_SHARE:
+            promo["generated_sql"] = _generated_sql(rng, code, start, end)
+        promos[code] = promo
+
+    spe_promos = {}
+    for i in range(count // 4):
+        code = f"SP{i:06d}"
+        spe_promos[code] = {
+            "code": code,
+            "owner": rng.choice(OWNERS),
+            "bill_facing_name": f"Line On Us P{i % 40}",
+            "orbit_id": str(500000 + i),
+            "conference_indicator": rng.choice("YN"),
+            "iot_indicator": rng.choice("YN"),
+            "go_soc_group_id": f"A{rng.randint(10, 99)}",
+            "bo_soc_group_id": f"A{rng.randint(10, 99)}",
+            "min_paid_line_mi_count": str(rng.randint(1, 4)),
+            "go_line_count": str(rng.randint(1, 4)),
+            "promo_start_date": _date(rng, 2025),
+            "promo_end_date": _date(rng, 2026),
+            "version_history": _history(rng, _date(rng, 2025)),
+            "created_at": "2025-01-01T09:00:00",
+            "updated_at": f"{_date(rng, 2025)}T12:00:00"
+        }
+
+    rebates = [
+        {
+            "id": f"RBT-{i:06d}",
+            "promoCode": f"REB{i:06d}",
+            "title": f"Rebate {i}",
+            "description": "Get money back on qualifying product bundles.",
+            "rebateType": rng.choice(["fixed_amount", "percentage"]),
+            "amount": float(rng.randint(1, 20) * 5),
+            "currency": "USD",
+            "startDate": _date(rng, 2025),
+            "endDate": _date(rng, 2026),
+            "owner": rng.choice(OWNERS),
+            "eligibleSkus": [f"SKU-{rng.randint(100, 999)}" for _ in range(3)],
+            "channels": ["online", "retail"],
+            "status": rng.choice(["active", "planned", "expired"])
+        }
+        for i in range(max(5, count // 10))
+    ]
+    return {"promotions.json": promos, "spe_promotions.json": spe_promos, "rebates.json": rebates}
+
+
+def write_catalog(data_dir: str, count: int) -> int:
+    """Write a synthetic catalog into data_dir; returns the bytes written"""
+    written = 0
+    for filename, document in synthetic_catalog(count).items():
+        content = codec.dumps(document)
+        with open(os.path.join(data_dir, filename), 'wb') as f:
+            f.write(content)
+        written += len(content)
+    return written
+
+
+class ParseCounter:
+    """Counts the bytes passed to codec.loads, which every storage read goes through"""
+    def __init__(self):
+        self.bytes = 0
+        self._loads = codec.loads
+
+    def install(self):
+        def counting_loads(data):
+            self.bytes += len(data)
+            return self._loads(data)
+        codec.loads = counting_loads
+
+
+def percentile(timings: List[float], share: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+
+def measure(operation: Callable[[int], Any], iterations: int, counter: ParseCounter) -> Dict[str, Any]:
+    """Time operation(i) for i in range(iterations); the first call is also reported on its own"""
+    timings = []
+    parsed_before = counter.bytes
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'first_ms': round(timings[0], 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'bytes_parsed': counter.bytes - parsed_before,
+        'iterations': iterations
+    }
+
+
+def peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_operations(data_dir: str, count: int, iterations: int) -> Dict[str, Any]:
+    """
+    Measure the storage API against a synthetic catalog of count promotions in this (fresh) process.
+
+    Nothing is read before the first get_promo, so its first_ms and bytes_parsed include
+    loading the catalog.
+    """
+    counter = ParseCounter()
+    counter.install()
+    from data.storage import create_data_manager
+
+    start = time.perf_counter()
+    manager = create_data_manager(data_dir)
+    open_ms = (time.perf_counter() - start) * 1000
+    open_parsed = counter.bytes
+
+    rng = random.Random(7)
+    sample = [f"P{rng.randrange(count):07d}" for _ in range(iterations)]
+    total_pages = max(1, count // 25)
+
+    def save(i: int):
+        promo = manager.get_promo(sample[i])
+        promo['description'] = f"Benchmark edit {i}"
+        manager.save_promo(sample[i], promo, user_name="Benchmark")
+
+    operations = [
+        ('get_promo', lambda i: manager.get_promo(sample[i])),
+        ('save_promo', save),
+        ('get_paginated_promos', lambda i: manager.get_paginated_promos(page=rng.randint(1, total_pages))),
+        ('get_paginated_promos_search', lambda i: manager.get_paginated_promos(search=sample[i][:5])),
+        ('get_paginated_promos_owner', lambda i: manager.get_paginated_promos(owner_filter=OWNERS[i % len(OWNERS)])),
+        ('get_owners', lambda i: manager.get_owners()),
+        ('get_all_rebates', lambda i: manager.get_all_rebates()),
+        ('get_date_mismatched_promos', lambda i: manager.get_date_mismatched_promos()),
+    ]
+    return {
+        'open_ms': round(open_ms, 3),
+        'open_bytes_parsed': open_parsed,
+        'operations': {name: measure(operation, iterations, counter) for name, operation in operations},
+        'peak_rss_kb': peak_rss_kb()
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the storage layer on synthetic catalogs")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="comma-separated RDC promotion counts")
+    parser.add_argument('--iterations', type=int, default=50, help="calls timed per operation")
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    # Internal: measure an existing data directory in this process
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(run_operations(args.measure, int(args.sizes), args.iterations)))
+        return
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as data_dir:
+            catalog_bytes = write_catalog(data_dir, size)
+            # A fresh interpreter per size keeps caches and peak RSS separate
+            child = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.storage_benchmark', '--measure', data_dir,
+                 '--sizes', str(size), '--iterations', str(args.iterations)],
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+        results.append({'promos': size, 'catalog_bytes': catalog_bytes, **result})
+        print(f"{size} promotions measured", file=sys.stderr)
+
+    report = {
+        'commit': git_commit(),
+        'backend': os.environ.get('PAM_STORAGE_BACKEND', 'json'),
+        'codec': codec.CODEC_NAME,
+        'python': sys.version.split()[0],
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
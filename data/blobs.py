@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, Set
+from data import codec
+from data.fileio import atomic_write
+
+
+# Large generated values kept in side files, mapped to the record field holding their reference
+BLOB_FIELDS = {
+    'generated_sql': 'generated_sql_ref',
+    'tradein_sql_statements': 'tradein_sql_ref',
+}
+
+# Values stored as JSON rather than plain text
+_JSON_FIELDS = {'tradein_sql_statements'}
+
+
+def promo_blob_dir(promo_dir: str) -> str:
+    """Get the blob directory inside a promotion's upload directory"""
+    return os.path.join(promo_dir, "blobs")
+
+
+def store_blob(blob_dir: str, content: bytes, compress: bool = True) -> Dict[str, Any]:
+    """
+    Write content to a content-addressed file in blob_dir and return its reference.
+
+    Files are named by the SHA-256 of the uncompressed content, so storing the same
+    content twice reuses the existing file.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    filename = f"{digest}.gz" if compress else f"{digest}.blob"
+    path = os.path.join(blob_dir, filename)
+
+    if not os.path.exists(path):
+        os.makedirs(blob_dir, exist_ok=True)
+        # mtime=0 keeps the compressed bytes identical for identical content
+        atomic_write(path, gzip.compress(content, mtime=0) if compress else content)
+
+    return {
+        'file': filename,
+        'sha256': digest,
+        'size': len(content),
+        'compressed': compress,
+        'stored_at': datetime.now().isoformat(),
+    }
+
+
+def load_blob(blob_dir: str, ref: Dict[str, Any], limit: Optional[int] = None) -> bytes:
+    """Read the content of a blob reference, or only its first limit bytes"""
+    path = os.path.join(blob_dir, ref['file'])
+    opener = gzip.open if ref.get('compressed') else open
+    with opener(path, 'rb') as f:
+        return f.read() if limit is None else f.read(limit)
+
+
+def blob_files(promo_data: Optional[Dict[str, Any]]) -> Set[str]:
+    """Side files a record references"""
+    files = set()
+    for ref_field in BLOB_FIELDS.values():
+        ref = (promo_data or {}).get(ref_field)
+        if isinstance(ref, dict) and ref.get('file'):
+            files.add(ref['file'])
+    return files
+
+
+def remove_blobs(blob_dir: str, files: Iterable[str]):
+    """Delete side files from blob_dir, ignoring any already gone"""
+    for filename in files:
+        try:
+            os.remove(os.path.join(blob_dir, filename))
+        except FileNotFoundError:
+            pass
+
+
+def externalize_blobs(promo_data: Dict[str, Any], blob_dir: str, compress: bool = True):
+    """Move inline BLOB_FIELDS values of a record into side files, leaving references in their place"""
+    for field, ref_field in BLOB_FIELDS.items():
+        if field not in promo_data:
+            continue
+        value = promo_data.pop(field)
+        if not value:
+            promo_data.pop(ref_field, None)
+            continue
+        if field in _JSON_FIELDS:
+            content = codec.dumps(value)
+        else:
+            content = value.encode('utf-8')
+        ref = store_blob(blob_dir, content, compress)
+        ref['length'] = len(value)
+        promo_data[ref_field] = ref
+
+
+def load_promo_blob(promo_data: Dict[str, Any], field: str, blob_dir: str) -> Any:
+    """
+    Get a BLOB_FIELDS value for a record, reading its side file when the record holds a reference.
+
+    Records saved before blobs were moved out keep the value inline and are returned as-is.
+    Returns None when the record has no value for the field.
+    """
+    if promo_data.get(field):
+        return promo_data[field]
+    ref = promo_data.get(BLOB_FIELDS[field])
+    if not ref:
+        return None
+    content = load_blob(blob_dir, ref)
+    if field in _JSON_FIELDS:
+        return codec.loads(content)
+    return content.decode('utf-8')
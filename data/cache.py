@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def file_signature(filepath: str) -> Optional[Tuple[int, int, int]]:
+    """Return the (mtime_ns, size, inode) signature of a file, or None if it does not exist"""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class _CacheEntry:
+    __slots__ = ('signature', 'data', 'generation', 'checked_at')
+
+    def __init__(self, signature: Tuple, data: Any, generation: Optional[int] = None, checked_at: float = 0.0):
+        self.signature = signature
+        self.data = data
+        self.generation = generation
+        self.checked_at = checked_at
+
+
+class DocumentCache:
+    """
+    Process-wide cache of parsed JSON documents.
+
+    Entries are keyed on the absolute file path and validated against the file's
+    (mtime_ns, size, inode) signature, so external edits and writes from other
+    processes are picked up on the next read. Callers that pass the data generation
+    (see data/generation.py) skip the stat while the generation is unchanged,
+    re-checking the files at most every revalidate_seconds to catch edits made
+    outside the app. Cached documents are shared between callers and must be treated
+    as read-only.
+    """
+    # Longest a generation-validated entry is trusted without checking its files
+    revalidate_seconds = float(os.environ.get('PAM_CACHE_REVALIDATE_SECONDS', '1'))
+
+    def __init__(self):
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, paths: Tuple[str, ...]) -> Optional[Tuple]:
+        signature = tuple(file_signature(path) for path in paths)
+        return None if None in signature else signature
+
+    def get(self, filepath: str, loader: Callable[[str], Any], depends_on: Tuple[str, ...] = (),
+            generation: Optional[int] = None) -> Any:
+        """
+        Return the parsed document for filepath, calling loader only when it is stale.
+
+        The entry is validated against filepath and every path in depends_on, so a
+        document derived from several files is rebuilt when any of them changes.
+        generation is the current data generation, if the caller tracks one.
+        """
+        found, data, signature = self._lookup(filepath, depends_on, generation)
+        if found:
+            return data
+
+        key = os.path.abspath(filepath)
+        paths = (key,) + tuple(os.path.abspath(path) for path in depends_on)
+        now = time.monotonic()
+        data = loader(filepath)
+
+        # Only keep the result if no file changed underneath the loader
+        if signature is not None and self._signature(paths) == signature:
+            with self._lock:
+                self._entries[key] = _CacheEntry(signature, data, generation, now)
+        return data
+
+    def cached(self, filepath: str, depends_on: Tuple[str, ...] = (), generation: Optional[int] = None) -> Any:
+        """Return the document for filepath if a current one is cached, or None without loading it"""
+        return self._lookup(filepath, depends_on, generation)[1]
+
+    def _lookup(self, filepath: str, depends_on: Tuple[str, ...],
+                generation: Optional[int]) -> Tuple[bool, Any, Optional[Tuple]]:
+        """(found, document, signature checked) for a cached entry, validated as described in get()"""
+        key = os.path.abspath(filepath)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if (entry is not None and generation is not None and entry.generation == generation
+                and now - entry.checked_at < self.revalidate_seconds):
+            return True, entry.data, entry.signature
+
+        signature = self._signature((key,) + tuple(os.path.abspath(path) for path in depends_on))
+        if entry is not None and signature is not None and entry.signature == signature:
+            if generation is not None:
+                with self._lock:
+                    self._entries[key] = _CacheEntry(signature, entry.data, generation, now)
+            return True, entry.data, signature
+        return False, None, signature
+
+    def put(self, filepath: str, data: Any, depends_on: Tuple[str, ...] = (), generation: Optional[int] = None,
+            signature: Optional[Tuple] = None):
+        """
+        Store a document that was just written to filepath (and its depends_on files).
+        
+        signature is the one the files had when data was read, for documents restored
+        from elsewhere (e.g. a snapshot); it defaults to the files' current signature.
+        """
+        key = os.path.abspath(filepath)
+        if signature is None:
+            signature = self._signature((key,) + tuple(os.path.abspath(path) for path in depends_on))
+        with self._lock:
+            if signature is None:
+                self._entries.pop(key, None)
+            else:
+                self._entries[key] = _CacheEntry(signature, data, generation, time.monotonic())
+
+    def peek(self, filepath: str) -> Optional[Tuple[Tuple, Any]]:
+        """Return the (signature, document) cached for filepath without validating it, or None"""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(filepath))
+        return None if entry is None else (entry.signature, entry.data)
+
+    def invalidate(self, filepath: Optional[str] = None):
+        """Drop the cached document for filepath, or every document if no path is given"""
+        with self._lock:
+            if filepath is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(filepath), None)
+
+
+# Shared by every PromoDataManager instance in the process
+document_cache = DocumentCache()
@@ -0,0 +1,156 @@
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from data.indexes import PromoIndex, PromoSummary
+
+
+# Promotion types in catalog order
+CATALOG_TYPES = ('RDC', 'SPE', 'REBATE')
+
+
+class CatalogEntry:
+    """
+    Compact cross-type record: the fields shared by RDC, SPE and rebate entries.
+
+    Templates read it like the promotion dicts they replace (promo.code, promo.type);
+    as_dict() gives a plain dict for JSON responses.
+    """
+    __slots__ = ('code', 'type', 'owner', 'orbit_id', 'promo_start_date', 'promo_end_date')
+
+    def __init__(self, summary: PromoSummary, promo_type: str):
+        self.code = summary.code
+        self.type = promo_type
+        self.owner = summary.owner
+        self.orbit_id = summary.orbit_id
+        self.promo_start_date = summary.promo_start_date
+        self.promo_end_date = summary.promo_end_date
+
+    def get(self, field: str, default: Any = None) -> Any:
+        return getattr(self, field, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class PromotionCatalog:
+    """
+    One view over RDC promotions, SPE promotions and rebates.
+
+    Built from the per-type PromoIndex objects, so the records are normalized once per
+    data version and owner and date filters use the existing secondary indexes. Entries
+    are keyed by their document key, which is what the indexes return; an entry's code
+    field is for display only and may differ. A code can exist under more than one
+    type, so lookups by code return every match.
+    """
+    def __init__(self, indexes: Sequence[Tuple[str, PromoIndex]]):
+        self._indexes = dict(indexes)
+        self._entries: Dict[str, Dict[str, CatalogEntry]] = {
+            promo_type: {code: CatalogEntry(summary, promo_type) for code, summary in index.summary_items()}
+            for promo_type, index in indexes
+        }
+        self._by_code: Dict[str, List[CatalogEntry]] = {}
+        for entries in self._entries.values():
+            for code, entry in entries.items():
+                self._by_code.setdefault(code, []).append(entry)
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        for entries in self._entries.values():
+            yield from entries.values()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _types(self, types: Optional[Sequence[str]]) -> Sequence[str]:
+        return [promo_type for promo_type in (types or self._entries) if promo_type in self._entries]
+
+    def of_type(self, promo_type: str) -> List[CatalogEntry]:
+        """Entries of one type, in document order"""
+        return list(self._entries.get(promo_type, {}).values())
+
+    def get(self, code: str, promo_type: Optional[str] = None) -> Optional[CatalogEntry]:
+        """The entry for a code, preferring promo_type when given (None if missing)"""
+        for entry in self._by_code.get(code, []):
+            if promo_type is None or entry.type == promo_type:
+                return entry
+        return None
+
+    def find(self, code: str) -> List[CatalogEntry]:
+        """Every entry with this code, across types"""
+        return list(self._by_code.get(code, []))
+
+    def owners(self, types: Optional[Sequence[str]] = None) -> List[str]:
+        """Sorted non-empty owners across the given types (all types by default)"""
+        owners = set()
+        for promo_type in self._types(types):
+            owners.update(self._indexes[promo_type].owners())
+        return sorted(owners)
+
+    def for_owner(self, owner: str, types: Optional[Sequence[str]] = None) -> List[CatalogEntry]:
+        """Entries owned by owner, grouped by type in document order"""
+        matches = []
+        for promo_type in self._types(types):
+            codes = self._indexes[promo_type].codes_for_owner(owner)
+            matches.extend(entry for code, entry in self._entries[promo_type].items() if code in codes)
+        return matches
+
+    def _lookup(self, promo_type: str, codes: List[str]) -> List[CatalogEntry]:
+        """Entries for index keys, skipping any added to the index after this catalog was built"""
+        entries = self._entries[promo_type]
+        return [entries[code] for code in codes if code in entries]
+
+    def starting_between(self, start_date: str, end_date: str,
+                         types: Optional[Sequence[str]] = None) -> List[CatalogEntry]:
+        """Entries whose start date (YYYY-MM-DD) falls within [start_date, end_date], grouped by type"""
+        return [
+            entry
+            for promo_type in self._types(types)
+            for entry in self._lookup(promo_type, self._indexes[promo_type].codes_starting_between(start_date, end_date))
+        ]
+
+    def active_on(self, day: str, types: Optional[Sequence[str]] = None) -> List[CatalogEntry]:
+        """Entries running on a day (YYYY-MM-DD), grouped by type"""
+        return [
+            entry
+            for promo_type in self._types(types)
+            for entry in self._lookup(promo_type, self._indexes[promo_type].codes_active_on(day))
+        ]
+
+
+class _CatalogEntry:
+    __slots__ = ('indexes', 'catalog')
+
+    def __init__(self, indexes: Tuple[Tuple[PromoIndex, int], ...], catalog: PromotionCatalog):
+        self.indexes = indexes
+        self.catalog = catalog
+
+
+class CatalogCache:
+    """
+    Process-wide PromotionCatalog per data directory.
+
+    A catalog is reused while it was built from the current index of every type at
+    its current version (saves update indexes in place and bump their version).
+    """
+    def __init__(self):
+        self._entries: Dict[str, _CatalogEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, data_dir: str, indexes: Sequence[Tuple[str, PromoIndex]]) -> PromotionCatalog:
+        key = os.path.abspath(data_dir)
+        # Versions are read before the catalog is built, so a save racing the build forces a rebuild
+        current = tuple((index, index.version) for _, index in indexes)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and len(entry.indexes) == len(current) and all(
+                cached is index and cached_version == version
+                for (cached, cached_version), (index, version) in zip(entry.indexes, current)):
+            return entry.catalog
+
+        catalog = PromotionCatalog(indexes)
+        with self._lock:
+            self._entries[key] = _CatalogEntry(current, catalog)
+        return catalog
+
+
+# Shared by every PromoDataManager instance in the process
+promo_catalogs = CatalogCache()
@@ -0,0 +1,60 @@
+import json
+from typing import Any, Tuple, Type, Union
+
+# Use the fastest JSON library that is installed; all of them read and write the same JSON
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if orjson is not None:
+    CODEC_NAME = "orjson"
+    # orjson.JSONDecodeError subclasses ValueError
+    DECODE_ERRORS: Tuple[Type[Exception], ...] = (ValueError,)
+
+    def _dumps(obj: Any, pretty: bool) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    _loads = orjson.loads
+
+elif msgspec is not None:
+    CODEC_NAME = "msgspec"
+    DECODE_ERRORS = (msgspec.DecodeError, ValueError)
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def _dumps(obj: Any, pretty: bool) -> bytes:
+        content = _encoder.encode(obj)
+        return msgspec.json.format(content, indent=2) if pretty else content
+
+    _loads = _decoder.decode
+
+else:
+    CODEC_NAME = "json"
+    DECODE_ERRORS = (ValueError,)
+
+    def _dumps(obj: Any, pretty: bool) -> bytes:
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    _loads = json.loads
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Encode obj as UTF-8 JSON; compact unless pretty (2-space indent) is requested"""
+    return _dumps(obj, pretty)
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes or str; raises one of DECODE_ERRORS on malformed input"""
+    return _loads(content)
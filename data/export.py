@@ -0,0 +1,10 @@
+import sys
+from data.storage import create_data_manager
+
+
+if __name__ == "__main__":
+    # python -m data.export [export_dir] [data_dir]
+    export_dir = sys.argv[1] if len(sys.argv) > 1 else "export"
+    manager = create_data_manager(sys.argv[2] if len(sys.argv) > 2 else "data")
+    for path in manager.export_pretty(export_dir):
+        print(f"Wrote {path}")
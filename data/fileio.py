@@ -0,0 +1,109 @@
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from werkzeug.utils import secure_filename
+
+# fcntl is POSIX-only; on Windows the lock below only serializes threads in this process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+_held_locks = threading.local()
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def fsync_directory(directory: str):
+    """Flush a directory entry so a rename survives a crash (no-op where unsupported)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(filepath: str, content: bytes):
+    """
+    Replace filepath with content without ever exposing a partially written file.
+
+    The bytes go to a temp file in the same directory, are fsync'd, and the temp
+    file is renamed over the target, so a crash leaves either the old or the new file.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # mkstemp creates 0600 files; keep the permissions of the file being replaced
+        try:
+            mode = stat.S_IMODE(os.stat(filepath).st_mode)
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+def safe_record_name(promo_code: str) -> str:
+    """File name stem for a per-promo file, unique even when the code has unsafe characters"""
+    filename = secure_filename(promo_code)
+    if filename != promo_code:
+        filename = f"{filename}-{hashlib.sha1(promo_code.encode('utf-8')).hexdigest()[:8]}"
+    return filename
+
+
+@contextmanager
+def file_lock(filepath: str):
+    """
+    Hold an exclusive advisory lock for filepath across threads and processes.
+
+    The lock lives on a sidecar '<filepath>.lock' file so the data file itself can be
+    replaced atomically while the lock is held. Re-entrant within a thread.
+    """
+    key = os.path.abspath(filepath)
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = {}
+
+    if held.get(key):
+        held[key] += 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.Lock())
+
+    with thread_lock:
+        with open(key + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            held[key] = 1
+            try:
+                yield
+            finally:
+                held[key] = 0
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
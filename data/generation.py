@@ -0,0 +1,71 @@
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Optional
+from data.fileio import file_lock
+
+
+# One little-endian unsigned 64-bit counter
+_FORMAT = '<Q'
+_SIZE = struct.calcsize(_FORMAT)
+
+
+class GenerationCounter:
+    """
+    Data-generation counter shared by every process using a data directory.
+
+    The counter is 8 bytes in <data_dir>/.generation, memory-mapped so reading it is a
+    plain memory access rather than a system call. Every write to the data files bumps
+    it (under a file lock, so no bump is lost), and caches that recorded the generation
+    they were validated at can trust themselves until it moves. Where the file cannot
+    be mapped, value() falls back to reading it.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        with file_lock(path):
+            if not os.path.exists(path) or os.path.getsize(path) < _SIZE:
+                with open(path, 'wb') as f:
+                    f.write(struct.pack(_FORMAT, 0))
+        try:
+            with open(path, 'r+b') as f:
+                self._map = mmap.mmap(f.fileno(), _SIZE)
+        except (OSError, ValueError):
+            self._map = None
+
+    def value(self) -> int:
+        """Current generation"""
+        if self._map is not None:
+            return struct.unpack_from(_FORMAT, self._map, 0)[0]
+        try:
+            with open(self.path, 'rb') as f:
+                return struct.unpack(_FORMAT, f.read(_SIZE))[0]
+        except (OSError, struct.error):
+            return 0
+
+    def bump(self) -> int:
+        """Advance the generation after a write and return the new value"""
+        with self._lock, file_lock(self.path):
+            generation = self.value() + 1
+            if self._map is not None:
+                struct.pack_into(_FORMAT, self._map, 0, generation)
+            else:
+                with open(self.path, 'r+b') as f:
+                    f.write(struct.pack(_FORMAT, generation))
+        return generation
+
+
+_counters: Dict[str, GenerationCounter] = {}
+_counters_guard = threading.Lock()
+
+
+def data_generation(data_dir: str) -> GenerationCounter:
+    """The process-wide counter for a data directory"""
+    key = os.path.abspath(data_dir)
+    with _counters_guard:
+        counter = _counters.get(key)
+        if counter is None:
+            counter = _counters[key] = GenerationCounter(os.path.join(key, '.generation'))
+        return counter
@@ -0,0 +1,156 @@
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from data import codec
+from data.fileio import atomic_write, file_lock, safe_record_name
+
+
+def make_entry(user_name: Optional[str], kind: str, message: str,
+               changes: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Build a history entry.
+
+    kind is 'created', 'change' (with the structured field diffs from _get_field_diffs)
+    or 'note' (approvals, PCR versions). text is the display line, in the same
+    "timestamp - user - message" form version_history used.
+    """
+    now = datetime.now()
+    text = f"{now.strftime('%m/%d/%Y %I:%M %p')} - {user_name} - {message}" if user_name else message
+    return {
+        'at': now.isoformat(timespec='seconds'),
+        'user': user_name,
+        'kind': kind,
+        'text': text,
+        'changes': changes or []
+    }
+
+
+def legacy_entries(version_history: List[str]) -> List[Dict[str, Any]]:
+    """Wrap the free-text version_history strings of an older record as 'legacy' entries"""
+    return [
+        {'at': None, 'user': None, 'kind': 'legacy', 'text': text, 'changes': []}
+        for text in version_history
+        # "Last save:" lines were superseded by last_changes and never kept
+        if isinstance(text, str) and not text.startswith('Last save:')
+    ]
+
+
+class HistoryStore:
+    """
+    Append-only version history, one JSON-lines file per promotion.
+
+    RDC history lives in data/history/promos/<code>.jsonl and SPE history in
+    data/history/spe_promos/<code>.jsonl, so reading or appending a promo's history
+    never touches the catalog. Once a file grows past compact_bytes, and to
+    compact_growth times its size after its last compaction, it is rewritten with
+    only the newest max_changes 'change' entries; created, note and legacy entries
+    are always kept. The growth ratio keeps a file whose retained entries alone
+    exceed compact_bytes from being rewritten on every append.
+    """
+    # Field-change entries kept per promotion when a history file is compacted
+    max_changes = int(os.environ.get('PAM_HISTORY_MAX_CHANGES', '200'))
+    # Compact a promotion's history file once it grows past this size
+    compact_bytes = 256 * 1024
+    # ...and to this multiple of its size right after it was last compacted
+    compact_growth = 2.0
+
+    def __init__(self, history_dir: str):
+        self.history_dir = history_dir
+        # path -> file size after its last compaction in this process
+        self._compacted_sizes = {}
+
+    def _path(self, promo_code: str, is_spe: bool) -> str:
+        subdir = 'spe_promos' if is_spe else 'promos'
+        return os.path.join(self.history_dir, subdir, f"{safe_record_name(promo_code)}.jsonl")
+
+    def exists(self, promo_code: str, is_spe: bool = False) -> bool:
+        """Whether the promotion has a history file yet"""
+        return os.path.exists(self._path(promo_code, is_spe))
+
+    def append(self, promo_code: str, entries: List[Dict[str, Any]], is_spe: bool = False):
+        """Durably append entries to a promotion's history"""
+        if not entries:
+            return
+        path = self._path(promo_code, is_spe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = b"".join(codec.dumps(entry) + b"\n" for entry in entries)
+        with file_lock(path):
+            with open(path, 'a+b') as f:
+                # Terminate a torn last line left by a crash so these entries stay readable
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        content = b"\n" + content
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            if size >= self._compact_threshold(path):
+                self._compact(path)
+
+    def read(self, promo_code: str, is_spe: bool = False) -> List[Dict[str, Any]]:
+        """All entries for a promotion, oldest first, skipping a line torn by a crash"""
+        return self._read(self._path(promo_code, is_spe))
+
+    def _read(self, path: str) -> List[Dict[str, Any]]:
+        entries = []
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(codec.loads(line))
+                    except codec.DECODE_ERRORS:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def page(self, promo_code: str, is_spe: bool = False, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """One page of a promotion's history, newest first"""
+        entries = self.read(promo_code, is_spe)
+        return self.paginate(entries, page, per_page)
+
+    @staticmethod
+    def paginate(entries: List[Dict[str, Any]], page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """Page oldest-first entries newest first"""
+        per_page = max(1, per_page)
+        total_items = len(entries)
+        total_pages = max(1, (total_items + per_page - 1) // per_page)
+        page = min(max(1, page), total_pages)
+        end = total_items - (page - 1) * per_page
+        start = max(0, end - per_page)
+        return {
+            'entries': entries[start:end][::-1],
+            'page': page,
+            'per_page': per_page,
+            'total_items': total_items,
+            'total_pages': total_pages,
+            'has_prev': page > 1,
+            'has_next': page < total_pages
+        }
+
+    def compact(self, promo_code: str, is_spe: bool = False) -> int:
+        """Apply the retention rules to a promotion's history now; returns the number of entries dropped"""
+        path = self._path(promo_code, is_spe)
+        with file_lock(path):
+            return self._compact(path)
+
+    def _compact_threshold(self, path: str) -> float:
+        """Size at which an append compacts path"""
+        return max(self.compact_bytes, self.compact_growth * self._compacted_sizes.get(path, 0))
+
+    def _compact(self, path: str) -> int:
+        """Rewrite a history file keeping the retained entries; caller holds the file lock"""
+        entries = self._read(path)
+        change_positions = [i for i, entry in enumerate(entries) if entry.get('kind') == 'change']
+        dropped = set(change_positions[:max(0, len(change_positions) - self.max_changes)])
+        if dropped:
+            kept = [entry for i, entry in enumerate(entries) if i not in dropped]
+            atomic_write(path, b"".join(codec.dumps(entry) + b"\n" for entry in kept))
+        try:
+            self._compacted_sizes[path] = os.path.getsize(path)
+        except FileNotFoundError:
+            self._compacted_sizes.pop(path, None)
+        return len(dropped)
@@ -0,0 +1,478 @@
+import heapq
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Sorts after every code, so (date, _MAX_CODE) bounds all entries for a date
+_MAX_CODE = chr(0x10FFFF)
+
+# End-date key for promotions without an end date, after every real date
+OPEN_END = '9999-12-31'
+
+# Search results kept per index (cleared whenever a record is re-indexed)
+_SEARCH_CACHE_SIZE = 64
+
+# Fields covered by the search index, in ranking order (a code match beats a description match)
+SEARCH_FIELDS = ('code', 'bill_facing_name', 'owner', 'description')
+
+
+def iso_date(value: Any) -> Optional[str]:
+    """Normalize a YYYY-MM-DD date string, or return None if it is not a valid date"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return None
+
+
+class PromoSummary:
+    """
+    Summary projection of one record: the fields list views show plus its index keys.
+
+    Kept per record by PromoIndex, so list pages, owner lists and date queries never
+    touch the full records, and a record can be unindexed without its old version.
+    """
+    __slots__ = ('code', 'owner', 'orbit_id', 'bill_facing_name', 'description',
+                 'promo_start_date', 'promo_end_date', 'start', 'end', 'end_ordinal', 'order')
+
+    def __init__(self, code: str, record: Dict[str, Any]):
+        self.code = record.get('code', code)
+        self.owner = record.get('owner', '')
+        self.orbit_id = record.get('orbit_id', '')
+        self.bill_facing_name = record.get('bill_facing_name', '')
+        self.description = record.get('description', '')
+        self.promo_start_date = record.get('promo_start_date', '')
+        self.promo_end_date = record.get('promo_end_date', '')
+
+        self.start = iso_date(self.promo_start_date)
+        end = iso_date(self.promo_end_date)
+        # Open-ended promos stay active; an unparseable end date never matches
+        self.end = OPEN_END if not self.promo_end_date else end
+        self.end_ordinal = date.fromisoformat(end).toordinal() if end else None
+        self.order = self.order_value(code, record)
+
+    @staticmethod
+    def order_value(code: str, record: Dict[str, Any]) -> str:
+        """Newest-first sort value of a record: updated_at, or its code when that is missing or empty"""
+        return str(record.get('updated_at') or record.get('code', code))
+
+    def is_active(self, today_ordinal: int) -> bool:
+        """Whether the promotion ends after the given day (date.toordinal())"""
+        return self.end_ordinal is not None and self.end_ordinal > today_ordinal
+
+    def as_row(self, promo_type: str, today_ordinal: int) -> Dict[str, Any]:
+        """The table row list views render"""
+        return {
+            "code": self.code,
+            "orbit_id": self.orbit_id,
+            "status": "Active" if self.is_active(today_ordinal) else "Expired",
+            "description": self.description,
+            "start_date": self.promo_start_date,
+            "end_date": self.promo_end_date,
+            "owner": self.owner,
+            "type": promo_type
+        }
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def match_score(texts: Tuple[str, ...], query: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Rank how well a lowercased query matches a record's lowercased SEARCH_FIELDS values.
+
+    Lower is better: an exact field match beats a prefix match, which beats a match at
+    a word start, which beats any other substring; ties go to the earlier field and
+    then the earlier position. Returns None when no field contains the query.
+    """
+    best = None
+    for field_rank, text in enumerate(texts):
+        position = text.find(query)
+        if position < 0:
+            continue
+        if text == query:
+            quality = 0
+        elif position == 0:
+            quality = 1
+        elif not text[position - 1].isalnum():
+            quality = 2
+        else:
+            quality = 3
+        score = (quality, field_rank, position)
+        if best is None or score < best:
+            best = score
+    return best
+
+
+def search_texts(record: Dict[str, Any]) -> Tuple[str, ...]:
+    """Lowercased SEARCH_FIELDS values of a record"""
+    return tuple(str(record.get(field) or '').lower() for field in SEARCH_FIELDS)
+
+
+class TrigramIndex:
+    """
+    Inverted index from lowercase trigrams to the codes whose SEARCH_FIELDS contain them.
+
+    A substring query intersects the posting lists of its trigrams (smallest first) and
+    verifies the few remaining candidates, so cost follows the number of matches rather
+    than the catalog size. Queries shorter than three characters fall back to a scan.
+    Owned by a PromoIndex, which serializes updates and searches under its lock.
+    """
+    def __init__(self):
+        self._texts: Dict[str, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def build(cls, records: Dict[str, Any]) -> 'TrigramIndex':
+        index = cls()
+        for code, record in list(records.items()):
+            if not isinstance(record, dict):
+                continue
+            texts = search_texts(record)
+            index._texts[code] = texts
+            for gram in set().union(*(_trigrams(text) for text in texts)):
+                index._postings.setdefault(gram, set()).add(code)
+        return index
+
+    def copy(self) -> 'TrigramIndex':
+        index = TrigramIndex()
+        index._texts = dict(self._texts)
+        index._postings = {gram: set(codes) for gram, codes in self._postings.items()}
+        return index
+
+    def update(self, code: str, record: Optional[Dict[str, Any]]):
+        """Replace, add or remove one record in place; only changed trigrams are touched"""
+        old_texts = self._texts.get(code)
+        new_texts = search_texts(record) if isinstance(record, dict) else None
+        if old_texts == new_texts:
+            return
+
+        old_grams = set().union(*(_trigrams(text) for text in old_texts)) if old_texts else set()
+        new_grams = set().union(*(_trigrams(text) for text in new_texts)) if new_texts else set()
+        for gram in old_grams - new_grams:
+            postings = self._postings[gram]
+            postings.discard(code)
+            if not postings:
+                del self._postings[gram]
+        for gram in new_grams - old_grams:
+            self._postings.setdefault(gram, set()).add(code)
+
+        if new_texts is None:
+            self._texts.pop(code, None)
+        else:
+            self._texts[code] = new_texts
+
+    def search(self, query: str) -> List[str]:
+        """Codes whose SEARCH_FIELDS contain query (case-insensitive), best match first"""
+        query = query.lower()
+        grams = _trigrams(query)
+        if grams:
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = self._texts.keys()
+
+        scored = []
+        for code in candidates:
+            score = match_score(self._texts[code], query)
+            if score is not None:
+                scored.append((score, code))
+        scored.sort()
+        return [code for _, code in scored]
+
+
+class PromoIndex:
+    """
+    Secondary indexes over a code -> record mapping.
+
+    Holds owner -> codes, (start date, code) and (end date, code) arrays for bisect
+    range queries, and a (updated_at, code) array for most-recent-first listings.
+    Saves update an index in place through update(), which touches only the saved
+    record's entries and bumps version; every method runs under the index's lock
+    and hands out copies, so readers never see a half-applied update. The search
+    index is only built on the first search and then kept up to date the same way.
+    """
+    def __init__(self, records: Dict[str, Any]):
+        self._records = records
+        self._lock = threading.RLock()
+        self.version = 0
+        self._text: Optional[TrigramIndex] = None
+        self._search_cache: Dict[str, List[str]] = {}
+        self._summaries: Dict[str, PromoSummary] = {}
+        self._by_owner: Dict[str, Set[str]] = {}
+        self._starts: List[Tuple[str, str]] = []
+        self._ends: List[Tuple[str, str]] = []
+        self._order: List[Tuple[str, str]] = []
+
+    @classmethod
+    def build(cls, records: Dict[str, Any]) -> 'PromoIndex':
+        """Index every record of a mapping"""
+        index = cls(records)
+        for code, record in list(records.items()):
+            if not isinstance(record, dict):
+                continue
+            summary = PromoSummary(code, record)
+            index._summaries[code] = summary
+            index._by_owner.setdefault(summary.owner, set()).add(code)
+            if summary.start:
+                index._starts.append((summary.start, code))
+            if summary.end:
+                index._ends.append((summary.end, code))
+            index._order.append((summary.order, code))
+        index._starts.sort()
+        index._ends.sort()
+        index._order.sort()
+        return index
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The indexed mapping is stored (and re-attached) by whoever pickles the index
+        with self._lock:
+            return {
+                'text': None if self._text is None else self._text.copy(),
+                'summaries': dict(self._summaries),
+                'by_owner': {owner: set(codes) for owner, codes in self._by_owner.items()},
+                'starts': list(self._starts),
+                'ends': list(self._ends),
+                'order': list(self._order)
+            }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__({})
+        self._text = state['text']
+        self._summaries = state['summaries']
+        self._by_owner = state['by_owner']
+        self._starts = state['starts']
+        self._ends = state['ends']
+        self._order = state['order']
+
+    def attach(self, records: Dict[str, Any]):
+        """Point an unpickled index at the mapping it was built from"""
+        self._records = records
+
+    def update(self, code: str, record: Optional[Dict[str, Any]]):
+        """Re-index one record in place after it was replaced, added or (record of None) removed"""
+        with self._lock:
+            if self._text is not None:
+                self._text.update(code, record)
+            self._search_cache.clear()
+
+            old_summary = self._summaries.pop(code, None)
+            if old_summary is not None:
+                self._by_owner[old_summary.owner].discard(code)
+                if old_summary.start:
+                    self._remove(self._starts, (old_summary.start, code))
+                if old_summary.end:
+                    self._remove(self._ends, (old_summary.end, code))
+                self._remove(self._order, (old_summary.order, code))
+
+            if isinstance(record, dict):
+                summary = PromoSummary(code, record)
+                self._summaries[code] = summary
+                self._by_owner.setdefault(summary.owner, set()).add(code)
+                if summary.start:
+                    insort(self._starts, (summary.start, code))
+                if summary.end:
+                    insort(self._ends, (summary.end, code))
+                insort(self._order, (summary.order, code))
+            self.version += 1
+
+    @staticmethod
+    def _remove(entries: List[Tuple[str, str]], item: Tuple[str, str]):
+        position = bisect_left(entries, item)
+        if position < len(entries) and entries[position] == item:
+            del entries[position]
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def summaries(self) -> List[PromoSummary]:
+        """Summary projections of every record, in document order"""
+        with self._lock:
+            return list(self._summaries.values())
+
+    def summary_items(self) -> List[Tuple[str, PromoSummary]]:
+        """(document key, summary) of every record, in document order"""
+        with self._lock:
+            return list(self._summaries.items())
+
+    def owners(self) -> List[str]:
+        """Sorted non-empty owners that have at least one record"""
+        with self._lock:
+            return sorted(owner for owner, codes in self._by_owner.items() if owner and codes)
+
+    def codes_for_owner(self, owner: str) -> Set[str]:
+        with self._lock:
+            return set(self._by_owner.get(owner, ()))
+
+    def codes_starting_between(self, start_date: str, end_date: str) -> List[str]:
+        """Codes whose start date falls within [start_date, end_date], earliest first"""
+        with self._lock:
+            lo = bisect_left(self._starts, (start_date, ''))
+            hi = bisect_right(self._starts, (end_date, _MAX_CODE))
+            return [code for _, code in self._starts[lo:hi]]
+
+    def codes_active_on(self, day: str) -> List[str]:
+        """Codes whose start date is on or before day and whose end date is on or after it"""
+        with self._lock:
+            started = self._starts[:bisect_right(self._starts, (day, _MAX_CODE))]
+            not_ended = self._ends[bisect_left(self._ends, (day, '')):]
+            # Walk the shorter range and check the other bound per record
+            if len(started) <= len(not_ended):
+                return [code for _, code in started if self._summaries[code].end and self._summaries[code].end >= day]
+            matches = [
+                (self._summaries[code].start, code) for _, code in not_ended
+                if self._summaries[code].start and self._summaries[code].start <= day
+            ]
+        return [code for _, code in sorted(matches)]
+
+    def search(self, query: str) -> List[str]:
+        """Codes whose code, bill facing name, owner or description contain query, best match first"""
+        with self._lock:
+            cached = self._search_cache.get(query)
+            if cached is not None:
+                return list(cached)
+            if self._text is None:
+                self._text = TrigramIndex.build(self._records)
+            results = self._text.search(query)
+            if len(self._search_cache) >= _SEARCH_CACHE_SIZE:
+                self._search_cache.clear()
+            self._search_cache[query] = results
+            return list(results)
+
+    def newest_codes(self, offset: int, limit: int) -> List[str]:
+        """One page of codes, most recently updated first"""
+        if offset < 0:
+            return []
+        with self._lock:
+            end = len(self._order) - offset
+            if end <= 0:
+                return []
+            return [code for _, code in reversed(self._order[max(end - limit, 0):end])]
+
+    def order_key(self, code: str) -> Tuple[str, str]:
+        """The (updated_at, code) key a record is listed by"""
+        summary = self._summaries.get(code)
+        # A record deleted since its page was read keeps its place at the end of the listing
+        return (summary.order if summary is not None else '', code)
+
+    def _order_keys(self, codes: Iterable[str]) -> List[Tuple[str, str]]:
+        """Listing keys of the codes that are still indexed; caller holds the lock"""
+        summaries = self._summaries
+        return [(summaries[code].order, code) for code in codes if code in summaries]
+
+    def page_after(self, key: Optional[Tuple[str, str]], limit: int, codes: Optional[Set[str]] = None) -> List[str]:
+        """
+        Up to limit codes listed after key (older than it), most recent first.
+
+        A key of None starts at the newest record. Without a codes filter this walks the
+        order array from a bisect; with one it keeps a top-k heap over the filtered codes.
+        """
+        with self._lock:
+            if codes is None:
+                end = len(self._order) if key is None else bisect_left(self._order, key)
+                return [code for _, code in reversed(self._order[max(end - limit, 0):end])]
+            keys = self._order_keys(codes)
+        return [code for _, code in heapq.nlargest(limit, (k for k in keys if key is None or k < key))]
+
+    def page_before(self, key: Tuple[str, str], limit: int, codes: Optional[Set[str]] = None) -> List[str]:
+        """Up to limit codes listed just before key (newer than it), most recent first"""
+        with self._lock:
+            if codes is None:
+                start = bisect_right(self._order, key)
+                return [code for _, code in reversed(self._order[start:start + limit])]
+            keys = self._order_keys(codes)
+        return [code for _, code in reversed(heapq.nsmallest(limit, (k for k in keys if k > key)))]
+
+    def sort_newest_first(self, codes: Iterable[str]) -> List[str]:
+        """Order a subset of codes most recently updated first (codes no longer indexed are dropped)"""
+        with self._lock:
+            keys = self._order_keys(codes)
+        return [code for _, code in sorted(keys, reverse=True)]
+
+
+class _IndexEntry:
+    __slots__ = ('source', 'records', 'index')
+
+    def __init__(self, source: Any, records: Dict[str, Any], index: PromoIndex):
+        self.source = source
+        self.records = records
+        self.index = index
+
+
+class IndexRegistry:
+    """
+    Process-wide PromoIndex per data file, tied to a version of the file's document.
+
+    The document cache hands out the same object until another process changes the
+    file, so an index is reused while its source document is the current one and
+    rebuilt otherwise. Record saves in this process update the document and its
+    index in place (see records_changed).
+    """
+    def __init__(self):
+        self._entries: Dict[str, _IndexEntry] = {}
+        # Saves seen per file, so an index built while a save ran is not kept
+        self._changes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filepath: str, source: Any,
+            build_records: Optional[Callable[[], Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], PromoIndex]:
+        """
+        Return (records, index) for the given version of a file's document.
+
+        build_records converts the document into a code -> record mapping when it is
+        not one already (e.g. the rebates array).
+        """
+        key = os.path.abspath(filepath)
+        with self._lock:
+            entry = self._entries.get(key)
+            changes = self._changes.get(key, 0)
+        if entry is not None and entry.source is source:
+            return entry.records, entry.index
+
+        records = build_records() if build_records is not None else source
+        index = PromoIndex.build(records)
+        with self._lock:
+            if self._changes.get(key, 0) == changes:
+                self._entries[key] = _IndexEntry(source, records, index)
+        return records, index
+
+    def peek(self, filepath: str) -> Optional[Tuple[Any, Dict[str, Any], PromoIndex]]:
+        """Return the (source, records, index) currently registered for filepath, or None"""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(filepath))
+        return None if entry is None else (entry.source, entry.records, entry.index)
+
+    def seed(self, filepath: str, source: Any, records: Dict[str, Any], index: PromoIndex):
+        """Install an index built elsewhere (e.g. loaded from a snapshot) for a version of a file's document"""
+        index.attach(records)
+        with self._lock:
+            self._entries[os.path.abspath(filepath)] = _IndexEntry(source, records, index)
+
+    def record_changed(self, filepath: str, source: Dict[str, Any], code: str):
+        """Re-index one record of source, which the caller just changed in place"""
+        self.records_changed(filepath, source, (code,))
+
+    def records_changed(self, filepath: str, source: Dict[str, Any], codes: Iterable[str]):
+        """
+        Re-index the given records of source, which the caller just changed in place.
+
+        The caller must hold the file's write lock, so saves are applied one at a time.
+        """
+        key = os.path.abspath(filepath)
+        with self._lock:
+            self._changes[key] = self._changes.get(key, 0) + 1
+            entry = self._entries.get(key)
+            if entry is None or entry.source is not source:
+                # Not indexed at this version; the next read builds it
+                return
+            for code in codes:
+                entry.index.update(code, source.get(code))
+
+
+# Shared by every PromoDataManager instance in the process
+promo_indexes = IndexRegistry()
@@ -0,0 +1,127 @@
+import os
+from typing import Dict, Any, List, Optional, Tuple
+from data import codec
+
+
+class ChangeJournal:
+    """
+    Append-only log of per-record deltas for a JSON snapshot file.
+
+    Each line is one compact JSON object: {"code": ..., "set": {...}, "unset": [...]}
+    for a save, or {"code": ..., "delete": true} for a delete. Replaying the journal
+    over the snapshot gives the current document. Entries are idempotent, so replaying
+    them over a snapshot that already contains them (e.g. after a crash during
+    compaction) gives the same result.
+    """
+    def __init__(self, snapshot_path: str):
+        self.path = snapshot_path + ".journal"
+        # Keep the file present so cache signatures always cover it
+        open(self.path, 'ab').close()
+
+    @staticmethod
+    def record_delta(old_data: Optional[Dict[str, Any]], new_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute the set/unset delta that turns old_data into new_data"""
+        if old_data is None:
+            return {'set': new_data, 'unset': []}
+        changed = {key: value for key, value in new_data.items() if key not in old_data or old_data[key] != value}
+        removed = [key for key in old_data if key not in new_data]
+        return {'set': changed, 'unset': removed}
+
+    def append(self, promo_code: str, delta: Optional[Dict[str, Any]]):
+        """Durably append one entry; a delta of None records a delete"""
+        self.append_many([(promo_code, delta)])
+
+    def append_many(self, changes: List[Tuple[str, Optional[Dict[str, Any]]]]):
+        """Durably append one entry per (promo_code, delta) pair with a single write and fsync"""
+        lines = []
+        for promo_code, delta in changes:
+            entry = {'code': promo_code}
+            if delta is None:
+                entry['delete'] = True
+            else:
+                entry['set'] = delta['set']
+                if delta['unset']:
+                    entry['unset'] = delta['unset']
+            lines.append(codec.dumps(entry) + b"\n")
+        if not lines:
+            return
+        content = b"".join(lines)
+
+        with open(self.path, 'a+b') as f:
+            # Terminate a torn last line left by a crash so these entries stay readable
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    content = b"\n" + content
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_entries(self) -> List[Dict[str, Any]]:
+        """Read all complete entries, skipping a line torn by a crash mid-append"""
+        entries = []
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(codec.loads(line))
+                    except codec.DECODE_ERRORS:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def replay(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the journal to a snapshot, returning a new document (the snapshot is not modified)"""
+        data = dict(snapshot)
+        for entry in self.read_entries():
+            self.apply(data, entry)
+        return data
+
+    def entries_for(self, promo_code: str) -> List[Dict[str, Any]]:
+        """Read the complete entries for one record, decoding only the lines that mention its code"""
+        needle = codec.dumps(promo_code)
+        entries = []
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if needle not in line:
+                        continue
+                    try:
+                        entry = codec.loads(line)
+                    except codec.DECODE_ERRORS:
+                        continue
+                    if entry.get('code') == promo_code:
+                        entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def apply(data: Dict[str, Any], entry: Dict[str, Any]):
+        """Apply one journal entry to a document in place, copying the touched record"""
+        promo_code = entry['code']
+        if entry.get('delete'):
+            data.pop(promo_code, None)
+            return
+        record = dict(data.get(promo_code, {}))
+        record.update(entry.get('set', {}))
+        for key in entry.get('unset', []):
+            record.pop(key, None)
+        data[promo_code] = record
+
+    def size(self) -> int:
+        """Current journal size in bytes"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def truncate(self):
+        """Empty the journal once its entries have been folded into the snapshot"""
+        with open(self.path, 'r+b') as f:
+            f.truncate(0)
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,111 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+from data import codec
+from data.cache import file_signature
+from data.fileio import atomic_write
+
+
+# Bump when the sidecar layout changes so older sidecars are treated as missing
+OFFSETS_VERSION = 1
+
+
+class StaleOffsets(Exception):
+    """Raised when a sidecar no longer describes its data file; read the whole document instead"""
+
+
+class RecordOffsets:
+    """code -> (byte offset, length) of each record's JSON in one version of a catalog file"""
+    __slots__ = ('signature', 'offsets')
+
+    def __init__(self, signature: Tuple[int, int, int], offsets: Dict[str, Any]):
+        self.signature = signature
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+
+def offsets_path(filepath: str) -> str:
+    return filepath + ".offsets"
+
+
+def dump_with_offsets(data: Dict[str, Any]) -> Tuple[bytes, Dict[str, Tuple[int, int]]]:
+    """
+    Encode a code -> record document as compact JSON, noting where each record's value sits.
+
+    The bytes are the same codec.dumps(data) would give; they are just assembled one
+    record at a time.
+    """
+    parts = [b"{"]
+    offsets = {}
+    position = 1
+    for code, record in data.items():
+        if len(parts) > 1:
+            parts.append(b",")
+            position += 1
+        key = codec.dumps(str(code)) + b":"
+        value = codec.dumps(record)
+        parts.append(key)
+        parts.append(value)
+        position += len(key)
+        offsets[str(code)] = (position, len(value))
+        position += len(value)
+    parts.append(b"}")
+    return b"".join(parts), offsets
+
+
+def write_offsets(filepath: str, offsets: Dict[str, Tuple[int, int]]):
+    """Write the sidecar for the version of filepath that was just written"""
+    atomic_write(offsets_path(filepath), codec.dumps({
+        'version': OFFSETS_VERSION,
+        'signature': file_signature(filepath),
+        'offsets': offsets
+    }))
+
+
+def remove_offsets(filepath: str):
+    try:
+        os.remove(offsets_path(filepath))
+    except FileNotFoundError:
+        pass
+
+
+def load_offsets(filepath: str) -> Optional[RecordOffsets]:
+    """Read filepath's sidecar, or None if it is missing, unreadable or written for another version of the file"""
+    try:
+        with open(offsets_path(filepath), 'rb') as f:
+            sidecar = codec.loads(f.read())
+    except (FileNotFoundError,) + codec.DECODE_ERRORS:
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get('version') != OFFSETS_VERSION or not sidecar.get('signature'):
+        return None
+    signature = tuple(sidecar['signature'])
+    if signature != file_signature(filepath):
+        return None
+    return RecordOffsets(signature, sidecar.get('offsets') or {})
+
+
+def read_record(filepath: str, offsets: RecordOffsets, code: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode one record from filepath at its sidecar offset; None if the file has no such record.
+
+    The file is checked against the sidecar's signature through the open handle, so a
+    snapshot swapped in concurrently is detected rather than read at the old offsets.
+    Raises StaleOffsets when the sidecar does not match.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if (st.st_mtime_ns, st.st_size, st.st_ino) != offsets.signature:
+                raise StaleOffsets(filepath)
+            location = offsets.offsets.get(code)
+            if location is None:
+                return None
+            f.seek(location[0])
+            content = f.read(location[1])
+    except FileNotFoundError:
+        raise StaleOffsets(filepath)
+    try:
+        return codec.loads(content)
+    except codec.DECODE_ERRORS:
+        raise StaleOffsets(filepath)
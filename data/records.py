@@ -0,0 +1,140 @@
+import copy
+import os
+import threading
+from collections.abc import Mapping
+from datetime import date
+from typing import Any, Dict, Iterator, Optional, Type
+from data.indexes import iso_date
+
+
+def date_ordinal(value: Any) -> Optional[int]:
+    """date.toordinal() of a YYYY-MM-DD string, or None if it is not a valid date"""
+    # Fast path for the stored format; anything else goes through the strict parser
+    if isinstance(value, str) and len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value).toordinal()
+        except ValueError:
+            return None
+    day = iso_date(value)
+    return date.fromisoformat(day).toordinal() if day else None
+
+
+class PromoRecord(Mapping):
+    """
+    Read-only typed view of one stored promotion.
+
+    Wraps the record dict of the shared, cached document instead of copying it, so
+    listing every promotion costs one small slotted object per record. The fields
+    hot paths filter on are parsed once (dates into ordinals); every other field is
+    read through the mapping interface, so templates use a record like the dict it
+    replaces (promo.orbit_id, promo.get('status')). to_dict() gives an editable copy
+    for saving back through the data manager.
+    """
+    __slots__ = ('_data', 'code', 'owner', 'start_ordinal', 'end_ordinal')
+    promo_type = 'RDC'
+
+    def __init__(self, promo_code: str, promo_data: Dict[str, Any]):
+        self._data = promo_data
+        self.code = promo_data.get('code', promo_code)
+        self.owner = promo_data.get('owner', '')
+        self.start_ordinal = date_ordinal(promo_data.get('promo_start_date'))
+        self.end_ordinal = date_ordinal(promo_data.get('promo_end_date'))
+
+    @classmethod
+    def from_dict(cls, promo_code: str, promo_data: Dict[str, Any]) -> 'PromoRecord':
+        """Build a record over a private copy of promo_data"""
+        return cls(promo_code, copy.deepcopy(promo_data))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """An independent dict of the record, safe to modify and save"""
+        return copy.deepcopy(self._data)
+
+    def __getitem__(self, field: str) -> Any:
+        return self._data[field]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.code!r})"
+
+    def is_active(self, today_ordinal: int) -> bool:
+        """Whether the promotion ends after the given day (date.toordinal())"""
+        return self.end_ordinal is not None and self.end_ordinal > today_ordinal
+
+    def starts_between(self, start_ordinal: int, end_ordinal: int) -> bool:
+        """Whether the start date falls within [start_ordinal, end_ordinal]"""
+        return self.start_ordinal is not None and start_ordinal <= self.start_ordinal <= end_ordinal
+
+
+class RdcPromoRecord(PromoRecord):
+    __slots__ = ()
+    promo_type = 'RDC'
+
+
+class SpePromoRecord(PromoRecord):
+    __slots__ = ()
+    promo_type = 'SPE'
+
+
+class RebateRecord(PromoRecord):
+    """View of a rebate in the snake_case promotion format (see PromoDataManager._format_rebate)"""
+    __slots__ = ()
+    promo_type = 'REBATE'
+
+
+def record_class(is_spe: bool = False) -> Type[PromoRecord]:
+    """The record class for RDC or SPE promotions"""
+    return SpePromoRecord if is_spe else RdcPromoRecord
+
+
+class _RecordsEntry:
+    __slots__ = ('source', 'version', 'records')
+
+    def __init__(self, source: Dict[str, Any], version: int, records: Dict[str, PromoRecord]):
+        self.source = source
+        self.version = version
+        self.records = records
+
+
+class RecordCache:
+    """
+    Process-wide record views per data file, tied to a version of the file's document.
+
+    Like IndexRegistry, views are reused while their source document is the current
+    one and the caller's version (the PromoIndex version, which every save bumps) is
+    unchanged. Saves replace only the saved record dicts, so a rebuild keeps every
+    view whose record dict is unchanged and creates only the rest.
+    """
+    def __init__(self):
+        self._entries: Dict[str, _RecordsEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filepath: str, source: Dict[str, Any],
+            record_type: Type[PromoRecord], version: int = 0) -> Dict[str, PromoRecord]:
+        """Return code -> record view for the given version of a file's records"""
+        key = os.path.abspath(filepath)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry.source is source and entry.version == version:
+            return entry.records
+
+        previous = entry.records if entry is not None else {}
+        records = {}
+        for promo_code, promo_data in list(source.items()):
+            if not isinstance(promo_data, dict):
+                continue
+            view = previous.get(promo_code)
+            if view is None or view._data is not promo_data or type(view) is not record_type:
+                view = record_type(promo_code, promo_data)
+            records[promo_code] = view
+        with self._lock:
+            self._entries[key] = _RecordsEntry(source, version, records)
+        return records
+
+
+# Shared by every PromoDataManager instance in the process
+promo_records = RecordCache()
@@ -0,0 +1,177 @@
+import os
+import re
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from data.cache import file_signature
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static')
+
+# Leading code of an account type or sales application line ("A02 - ...", "S21 – Care", "S16- All")
+_CODE_PATTERN = re.compile(r'^\s*([A-Za-z0-9]+)\s*[-–|]')
+# SOC grouping lines start "Group <code> - ..."
+_SOC_GROUP_PATTERN = re.compile(r'^\s*Group\s+([A-Za-z0-9]+)')
+# Numbered SOC groups ("Group 3", "Group 9A") have two-character, G-prefixed codes (G03, G9A)
+_NUMBERED_GROUP_PATTERN = re.compile(r'^(\d{1,2}|\d[A-Z])$')
+
+
+class ReferenceList(NamedTuple):
+    """Parsed reference file: dropdown codes plus the pre-rendered tooltip HTML"""
+    codes: Tuple[str, ...]
+    details_html: str
+
+
+def soc_group_code(label: str) -> Optional[str]:
+    """Dropdown code for a soc_grouping.txt group label, e.g. 'Group 3 - MI' -> 'G03'"""
+    match = _SOC_GROUP_PATTERN.match(label)
+    if not match:
+        return None
+    code = match.group(1)
+    if _NUMBERED_GROUP_PATTERN.match(code):
+        return f"G{code.zfill(2)}"
+    return code
+
+
+def leading_code(line: str) -> Optional[str]:
+    """Code at the start of an account type or sales application line"""
+    match = _CODE_PATTERN.match(line)
+    return match.group(1) if match else None
+
+
+def _unique(codes: List[Optional[str]]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(code for code in codes if code))
+
+
+def parse_soc_groupings(content: str) -> ReferenceList:
+    """Parse soc_grouping.txt: 'Group <code> - <name>|<comma separated details>' per line"""
+    details = []
+    codes = []
+    for line in content.splitlines():
+        line = line.strip()
+        if line and '|' in line:
+            # Split on the first | to separate group info from details
+            group_part, details_part = line.split('|', 1)
+            codes.append(soc_group_code(group_part))
+
+            # Format the group part
+            details.append(f"<strong>{group_part.strip()}</strong>")
+
+            # Split details by comma and format as bullet points
+            for item in details_part.split(','):
+                if item.strip():
+                    details.append(f"• {item.strip()}")
+
+            details.append("")  # Add blank line between groups
+        elif line:
+            # Handle lines without | separator
+            codes.append(soc_group_code(line))
+            details.append(f"<strong>{line}</strong>")
+            details.append("")
+    return ReferenceList(_unique(codes), "<br>".join(details))
+
+
+def parse_account_types(content: str) -> ReferenceList:
+    """Parse account_types.txt: '<code> - <name>|<description>' per line"""
+    details = []
+    codes = []
+    for line in content.strip().split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        codes.append(leading_code(line))
+
+        if '|' in line:
+            parts = line.split('|')
+            account_type = parts[0].strip()
+            description = parts[1].strip()
+
+            details.append(f"<strong>{account_type}</strong>")
+            if description:
+                details.append(description)
+            details.append("")
+        else:
+            # Handle lines without | separator
+            details.append(f"<strong>{line}</strong>")
+            details.append("")
+
+    if not details:
+        return ReferenceList((), "No account type information found.")
+    return ReferenceList(_unique(codes), "<br>".join(details))
+
+
+def parse_sales_applications(content: str) -> ReferenceList:
+    """Parse sales_apps.txt: '<code> - <description>' per line"""
+    details = []
+    codes = []
+    for line in content.strip().split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        codes.append(leading_code(line))
+
+        if ' - ' in line:
+            sales_app, description = (part.strip() for part in line.split(' - ', 1))
+            details.append(f"<strong>{sales_app}</strong>")
+            if description:
+                details.append(description)
+            details.append("")
+        else:
+            # Handle lines without - separator
+            details.append(f"<strong>{line}</strong>")
+            details.append("")
+
+    if not details:
+        return ReferenceList((), "No sales application information found.")
+    return ReferenceList(_unique(codes), "<br>".join(details))
+
+
+# name -> (file in static/, parser, details shown when the file is missing)
+REFERENCE_SOURCES: Dict[str, Tuple[str, Callable[[str], ReferenceList], str]] = {
+    'soc_groupings': ('soc_grouping.txt', parse_soc_groupings, "SOC Grouping file not found."),
+    'account_types': ('account_types.txt', parse_account_types, "Account Types file not found."),
+    'sales_applications': ('sales_apps.txt', parse_sales_applications, "Sales Applications file not found."),
+}
+
+
+class ReferenceRegistry:
+    """
+    Load-once registry of the static reference files behind the edit page dropdowns.
+
+    Each file is parsed into frozen codes and pre-rendered tooltip HTML the first time
+    it is needed (or by preload() at startup) and re-parsed only when its
+    (mtime, size, inode) signature changes, so edits to the files show up without a restart.
+    """
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self._entries: Dict[str, Tuple[Optional[Tuple[int, int, int]], ReferenceList]] = {}
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Parse every reference file now"""
+        for name in REFERENCE_SOURCES:
+            self.get(name)
+
+    def get(self, name: str) -> ReferenceList:
+        """Get the parsed reference list, re-parsing its file if it changed"""
+        filename, parser, missing_message = REFERENCE_SOURCES[name]
+        path = os.path.join(self.static_dir, filename)
+        signature = file_signature(path)
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        if signature is None:
+            parsed = ReferenceList((), missing_message)
+        else:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    parsed = parser(f.read())
+            except OSError as e:
+                parsed = ReferenceList((), f"Error reading {filename}: {str(e)}")
+        with self._lock:
+            self._entries[name] = (signature, parsed)
+        return parsed
+
+
+# Shared by every PromoDataManager instance in the process
+reference_data = ReferenceRegistry()
@@ -0,0 +1,74 @@
+from typing import Dict, Any, Optional, Tuple
+
+
+class PromoSession:
+    """
+    Unit of work over a data manager for one request.
+
+    Records read through the session are kept in an identity map, so every step of a
+    request edits the same dict. Saves are only staged; flush() writes each staged
+    record once, with a single change summary covering all the steps. Use it as a
+    context manager to flush on success and discard the staged saves on error.
+    """
+    def __init__(self, data_manager, user_name: str = "System"):
+        self.data_manager = data_manager
+        self.user_name = user_name
+        # (is_spe, promo_code) -> record
+        self._records: Dict[Tuple[bool, str], Dict[str, Any]] = {}
+        # (is_spe, promo_code) -> user the save is attributed to
+        self._staged: Dict[Tuple[bool, str], str] = {}
+
+    def __enter__(self) -> "PromoSession":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
+
+    def get_promo(self, promo_code: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get a promotion, returning the same dict for every call within the session"""
+        key = (is_spe, promo_code)
+        if key not in self._records:
+            if is_spe:
+                self._records[key] = self.data_manager.get_spe_promo(promo_code)
+            else:
+                self._records[key] = self.data_manager.get_promo(promo_code)
+        return self._records[key]
+
+    def get_spe_promo(self, promo_code: str) -> Dict[str, Any]:
+        """Get an SPE promotion through the identity map"""
+        return self.get_promo(promo_code, is_spe=True)
+
+    def save_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: Optional[str] = None,
+                   is_spe: bool = False):
+        """Stage a promotion to be written on flush; later edits to promo_data are included"""
+        key = (is_spe, promo_code)
+        self._records[key] = promo_data
+        self._staged[key] = user_name or self._staged.get(key) or self.user_name
+
+    def save_spe_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: Optional[str] = None):
+        """Stage an SPE promotion to be written on flush"""
+        self.save_promo(promo_code, promo_data, user_name, is_spe=True)
+
+    @property
+    def pending(self) -> int:
+        """Number of records waiting to be written"""
+        return len(self._staged)
+
+    def discard(self):
+        """Drop staged saves without writing them"""
+        self._staged.clear()
+        self._records.clear()
+
+    def flush(self) -> int:
+        """Write the staged records, one bulk save per promotion type and user, and return how many were written"""
+        staged, self._staged = self._staged, {}
+        batches: Dict[Tuple[bool, str], Dict[str, Dict[str, Any]]] = {}
+        for (is_spe, promo_code), user_name in staged.items():
+            batches.setdefault((is_spe, user_name), {})[promo_code] = self._records[(is_spe, promo_code)]
+        for (is_spe, user_name), promos in batches.items():
+            self.data_manager.save_promos_bulk(promos, user_name, is_spe=is_spe)
+        return len(staged)
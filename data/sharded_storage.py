@@ -0,0 +1,252 @@
+import copy
+import os
+from contextlib import ExitStack
+from typing import Dict, Any, Iterable, List, Optional
+from datetime import datetime
+from data.cache import document_cache
+from data.fileio import file_lock, safe_record_name
+from data.history import make_entry
+from data.journal import ChangeJournal
+from data.records import PromoRecord, record_class
+from data.storage import PromoDataManager
+
+
+# Summary fields kept in the manifest; list and pagination views read only these
+MANIFEST_FIELDS = (
+    'code', 'owner', 'bill_facing_name', 'orbit_id', 'description',
+    'promo_start_date', 'promo_end_date', 'updated_at'
+)
+
+
+class ShardedPromoDataManager(PromoDataManager):
+    """
+    Manages promotion data as one JSON file per promo code plus a manifest index.
+
+    RDC records live in data/promos/<code>.json and SPE records in
+    data/spe_promos/<code>.json. get_promo and save_promo touch a single small file,
+    list views read only the manifest, and saves to different promos only contend
+    on the short manifest update.
+    """
+    def __init__(self, data_dir: str = "data"):
+        self.promo_shards_dir = os.path.join(data_dir, "promos")
+        self.spe_shards_dir = os.path.join(data_dir, "spe_promos")
+        self.promo_manifest_file = os.path.join(data_dir, "promos_manifest.json")
+        self.spe_manifest_file = os.path.join(data_dir, "spe_promos_manifest.json")
+        super().__init__(data_dir)
+
+    def _initialize_files(self):
+        """Create the shard directories and split the JSON catalogs into shards on first start"""
+        os.makedirs(self.promo_shards_dir, exist_ok=True)
+        os.makedirs(self.spe_shards_dir, exist_ok=True)
+
+        # Records are read from their shard files, so the flat catalogs need no offsets sidecar
+        self._offset_indexed = ()
+
+        # Manifest updates are journaled like the flat catalogs
+        for manifest_file in (self.promo_manifest_file, self.spe_manifest_file):
+            self._journals[manifest_file] = ChangeJournal(manifest_file)
+
+        # Split only the catalogs whose manifest is missing; the other may already have edits in its shards
+        unmigrated = [is_spe for is_spe in (False, True) if not os.path.exists(self._manifest_file(is_spe))]
+        if unmigrated:
+            super()._initialize_files()
+            for is_spe in unmigrated:
+                self._migrate_catalog(is_spe)
+
+    def _shards_dir(self, is_spe: bool) -> str:
+        return self.spe_shards_dir if is_spe else self.promo_shards_dir
+
+    def _manifest_file(self, is_spe: bool) -> str:
+        return self.spe_manifest_file if is_spe else self.promo_manifest_file
+
+    def _shard_path(self, promo_code: str, is_spe: bool = False) -> str:
+        """Get the record file for a promo code"""
+        return os.path.join(self._shards_dir(is_spe), f"{safe_record_name(promo_code)}.json")
+
+    def _indexed_file(self, is_spe: bool = False) -> str:
+        """List, owner and date queries are answered from the manifest indexes"""
+        return self._manifest_file(is_spe)
+
+    def _select_records(self, records: Dict[str, Any], codes: List[str], is_spe: bool = False) -> Dict[str, Any]:
+        """Read the record files for codes selected from the manifest"""
+        selected = {}
+        for promo_code in codes:
+            promo_data = self._read_record(promo_code, is_spe)
+            if promo_data is not None:
+                selected[promo_code] = dict(promo_data)
+        return selected
+
+    def _manifest_entry(self, promo_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: promo_data.get(field, '') for field in MANIFEST_FIELDS}
+
+    def migrate_from_json(self) -> Dict[str, int]:
+        """
+        Split promotions.json and spe_promotions.json into per-promo files and build the manifests.
+
+        Returns:
+            Number of records written per promotion type
+        """
+        return {
+            'promos': self._migrate_catalog(is_spe=False),
+            'spe_promos': self._migrate_catalog(is_spe=True)
+        }
+
+    def _migrate_catalog(self, is_spe: bool) -> int:
+        """Split one flat catalog into per-promo files and write its manifest; returns the records written"""
+        records = self._load_json(self.spe_file if is_spe else self.promo_file)
+        manifest_file = self._manifest_file(is_spe)
+        with file_lock(manifest_file):
+            for promo_code, promo_data in list(records.items()):
+                self._save_json(self._shard_path(promo_code, is_spe), promo_data)
+            self._save_json(manifest_file, {
+                promo_code: self._manifest_entry(promo_data) for promo_code, promo_data in list(records.items())
+            })
+        return len(records)
+
+    def _read_record(self, promo_code: str, is_spe: bool) -> Optional[Dict[str, Any]]:
+        """Read one record file through the shared document cache (None if missing)"""
+        path = self._shard_path(promo_code, is_spe)
+        if not os.path.exists(path):
+            return None
+        return document_cache.get(path, self._read_json_file, generation=self._generation.value()) or None
+
+    def _update_manifest(self, is_spe: bool, records: Dict[str, Optional[Dict[str, Any]]]):
+        """Bring the manifest entries for records up to date with one journal write; None removes an entry"""
+        manifest_file = self._manifest_file(is_spe)
+        with file_lock(manifest_file):
+            manifest = self._load_json(manifest_file)
+            changes = []
+            for promo_code, promo_data in records.items():
+                new_entry = None if promo_data is None else self._manifest_entry(promo_data)
+                if new_entry != manifest.get(promo_code):
+                    changes.append((promo_code, manifest.get(promo_code), new_entry))
+            if changes:
+                self._write_records(manifest_file, manifest, changes)
+
+    def _write_shard(self, promo_code: str, promo_data: Optional[Dict[str, Any]], is_spe: bool):
+        """Write or delete a record file and update its manifest entry; caller holds the shard lock"""
+        path = self._shard_path(promo_code, is_spe)
+        if promo_data is None:
+            if os.path.exists(path):
+                os.remove(path)
+            document_cache.invalidate(path)
+            self._generation.bump()
+        else:
+            self._save_json(path, promo_data)
+
+        self._update_manifest(is_spe, {promo_code: promo_data})
+
+    def _save_sharded(self, promo_code: str, promo_data: Dict[str, Any], user_name: str, is_spe: bool):
+        path = self._shard_path(promo_code, is_spe)
+        with file_lock(path):
+            old_data = self._read_record(promo_code, is_spe)
+            history = self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)
+            self._write_shard(promo_code, promo_data, is_spe)
+            self._finish_saves([(promo_code, old_data, promo_data, history)], is_spe)
+
+    def get_promo(self, promo_code: str) -> Dict[str, Any]:
+        """Get a specific promotion by code"""
+        return copy.deepcopy(self._read_record(promo_code, False) or {})
+
+    def get_spe_promo(self, promo_code: str) -> Dict[str, Any]:
+        """Get a specific SPE promotion by code"""
+        return copy.deepcopy(self._read_record(promo_code, True) or {})
+
+    def _read_all(self, is_spe: bool) -> Dict[str, Any]:
+        manifest = self._load_json(self._manifest_file(is_spe))
+        return self._select_records(manifest, list(manifest), is_spe)
+
+    def get_all_promos(self) -> Dict[str, Any]:
+        """Get all promotions (reads every record file; list views should use the manifest)"""
+        return self._read_all(False)
+
+    def get_all_spe_promos(self) -> Dict[str, Any]:
+        """Get all SPE promotions (reads every record file; list views should use the manifest)"""
+        return self._read_all(True)
+
+    def _record_views(self, codes: Iterable[str], is_spe: bool) -> Dict[str, PromoRecord]:
+        """Record views over the cached record files for codes, skipping missing files"""
+        cls = record_class(is_spe)
+        views = {}
+        for promo_code in codes:
+            promo_data = self._read_record(promo_code, is_spe)
+            if promo_data is not None:
+                views[promo_code] = cls(promo_code, promo_data)
+        return views
+
+    def _promo_records(self, is_spe: bool = False) -> Dict[str, PromoRecord]:
+        return self._record_views(self._load_json(self._manifest_file(is_spe)), is_spe)
+
+    def search_promo_records(self, query: str, is_spe: bool = False) -> List[PromoRecord]:
+        """Like search_promos, but as read-only record views (reads only the matching record files)"""
+        return list(self._record_views(self._promo_index(is_spe)[1].search(query), is_spe).values())
+
+    def save_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
+        """Save or update a promotion with change tracking"""
+        self._save_sharded(promo_code, promo_data, user_name, False)
+
+    def save_spe_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
+        """Save or update an SPE promotion with change tracking"""
+        self._save_sharded(promo_code, promo_data, user_name, True)
+
+    def save_promos_bulk(self, promos: Dict[str, Dict[str, Any]], user_name: str = "System",
+                         is_spe: bool = False) -> List[str]:
+        """Save or update several promotions, writing their record files and one manifest update"""
+        with ExitStack() as stack:
+            # Lock the shards in a fixed order so concurrent bulk saves cannot deadlock
+            for promo_code in sorted(promos):
+                stack.enter_context(file_lock(self._shard_path(promo_code, is_spe)))
+            saved = []
+            for promo_code, promo_data in promos.items():
+                old_data = self._read_record(promo_code, is_spe)
+                saved.append((promo_code, old_data, promo_data, self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)))
+                self._save_json(self._shard_path(promo_code, is_spe), promo_data)
+            self._update_manifest(is_spe, promos)
+            self._finish_saves(saved, is_spe)
+        return list(promos)
+
+    def patch_many(self, promo_codes: Iterable[str], patch: Dict[str, Any], user_name: str = "System",
+                   is_spe: bool = False) -> List[str]:
+        """Apply one field patch to several existing promotions, with one manifest update"""
+        codes = list(dict.fromkeys(promo_codes))
+        with ExitStack() as stack:
+            for promo_code in sorted(codes):
+                stack.enter_context(file_lock(self._shard_path(promo_code, is_spe)))
+            patched = {}
+            saved = []
+            for promo_code in codes:
+                old_data = self._read_record(promo_code, is_spe)
+                if old_data is None:
+                    continue
+                promo_data = self._patched(old_data, patch)
+                saved.append((promo_code, old_data, promo_data, self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)))
+                self._save_json(self._shard_path(promo_code, is_spe), promo_data)
+                patched[promo_code] = promo_data
+            self._update_manifest(is_spe, patched)
+            self._finish_saves(saved, is_spe)
+        return list(patched)
+
+    def add_permanent_version_entry(self, promo_code: str, entry: str, is_spe: bool = False):
+        """Add a permanent entry to version history (for approvals, PCR versions, etc.)"""
+        with file_lock(self._shard_path(promo_code, is_spe)):
+            old_data = self._read_record(promo_code, is_spe)
+            if old_data is not None:
+                promo_data = dict(old_data)
+                history = self._history_entries(promo_code, promo_data, old_data, [make_entry(None, 'note', entry)], is_spe)
+                promo_data['updated_at'] = datetime.now().isoformat()
+                self._write_shard(promo_code, promo_data, is_spe)
+                self._append_history([(promo_code, history)], is_spe)
+
+    def delete_promo(self, promo_code: str):
+        """Delete a promotion"""
+        with file_lock(self._shard_path(promo_code)):
+            self._write_shard(promo_code, None, False)
+
+    def delete_spe_promo(self, promo_code: str):
+        """Delete an SPE promotion"""
+        with file_lock(self._shard_path(promo_code, True)):
+            self._write_shard(promo_code, None, True)
+
+    def get_date_mismatched_promos(self) -> List[Dict[str, Any]]:
+        """Get promotions with date mismatches between ORBIT and PAM"""
+        return self._build_date_mismatch_report(list(self._load_json(self.promo_manifest_file).items()))
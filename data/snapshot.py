@@ -0,0 +1,43 @@
+import pickle
+from typing import Any, Dict, Optional
+from data.fileio import atomic_write
+
+
+# Bump whenever PromoIndex, PromoSummary, TrigramIndex or the payload layout change,
+# so snapshots written by older code are ignored instead of unpickled into new classes
+SNAPSHOT_VERSION = 2
+
+
+def write_snapshot(path: str, sources: Dict[str, Dict[str, Any]]):
+    """
+    Atomically write a catalog snapshot.
+
+    sources maps a data file name to {'signature', 'document', 'records', 'index'}:
+    the file signature the document was read at, the parsed document, the records
+    its index was built from (the document itself for the promotion files) and the
+    PromoIndex, which is stored without its records (IndexRegistry.seed re-attaches
+    them). Objects shared between them are stored once.
+    """
+    payload = {'version': SNAPSHOT_VERSION, 'sources': sources}
+    atomic_write(path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def read_snapshot(path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Read a catalog snapshot's sources, or None if it is missing, unreadable or from another version.
+
+    The snapshot is a pickle written by this app into its own data directory, and is
+    only ever read from there.
+    """
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated, corrupt or written by incompatible code: fall back to the JSON files
+        return None
+    if not isinstance(payload, dict) or payload.get('version') != SNAPSHOT_VERSION:
+        return None
+    return payload.get('sources')
+
@@ -0,0 +1,493 @@
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from data import codec
+from data.history import make_entry
+from data.indexes import PromoIndex, PromoSummary, match_score
+from data.records import PromoRecord
+from data.storage import PromoDataManager, decode_cursor, encode_cursor
+
+
+# RDC and SPE promotions share one table layout; the summary columns are copies of
+# fields inside the JSON document so filters, sorting and pagination can use indexes
+_PROMO_TABLES = ('promos', 'spe_promos')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS rebates (
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    code TEXT PRIMARY KEY,
+    owner TEXT NOT NULL DEFAULT '',
+    bill_facing_name TEXT NOT NULL DEFAULT '',
+    orbit_id TEXT NOT NULL DEFAULT '',
+    promo_start_date TEXT NOT NULL DEFAULT '',
+    promo_end_date TEXT NOT NULL DEFAULT '',
+    updated_at TEXT,
+    sort_key TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_owner_idx ON {table} (owner);
+CREATE INDEX IF NOT EXISTS {table}_start_idx ON {table} (promo_start_date);
+CREATE INDEX IF NOT EXISTS {table}_end_idx ON {table} (promo_end_date);
+CREATE INDEX IF NOT EXISTS {table}_updated_idx ON {table} (updated_at);
+CREATE INDEX IF NOT EXISTS {table}_sort_idx ON {table} (sort_key, code);
+""" for table in _PROMO_TABLES)
+
+
+# Matches YYYY-MM-DD values so malformed dates never fall inside a date range
+_DATE_GLOB = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+
+
+def _like_pattern(text: str) -> str:
+    """Build a LIKE pattern matching text as a literal substring"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class SQLitePromoDataManager(PromoDataManager):
+    """
+    Manages persistent storage for promotion data in a SQLite database.
+
+    Keeps the PromoDataManager API; single-record reads and writes use the primary
+    key, and pagination, owner filters and date windows run as indexed queries.
+    """
+    def __init__(self, data_dir: str = "data", db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(data_dir, "promotions.db")
+        self._local = threading.local()
+        # (generation, indexes) of the last _catalog_indexes build
+        self._catalog_memo: Optional[Tuple[int, List[Tuple[str, PromoIndex]]]] = None
+        super().__init__(data_dir)
+
+    def _initialize_files(self):
+        """Create the schema and import the JSON files the first time the database is opened"""
+        # Records are read from the database, so the JSON files need no offsets sidecar
+        self._offset_indexed = ()
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        # Rows saved with an empty updated_at used to get '' or 'None' as their sort key
+        for table in _PROMO_TABLES:
+            conn.execute(
+                f"UPDATE {table} SET sort_key = COALESCE(json_extract(data, '$.code'), code) "
+                "WHERE sort_key IN ('', 'None')"
+            )
+
+        migrated = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        if migrated is None:
+            # Let the JSON backend write its default data if there is nothing to import yet
+            super()._initialize_files()
+            self.migrate_from_json()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it in WAL mode on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block in a write transaction, taking the write lock up front"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._generation.bump()
+
+    def _table(self, is_spe: bool) -> str:
+        return 'spe_promos' if is_spe else 'promos'
+
+    def _fetch_record(self, conn: sqlite3.Connection, table: str, promo_code: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute(f"SELECT data FROM {table} WHERE code = ?", (promo_code,)).fetchone()
+        return codec.loads(row['data']) if row else None
+
+    def _upsert_record(self, conn: sqlite3.Connection, table: str, promo_code: str, promo_data: Dict[str, Any]):
+        conn.execute(
+            f"INSERT INTO {table} (code, owner, bill_facing_name, orbit_id, promo_start_date, promo_end_date, "
+            "updated_at, sort_key, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(code) DO UPDATE SET owner = excluded.owner, bill_facing_name = excluded.bill_facing_name, "
+            "orbit_id = excluded.orbit_id, promo_start_date = excluded.promo_start_date, "
+            "promo_end_date = excluded.promo_end_date, updated_at = excluded.updated_at, "
+            "sort_key = excluded.sort_key, data = excluded.data",
+            (
+                promo_code,
+                str(promo_data.get('owner') or ''),
+                str(promo_data.get('bill_facing_name') or ''),
+                str(promo_data.get('orbit_id') or ''),
+                str(promo_data.get('promo_start_date') or ''),
+                str(promo_data.get('promo_end_date') or ''),
+                promo_data.get('updated_at'),
+                # Same ordering key the JSON backend sorts on
+                PromoSummary.order_value(promo_code, promo_data),
+                codec.dumps(promo_data).decode('utf-8')
+            )
+        )
+
+    def migrate_from_json(self) -> Dict[str, int]:
+        """
+        One-shot import of promotions.json, spe_promotions.json and rebates.json.
+
+        Replaces the current database contents with whatever the JSON files hold.
+
+        Returns:
+            Number of records imported per table
+        """
+        # _load_json replays the JSON backend's change journals over the snapshots
+        sources = {
+            'promos': self._load_json(self.promo_file),
+            'spe_promos': self._load_json(self.spe_file)
+        }
+        rebates = self._load_json(self.rebates_file)
+        if not isinstance(rebates, list):
+            rebates = []
+
+        with self._transaction() as conn:
+            for table, records in sources.items():
+                conn.execute(f"DELETE FROM {table}")
+                for promo_code, promo_data in records.items():
+                    self._upsert_record(conn, table, promo_code, promo_data)
+
+            conn.execute("DELETE FROM rebates")
+            conn.executemany(
+                "INSERT INTO rebates (position, data) VALUES (?, ?)",
+                [(i, codec.dumps(rebate).decode('utf-8')) for i, rebate in enumerate(rebates)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                (datetime.now().isoformat(),)
+            )
+
+        counts = {table: len(records) for table, records in sources.items()}
+        counts['rebates'] = len(rebates)
+        return counts
+
+    def get_promo(self, promo_code: str) -> Dict[str, Any]:
+        """Get a specific promotion by code"""
+        return self._fetch_record(self._connect(), 'promos', promo_code) or {}
+
+    def get_spe_promo(self, promo_code: str) -> Dict[str, Any]:
+        """Get a specific SPE promotion by code"""
+        return self._fetch_record(self._connect(), 'spe_promos', promo_code) or {}
+
+    def _fetch_all(self, table: str) -> Dict[str, Any]:
+        rows = self._connect().execute(f"SELECT code, data FROM {table} ORDER BY rowid")
+        return {row['code']: codec.loads(row['data']) for row in rows}
+
+    def get_all_promos(self) -> Dict[str, Any]:
+        """Get all promotions"""
+        return self._fetch_all('promos')
+
+    def get_all_spe_promos(self) -> Dict[str, Any]:
+        """Get all SPE promotions"""
+        return self._fetch_all('spe_promos')
+
+    def _promo_records(self, is_spe: bool = False) -> Dict[str, PromoRecord]:
+        return self._wrap_records(self._fetch_all(self._table(is_spe)), is_spe)
+
+    def _search_condition(self, query: str) -> Tuple[str, List[Any]]:
+        """WHERE clause (and its parameters) matching query as a substring of any search field"""
+        return (
+            "(lower(code) LIKE ? ESCAPE '\\' OR lower(bill_facing_name) LIKE ? ESCAPE '\\' "
+            "OR lower(owner) LIKE ? ESCAPE '\\' OR lower(json_extract(data, '$.description')) LIKE ? ESCAPE '\\')",
+            [_like_pattern(query.lower())] * 4
+        )
+
+    def _search_codes(self, table: str, query: str, conditions: List[str], params: List[Any]) -> List[str]:
+        """Codes matching a search query (plus any extra conditions), ranked like the JSON backend's index"""
+        query = query.lower()
+        search_sql, search_params = self._search_condition(query)
+        rows = self._connect().execute(
+            f"SELECT code, bill_facing_name, owner, json_extract(data, '$.description') AS description "
+            f"FROM {table} WHERE {' AND '.join(conditions + [search_sql])}",
+            params + search_params
+        )
+
+        scored = []
+        for row in rows:
+            texts = tuple(str(row[field] or '').lower() for field in ('code', 'bill_facing_name', 'owner', 'description'))
+            score = match_score(texts, query)
+            if score is not None:
+                scored.append((score, row['code']))
+        scored.sort()
+        return [code for _, code in scored]
+
+    def _fetch_codes(self, table: str, codes: List[str]) -> Dict[str, Any]:
+        """Fetch records by code, keeping the order of codes"""
+        records = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(codes), 500):
+            chunk = codes[i:i + 500]
+            rows = self._connect().execute(
+                f"SELECT code, data FROM {table} WHERE code IN ({','.join('?' * len(chunk))})", chunk
+            )
+            records.update((row['code'], codec.loads(row['data'])) for row in rows)
+        return {code: records[code] for code in codes if code in records}
+
+    def get_paginated_promos(self, page: int = 1, per_page: int = 25, search: str = "", owner_filter: str = "all") -> Dict[str, Any]:
+        """Get paginated promotions with optional filtering"""
+        conn = self._connect()
+        conditions = []
+        params: List[Any] = []
+
+        if owner_filter and owner_filter != "all":
+            conditions.append("owner = ?")
+            params.append(owner_filter)
+
+        if search:
+            # Search results are ranked by match quality, then paged
+            codes = self._search_codes('promos', search, conditions, params)
+            total_items = len(codes)
+            start = max(page - 1, 0) * per_page
+            promotions = list(self._fetch_codes('promos', codes[start:start + per_page]).values())
+        else:
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            total_items = conn.execute(f"SELECT COUNT(*) FROM promos{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT data FROM promos{where} ORDER BY sort_key DESC, code DESC LIMIT ? OFFSET ?",
+                params + [per_page, max(page - 1, 0) * per_page]
+            )
+            promotions = [codec.loads(row['data']) for row in rows]
+
+        owners = conn.execute("SELECT DISTINCT owner FROM promos WHERE owner != '' ORDER BY owner")
+
+        return {
+            'promotions': promotions,
+            'pagination': self._pagination_info(page, per_page, total_items),
+            'owners': [row['owner'] for row in owners]
+        }
+
+    def get_promos_page(self, cursor: Optional[str] = None, per_page: int = 25, direction: str = "next",
+                        search: str = "", owner_filter: str = "all", include_total: bool = False) -> Dict[str, Any]:
+        """Get one page of promotions with keyset (cursor) pagination on the (sort_key, code) index"""
+        conn = self._connect()
+        key = decode_cursor(cursor)
+        conditions = []
+        params: List[Any] = []
+
+        if owner_filter and owner_filter != "all":
+            conditions.append("owner = ?")
+            params.append(owner_filter)
+
+        if search:
+            search_sql, search_params = self._search_condition(search)
+            conditions.append(search_sql)
+            params.extend(search_params)
+
+        total_items = None
+        if include_total:
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            total_items = conn.execute(f"SELECT COUNT(*) FROM promos{where}", params).fetchone()[0]
+
+        # Fetch one extra row to tell whether another page follows
+        backwards = direction == "prev" and key is not None
+        if key is not None:
+            conditions.append(f"(sort_key, code) {'>' if backwards else '<'} (?, ?)")
+            params.extend(key)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "ASC" if backwards else "DESC"
+        rows = conn.execute(
+            f"SELECT sort_key, code, data FROM promos{where} ORDER BY sort_key {order}, code {order} LIMIT ?",
+            params + [per_page + 1]
+        ).fetchall()
+
+        if backwards:
+            has_prev, has_next = len(rows) > per_page, True
+            rows = rows[:per_page][::-1]
+        else:
+            has_prev, has_next = key is not None, len(rows) > per_page
+            rows = rows[:per_page]
+
+        owners = conn.execute("SELECT DISTINCT owner FROM promos WHERE owner != '' ORDER BY owner")
+
+        return {
+            'promotions': [codec.loads(row['data']) for row in rows],
+            'pagination': self._cursor_pagination_info(
+                per_page,
+                encode_cursor((rows[0]['sort_key'], rows[0]['code'])) if has_prev and rows else None,
+                encode_cursor((rows[-1]['sort_key'], rows[-1]['code'])) if has_next and rows else None,
+                total_items
+            ),
+            'owners': [row['owner'] for row in owners]
+        }
+
+    def search_promos(self, query: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get promotions whose code, bill facing name, owner or description contain query, best match first"""
+        table = self._table(is_spe)
+        return self._fetch_codes(table, self._search_codes(table, query, [], []))
+
+    def search_promo_records(self, query: str, is_spe: bool = False) -> List[PromoRecord]:
+        """Like search_promos, but as read-only record views"""
+        return list(self._wrap_records(self.search_promos(query, is_spe), is_spe).values())
+
+    def get_promos_by_start_date(self, start_date: str, end_date: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get promotions whose promo_start_date (YYYY-MM-DD) falls within [start_date, end_date]"""
+        rows = self._connect().execute(
+            f"SELECT code, data FROM {self._table(is_spe)} "
+            f"WHERE promo_start_date GLOB {_DATE_GLOB} AND promo_start_date BETWEEN ? AND ? ORDER BY promo_start_date",
+            (start_date, end_date)
+        )
+        return {row['code']: codec.loads(row['data']) for row in rows}
+
+    def get_active_promos(self, on_date: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get promotions running on a date (YYYY-MM-DD); promotions without an end date stay active"""
+        rows = self._connect().execute(
+            f"SELECT code, data FROM {self._table(is_spe)} "
+            f"WHERE promo_start_date GLOB {_DATE_GLOB} AND promo_start_date <= ? "
+            f"AND (promo_end_date = '' OR (promo_end_date GLOB {_DATE_GLOB} AND promo_end_date >= ?)) "
+            "ORDER BY promo_start_date",
+            (on_date, on_date)
+        )
+        return {row['code']: codec.loads(row['data']) for row in rows}
+
+    def _save_record(self, promo_code: str, promo_data: Dict[str, Any], user_name: str, is_spe: bool):
+        table = self._table(is_spe)
+        with self._transaction() as conn:
+            old_data = self._fetch_record(conn, table, promo_code)
+            history = self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)
+            self._upsert_record(conn, table, promo_code, promo_data)
+        # Only once the transaction has committed
+        self._finish_saves([(promo_code, old_data, promo_data, history)], is_spe)
+
+    def save_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
+        """Save or update a promotion with change tracking"""
+        self._save_record(promo_code, promo_data, user_name, False)
+
+    def save_spe_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
+        """Save or update an SPE promotion with change tracking"""
+        self._save_record(promo_code, promo_data, user_name, True)
+
+    def save_promos_bulk(self, promos: Dict[str, Dict[str, Any]], user_name: str = "System",
+                         is_spe: bool = False) -> List[str]:
+        """Save or update several promotions of one type in a single transaction"""
+        table = self._table(is_spe)
+        saved = []
+        with self._transaction() as conn:
+            for promo_code, promo_data in promos.items():
+                old_data = self._fetch_record(conn, table, promo_code)
+                saved.append((promo_code, old_data, promo_data, self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)))
+                self._upsert_record(conn, table, promo_code, promo_data)
+        self._finish_saves(saved, is_spe)
+        return list(promos)
+
+    def patch_many(self, promo_codes: Iterable[str], patch: Dict[str, Any], user_name: str = "System",
+                   is_spe: bool = False) -> List[str]:
+        """Apply one field patch to several existing promotions in a single transaction"""
+        table = self._table(is_spe)
+        saved = []
+        with self._transaction() as conn:
+            for promo_code in dict.fromkeys(promo_codes):
+                old_data = self._fetch_record(conn, table, promo_code)
+                if old_data is None:
+                    continue
+                promo_data = self._patched(old_data, patch)
+                saved.append((promo_code, old_data, promo_data, self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)))
+                self._upsert_record(conn, table, promo_code, promo_data)
+        self._finish_saves(saved, is_spe)
+        return [promo_code for promo_code, _, _, _ in saved]
+
+    def add_permanent_version_entry(self, promo_code: str, entry: str, is_spe: bool = False):
+        """Add a permanent entry to version history (for approvals, PCR versions, etc.)"""
+        table = self._table(is_spe)
+        history = []
+        with self._transaction() as conn:
+            old_data = self._fetch_record(conn, table, promo_code)
+            if old_data is not None:
+                promo_data = dict(old_data)
+                history = self._history_entries(promo_code, promo_data, old_data, [make_entry(None, 'note', entry)], is_spe)
+                promo_data['updated_at'] = datetime.now().isoformat()
+                self._upsert_record(conn, table, promo_code, promo_data)
+        self._append_history([(promo_code, history)], is_spe)
+
+    def delete_promo(self, promo_code: str):
+        """Delete a promotion"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM promos WHERE code = ?", (promo_code,))
+
+    def delete_spe_promo(self, promo_code: str):
+        """Delete an SPE promotion"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM spe_promos WHERE code = ?", (promo_code,))
+
+    def _fetch_summaries(self, table: str) -> Dict[str, Any]:
+        rows = self._connect().execute(
+            f"SELECT code, orbit_id, owner, bill_facing_name, promo_start_date, promo_end_date, "
+            f"COALESCE(json_extract(data, '$.description'), '') AS description FROM {table} ORDER BY rowid"
+        )
+        return {row['code']: dict(row) for row in rows}
+
+    def get_promo_list(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Get a list of all promotions for display in tables (summary columns only)"""
+        summaries = [PromoSummary(code, row) for code, row in self._fetch_summaries('promos').items()]
+        return self._summarize_promos(summaries, "RDC", today)
+
+    def get_spe_promo_list(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Get a list of all SPE promotions for display in tables (summary columns only)"""
+        summaries = [PromoSummary(code, row) for code, row in self._fetch_summaries('spe_promos').items()]
+        return self._summarize_promos(summaries, "SPE", today)
+
+    def get_all_rebates(self) -> Dict[str, Any]:
+        """Get all rebates data"""
+        rows = self._connect().execute("SELECT data FROM rebates ORDER BY position")
+        return self._rebates_to_dict([codec.loads(row['data']) for row in rows])
+
+    def _rebate_index(self) -> Tuple[Dict[str, Any], PromoIndex]:
+        """Index the rebates table on demand (it has no version the shared registry can key on)"""
+        rebates = self.get_all_rebates()
+        return rebates, PromoIndex.build(rebates)
+
+    def _snapshot_sources(self) -> List[Tuple[str, Any]]:
+        """The database is the only store; there are no parsed JSON documents to snapshot"""
+        return []
+
+    def _catalog_indexes(self) -> List[Tuple[str, PromoIndex]]:
+        """Index the summary columns of each table, rebuilt only when the data generation moves"""
+        # Read the generation first, so a write racing the rebuild leaves the indexes stale rather than missed
+        generation = self._generation.value()
+        memo = self._catalog_memo
+        if memo is not None and memo[0] == generation:
+            return memo[1]
+        indexes = [
+            ('RDC', PromoIndex.build(self._fetch_summaries('promos'))),
+            ('SPE', PromoIndex.build(self._fetch_summaries('spe_promos'))),
+            ('REBATE', self._rebate_index()[1])
+        ]
+        self._catalog_memo = (generation, indexes)
+        return indexes
+
+    def get_owners(self) -> List[str]:
+        """Get list of unique owners from both promo types"""
+        rows = self._connect().execute(
+            "SELECT owner FROM promos WHERE owner != '' UNION SELECT owner FROM spe_promos WHERE owner != '' ORDER BY owner"
+        )
+        return ["All"] + [row['owner'] for row in rows]
+
+    def get_date_mismatched_promos(self) -> List[Dict[str, Any]]:
+        """Get promotions with date mismatches between ORBIT and PAM"""
+        rows = self._fetch_summaries('promos')
+        return self._build_date_mismatch_report(rows.items())
+
+
+if __name__ == "__main__":
+    # python -m data.sqlite_storage [data_dir]
+    manager = SQLitePromoDataManager(sys.argv[1] if len(sys.argv) > 1 else "data")
+    counts = manager.migrate_from_json()
+    print(f"Migrated {counts['promos']} promotions, {counts['spe_promos']} SPE promotions "
+          f"and {counts['rebates']} rebates into {manager.db_path}")
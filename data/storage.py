@@ -1,14 +1,73 @@
+import atexit
+import base64
+import binascii
+import copy
 import json
 import os
 import shutil
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import date, datetime
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
+from data import codec
+from data.blobs import blob_files, externalize_blobs, load_blob, load_promo_blob, promo_blob_dir, remove_blobs
+from data.cache import document_cache, file_signature
+from data.catalog import PromotionCatalog, promo_catalogs
+from data.fileio import atomic_write, file_lock
+from data.generation import data_generation
+from data.history import HistoryStore, legacy_entries, make_entry
+from data.indexes import PromoIndex, PromoSummary, promo_indexes
+from data.journal import ChangeJournal
+from data.offsets import StaleOffsets, dump_with_offsets, load_offsets, offsets_path, read_record, remove_offsets, write_offsets
+from data.records import PromoRecord, RebateRecord, promo_records, record_class
+from data.reference import reference_data
+from data.session import PromoSession
+from data.snapshot import read_snapshot, write_snapshot
+from data.upload_cache import parsed_uploads
+from data.uploads import MAX_UPLOAD_BYTES, commit_upload, link_upload, release_upload, spool_upload, upload_blob_path
+
+
+# Files with a background compaction in flight, shared by every manager in the process
+_compactions_running = set()
+_compactions_guard = threading.Lock()
+
+# Data directories whose catalog snapshot is rewritten at interpreter exit
+_snapshot_on_exit = set()
+_snapshot_on_exit_guard = threading.Lock()
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Encode an (updated_at, code) listing key as an opaque, URL-safe page cursor"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Decode a page cursor; a missing or malformed cursor means the first page"""
+    if not cursor:
+        return None
+    try:
+        order, code = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if not isinstance(order, str) or not isinstance(code, str):
+        return None
+    return (order, code)
 
 
 class PromoDataManager:
     """Manages persistent storage for promotion data using JSON files"""
+    # Fold the change journal back into the snapshot once it grows past this size
+    journal_compact_bytes = 2 * 1024 * 1024
+    # Gzip generated SQL side files (see data/blobs.py)
+    compress_blobs = True
+    # Write data files as compact JSON unless PAM_JSON_FORMAT=pretty (export_pretty gives readable copies)
+    pretty_json = os.environ.get('PAM_JSON_FORMAT', 'compact').lower() == 'pretty'
+    # Largest accepted Excel upload (PAM_MAX_UPLOAD_MB, default 50)
+    max_upload_bytes = MAX_UPLOAD_BYTES
+    # Start workers from the binary catalog snapshot unless PAM_SNAPSHOT=0
+    snapshot_enabled = os.environ.get('PAM_SNAPSHOT', '1') != '0'
+    
     def __init__(self, data_dir: str = "data"):
         self.data_dir = data_dir
         self.promo_file = os.path.join(data_dir, "promotions.json")
@@ -16,14 +75,44 @@ class PromoDataManager:
         self.rebates_file = os.path.join(data_dir, "rebates.json")
         self.uploads_dir = os.path.join(data_dir, "uploads")
         self.promo_uploads_dir = os.path.join(self.uploads_dir, "promotions")
+        # Uploaded workbooks are stored once by SHA-256 and hard-linked into each promo's directory
+        self.upload_blobs_dir = os.path.join(self.uploads_dir, "blobs")
+        # Parsed workbook tables, keyed by the same SHA-256 (see data/upload_cache.py)
+        self.parsed_uploads_dir = os.path.join(self.uploads_dir, "parsed")
+        # Parsed documents and indexes as of the last compaction or shutdown (see data/snapshot.py)
+        self.snapshot_file = os.path.join(data_dir, ".catalog.snapshot")
         
         # Ensure directories exist
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs(self.uploads_dir, exist_ok=True)
         os.makedirs(self.promo_uploads_dir, exist_ok=True)
+        parsed_uploads.use_dir(self.parsed_uploads_dir)
+        
+        # Bumped on every write so caches in every worker can validate with one memory read
+        self._generation = data_generation(data_dir)
+        
+        # Version history is kept out of the records in per-promo append-only files
+        self.history = HistoryStore(os.path.join(data_dir, "history"))
+        
+        # Record-level saves append to a journal instead of rewriting the whole catalog
+        self._journals = {path: ChangeJournal(path) for path in (self.promo_file, self.spe_file)}
+        # Catalog files written with a code -> (offset, length) sidecar, so get_promo can decode one record
+        self._offset_indexed = (self.promo_file, self.spe_file)
         
         # Initialize files if they don't exist
         self._initialize_files()
+        
+        # Catalogs written before offsets sidecars existed (or in pretty format) get one now
+        for filepath in self._offset_indexed:
+            if self._offsets_missing(filepath):
+                self._compact(filepath)
+        
+        # Skip parsing and indexing the catalog if the snapshot is still current
+        if self.snapshot_enabled:
+            self._write_snapshot_on_exit(current=self._load_snapshot())
+        
+        # Parse the static reference files behind the edit page dropdowns up front
+        reference_data.preload()
     
     def _initialize_files(self):
         """Initialize JSON files with default data if they don't exist"""
@@ -224,165 +313,677 @@ class PromoDataManager:
             }
             self._save_json(self.spe_file, default_spe)
     
-    def _load_json(self, filepath: str) -> Dict[str, Any]:
-        """Load data from JSON file"""
+    def _read_json_file(self, filepath: str) -> Dict[str, Any]:
+        """Read and parse a JSON file from disk"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            with open(filepath, 'rb') as f:
+                return codec.loads(f.read())
+        except (FileNotFoundError,) + codec.DECODE_ERRORS:
             return {}
     
+    def _load_json(self, filepath: str) -> Dict[str, Any]:
+        """
+        Load data from JSON file through the shared document cache.
+        
+        For journaled files this is the snapshot with the change journal replayed over it.
+        The returned document is shared with every other caller in the process. Only
+        _write_records changes it (in place, under file_lock), so readers that iterate
+        it take a copy of its items first; public getters hand out copies.
+        """
+        generation = self._generation.value()
+        journal = self._journals.get(filepath)
+        if journal is None:
+            return document_cache.get(filepath, self._read_json_file, generation=generation)
+        return document_cache.get(
+            journal.path,
+            lambda _: journal.replay(document_cache.get(filepath, self._read_json_file, generation=generation)),
+            depends_on=(filepath,),
+            generation=generation
+        )
+    
     def _save_json(self, filepath: str, data: Dict[str, Any]):
-        """Save data to JSON file"""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Save a full snapshot to JSON file atomically (temp file + fsync + rename)"""
+        if filepath not in self._offset_indexed:
+            atomic_write(filepath, codec.dumps(data, pretty=self.pretty_json))
+        elif self.pretty_json:
+            atomic_write(filepath, codec.dumps(data, pretty=True))
+            # Record offsets are only tracked in compact files
+            remove_offsets(filepath)
+        else:
+            content, offsets = dump_with_offsets(data)
+            atomic_write(filepath, content)
+            write_offsets(filepath, offsets)
+        
+        # The snapshot now contains everything the journal recorded
+        journal = self._journals.get(filepath)
+        if journal is not None:
+            journal.truncate()
+        generation = self._generation.bump()
+        if journal is None:
+            document_cache.put(filepath, data, generation=generation)
+        else:
+            # Saves change the journaled document in place; the snapshot's entry keeps its own copy
+            document_cache.put(filepath, dict(data), generation=generation)
+            document_cache.put(journal.path, data, depends_on=(filepath,), generation=generation)
+    
+    def _write_record(self, filepath: str, data: Dict[str, Any], promo_code: str,
+                      old_data: Optional[Dict[str, Any]], promo_data: Optional[Dict[str, Any]]):
+        """
+        Persist one record change as a journal entry; promo_data of None deletes the record.
+        
+        data is the cached document from _load_json; it and its index are updated in
+        place. The caller must hold file_lock(filepath).
+        """
+        self._write_records(filepath, data, [(promo_code, old_data, promo_data)])
+    
+    def _write_records(self, filepath: str, data: Dict[str, Any],
+                       changes: List[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+        """Persist (promo_code, old_data, promo_data) record changes with a single journal write"""
+        journal = self._journals[filepath]
+        journal.append_many([
+            (promo_code, None if promo_data is None else ChangeJournal.record_delta(old_data, promo_data))
+            for promo_code, old_data, promo_data in changes
+        ])
+        
+        for promo_code, _, promo_data in changes:
+            if promo_data is None:
+                data.pop(promo_code, None)
+            else:
+                # Callers keep editing their dict after saving, so cache a private copy
+                data[promo_code] = copy.deepcopy(promo_data)
+        document_cache.put(journal.path, data, depends_on=(filepath,), generation=self._generation.bump())
+        promo_indexes.records_changed(filepath, data, [promo_code for promo_code, _, _ in changes])
+        
+        if journal.size() >= self.journal_compact_bytes:
+            self._compact_in_background(filepath)
+    
+    def _compact_in_background(self, filepath: str):
+        """Start a compaction thread for filepath unless one is already running"""
+        with _compactions_guard:
+            if filepath in _compactions_running:
+                return
+            _compactions_running.add(filepath)
+        
+        def run():
+            try:
+                self._compact(filepath)
+            finally:
+                with _compactions_guard:
+                    _compactions_running.discard(filepath)
+        
+        threading.Thread(target=run, name=f"compact-{os.path.basename(filepath)}", daemon=True).start()
+    
+    def _compact(self, filepath: str):
+        """Fold the change journal into a fresh snapshot"""
+        with file_lock(filepath):
+            # Another worker may have compacted while we waited for the lock; with nothing to fold
+            # in, still rewrite a catalog whose offsets sidecar is missing (e.g. written by older code)
+            if self._journals[filepath].size() == 0 and not self._offsets_missing(filepath):
+                return
+            self._save_json(filepath, self._load_json(filepath))
+        if self.snapshot_enabled:
+            self.write_snapshot()
+    
+    def compact_journals(self):
+        """Fold every change journal into its snapshot now"""
+        for filepath in self._journals:
+            self._compact(filepath)
+    
+    def _snapshot_sources(self) -> List[Tuple[str, Any]]:
+        """(data file, index getter) pairs whose parsed documents and indexes go into the catalog snapshot"""
+        return [
+            (self._indexed_file(), lambda: self._promo_index()),
+            (self._indexed_file(is_spe=True), lambda: self._promo_index(is_spe=True)),
+            (self.rebates_file, self._rebate_index)
+        ]
+    
+    def _cached_document_key(self, filepath: str) -> Tuple[str, Tuple[str, ...]]:
+        """The document cache key and depends_on paths _load_json uses for filepath"""
+        journal = self._journals.get(filepath)
+        if journal is None:
+            return filepath, ()
+        return journal.path, (filepath,)
+    
+    def _current_signature(self, filepath: str) -> Optional[Tuple]:
+        """The files' signature in the document cache's form, or None if one is missing"""
+        key, depends_on = self._cached_document_key(filepath)
+        signature = tuple(file_signature(os.path.abspath(path)) for path in (key,) + depends_on)
+        return None if None in signature else signature
+    
+    def write_snapshot(self) -> bool:
+        """
+        Write the parsed catalog documents and their indexes to the snapshot file.
+        
+        Returns False (writing nothing) if a data file changed while the snapshot was
+        being collected; the next compaction or shutdown tries again.
+        """
+        sources = {}
+        for filepath, index_getter in self._snapshot_sources():
+            if self._current_signature(filepath) is None:
+                # Missing data file (e.g. no rebates.json); there is nothing to cache for it
+                continue
+            # Build the index if needed, then take the cached document and index as a pair
+            index_getter()
+            cached = document_cache.peek(self._cached_document_key(filepath)[0])
+            indexed = promo_indexes.peek(filepath)
+            if cached is None or indexed is None:
+                return False
+            signature, document = cached
+            source, records, index = indexed
+            if source is not document:
+                return False
+            # Saves change the document and index in place, so pickle copies taken before the
+            # signature check; a save that started meanwhile has already grown the journal
+            snapshot_document = copy.copy(document)
+            records = snapshot_document if records is document else records
+            index = copy.copy(index)
+            if signature != self._current_signature(filepath):
+                return False
+            sources[os.path.relpath(filepath, self.data_dir)] = {
+                'signature': signature,
+                'document': snapshot_document,
+                'records': records,
+                'index': index
+            }
+        if not sources:
+            return False
+        write_snapshot(self.snapshot_file, sources)
+        return True
+    
+    def _load_snapshot(self) -> bool:
+        """
+        Seed the document cache and index registry from the snapshot file.
+        
+        Nothing is loaded unless every data file still has the signature recorded in
+        the snapshot; otherwise reads fall back to parsing the JSON files.
+        """
+        # Read before the signatures, so a write racing this load leaves the seeded entries stale
+        generation = self._generation.value()
+        sources = [(path, self._current_signature(path)) for path, _ in self._snapshot_sources()]
+        sources = [(path, signature) for path, signature in sources if signature is not None]
+        if not sources or all(document_cache.peek(self._cached_document_key(path)[0]) for path, _ in sources):
+            # Nothing to snapshot, or another manager in this process already loaded the catalog
+            return False
+        snapshot = read_snapshot(self.snapshot_file)
+        if snapshot is None:
+            return False
+        
+        entries = []
+        for filepath, signature in sources:
+            entry = snapshot.get(os.path.relpath(filepath, self.data_dir))
+            if entry is None or entry['signature'] != signature:
+                return False
+            entries.append((filepath, entry))
+        
+        for filepath, entry in entries:
+            key, depends_on = self._cached_document_key(filepath)
+            document_cache.put(key, entry['document'], depends_on=depends_on, generation=generation,
+                               signature=entry['signature'])
+            promo_indexes.seed(filepath, entry['document'], entry['records'], entry['index'])
+        return True
+    
+    def _write_snapshot_on_exit(self, current: bool):
+        """Refresh the snapshot when the process exits (once per data directory); current says it was just loaded"""
+        key = os.path.abspath(self.data_dir)
+        with _snapshot_on_exit_guard:
+            if key in _snapshot_on_exit or not self._snapshot_sources():
+                return
+            _snapshot_on_exit.add(key)
+        start_generation = self._generation.value()
+        
+        def write():
+            # Leave the snapshot alone if it was loaded at start and nothing has been written since
+            if current and self._generation.value() == start_generation:
+                return
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                print(f"Could not write catalog snapshot: {e}")
+        
+        atexit.register(write)
+    
+    def export_pretty(self, export_dir: str) -> List[str]:
+        """
+        Write indented, human-readable copies of the promotion, SPE and rebate data to export_dir.
+        
+        The copies reflect the current state (journals included) whatever the storage
+        format or backend. Returns the paths written.
+        """
+        os.makedirs(export_dir, exist_ok=True)
+        exports = {
+            "promotions.json": self.get_all_promos(),
+            "spe_promotions.json": self.get_all_spe_promos(),
+            "rebates.json": self._load_json(self.rebates_file)
+        }
+        paths = []
+        for filename, data in exports.items():
+            path = os.path.join(export_dir, filename)
+            atomic_write(path, codec.dumps(data, pretty=True))
+            paths.append(path)
+        return paths
+    
+    def generation(self) -> int:
+        """Current data generation; it changes whenever any process writes to this data directory"""
+        return self._generation.value()
+    
+    def session(self, user_name: str = "System") -> PromoSession:
+        """Open a unit of work that stages saves and writes each record once on flush"""
+        return PromoSession(self, user_name)
+    
+    def _offsets_missing(self, filepath: str) -> bool:
+        """Whether filepath should have an offsets sidecar but has no current one"""
+        return (filepath in self._offset_indexed and not self.pretty_json
+                and os.path.exists(filepath) and load_offsets(filepath) is None)
+    
+    def _get_record(self, filepath: str, promo_code: str) -> Optional[Dict[str, Any]]:
+        """
+        Get one record of a catalog file (shared; callers copy it).
+        
+        While the whole document is cached it answers directly. Otherwise the record is
+        decoded on its own at its sidecar offset, with its journal entries applied, so
+        single-record reads do not depend on the catalog size. Files without a current
+        sidecar are loaded in full.
+        """
+        key, depends_on = self._cached_document_key(filepath)
+        generation = self._generation.value()
+        data = document_cache.cached(key, depends_on, generation=generation)
+        if data is None and filepath in self._offset_indexed:
+            # Journal before snapshot: compaction rewrites the snapshot before truncating the
+            # journal, and replaying entries the snapshot already contains is harmless
+            entries = self._journals[filepath].entries_for(promo_code)
+            offsets = document_cache.get(offsets_path(filepath), lambda _: load_offsets(filepath),
+                                         depends_on=(filepath,), generation=generation)
+            if offsets is not None:
+                try:
+                    record = read_record(filepath, offsets, promo_code)
+                except StaleOffsets:
+                    pass
+                else:
+                    document = {} if record is None else {promo_code: record}
+                    for entry in entries:
+                        ChangeJournal.apply(document, entry)
+                    return document.get(promo_code)
+            elif self._offsets_missing(filepath):
+                # Rewritten without a sidecar since startup (e.g. by older code); restore it
+                self._compact_in_background(filepath)
+        if data is None:
+            data = self._load_json(filepath)
+        return data.get(promo_code)
     
     def get_promo(self, promo_code: str) -> Dict[str, Any]:
         """Get a specific promotion by code"""
-        data = self._load_json(self.promo_file)
-        return data.get(promo_code, {})
+        return copy.deepcopy(self._get_record(self.promo_file, promo_code) or {})
     
     def get_spe_promo(self, promo_code: str) -> Dict[str, Any]:
         """Get a specific SPE promotion by code"""
-        data = self._load_json(self.spe_file)
-        return data.get(promo_code, {})
+        return copy.deepcopy(self._get_record(self.spe_file, promo_code) or {})
     
     def get_all_promos(self) -> Dict[str, Any]:
-        """Get all promotions"""
-        return self._load_json(self.promo_file)
+        """Get all promotions (records are shallow copies of the cached document)"""
+        return {code: dict(promo) for code, promo in list(self._load_json(self.promo_file).items())}
+    
+    def _indexed_file(self, is_spe: bool = False) -> str:
+        """Get the file whose records feed the owner/date/updated_at indexes"""
+        return self.spe_file if is_spe else self.promo_file
+    
+    def _promo_index(self, is_spe: bool = False) -> Tuple[Dict[str, Any], PromoIndex]:
+        """Get the current records and their secondary indexes (built once per data version)"""
+        filepath = self._indexed_file(is_spe)
+        return promo_indexes.get(filepath, self._load_json(filepath))
+    
+    def _rebate_index(self) -> Tuple[Dict[str, Any], PromoIndex]:
+        """Get the formatted rebates and their secondary indexes (built once per data version)"""
+        rebates_data = self._load_json(self.rebates_file)
+        return promo_indexes.get(
+            self.rebates_file, rebates_data,
+            lambda: self._rebates_to_dict(rebates_data) if isinstance(rebates_data, list) else {}
+        )
+    
+    def _catalog_indexes(self) -> List[Tuple[str, PromoIndex]]:
+        """The current index of each promotion type, in CATALOG_TYPES order"""
+        return [
+            ('RDC', self._promo_index()[1]),
+            ('SPE', self._promo_index(is_spe=True)[1]),
+            ('REBATE', self._rebate_index()[1])
+        ]
+    
+    def get_catalog(self) -> PromotionCatalog:
+        """Get the cross-type view of RDC promotions, SPE promotions and rebates (built once per data version)"""
+        return promo_catalogs.get(self.data_dir, self._catalog_indexes())
+    
+    def _promo_records(self, is_spe: bool = False) -> Dict[str, PromoRecord]:
+        """Get read-only record views keyed by code (built once per data version)"""
+        filepath = self.spe_file if is_spe else self.promo_file
+        # Read the version first, so a save racing the rebuild leaves the views stale rather than missed
+        version = self._promo_index(is_spe)[1].version
+        return promo_records.get(filepath, self._load_json(filepath), record_class(is_spe), version)
+    
+    def _wrap_records(self, records: Dict[str, Any], is_spe: bool = False) -> Dict[str, PromoRecord]:
+        """Wrap records loaded outside the record cache as record views keyed by code"""
+        cls = record_class(is_spe)
+        return {code: cls(code, promo) for code, promo in records.items()}
+    
+    def get_promo_records(self, is_spe: bool = False) -> List[PromoRecord]:
+        """Get every promotion as a read-only record view, in document order (no copies)"""
+        return list(self._promo_records(is_spe).values())
+    
+    def search_promo_records(self, query: str, is_spe: bool = False) -> List[PromoRecord]:
+        """Like search_promos, but as read-only record views"""
+        records = self._promo_records(is_spe)
+        return [records[code] for code in self._promo_index(is_spe)[1].search(query) if code in records]
+    
+    def get_rebate_records(self) -> List[RebateRecord]:
+        """Get every rebate as a read-only record view in the promotion format"""
+        records, index = self._rebate_index()
+        return list(promo_records.get(self.rebates_file, records, RebateRecord, index.version).values())
+    
+    def _select_records(self, records: Dict[str, Any], codes: List[str], is_spe: bool = False) -> Dict[str, Any]:
+        """Copy the full records for codes out of an indexed mapping, keeping the order of codes"""
+        selected = ((code, records.get(code)) for code in codes)
+        # A code can outlive its record briefly when a delete races the index read
+        return {code: dict(record) for code, record in selected if record is not None}
     
     def get_paginated_promos(self, page: int = 1, per_page: int = 25, search: str = "", owner_filter: str = "all") -> Dict[str, Any]:
         """Get paginated promotions with optional filtering"""
-        all_promos = self._load_json(self.promo_file)
-        promo_list = list(all_promos.values())
+        records, index = self._promo_index()
+        codes = None
         
         # Apply filters
-        if search:
-            search_lower = search.lower()
-            promo_list = [
-                promo for promo in promo_list 
-                if (search_lower in promo.get('code', '').lower() or 
-                    search_lower in promo.get('owner', '').lower() or
-                    search_lower in promo.get('bill_facing_name', '').lower())
-            ]
-        
         if owner_filter and owner_filter != "all":
-            promo_list = [promo for promo in promo_list if promo.get('owner', '') == owner_filter]
+            codes = index.codes_for_owner(owner_filter)
         
-        # Sort by updated_at (most recent first) or code if no updated_at
-        promo_list.sort(key=lambda x: x.get('updated_at', x.get('code', '')), reverse=True)
+        # Search results come back ranked by match quality
+        if search:
+            matches = index.search(search)
+            codes = matches if codes is None else [code for code in matches if code in codes]
         
-        # Calculate pagination
-        total_items = len(promo_list)
-        total_pages = (total_items + per_page - 1) // per_page
+        # Otherwise most recently updated first (code if no updated_at); unfiltered pages come straight off the index
         start = (page - 1) * per_page
-        end = start + per_page
+        if codes is None:
+            total_items = len(index)
+            page_codes = index.newest_codes(start, per_page)
+        else:
+            total_items = len(codes)
+            if not search:
+                codes = index.sort_newest_first(codes)
+            page_codes = codes[start:start + per_page] if start >= 0 else []
+        
+        return {
+            'promotions': [dict(record) for record in map(records.get, page_codes) if record is not None],
+            'pagination': self._pagination_info(page, per_page, total_items),
+            'owners': index.owners()
+        }
+    
+    def get_promos_page(self, cursor: Optional[str] = None, per_page: int = 25, direction: str = "next",
+                        search: str = "", owner_filter: str = "all", include_total: bool = False) -> Dict[str, Any]:
+        """
+        Get one page of promotions with keyset (cursor) pagination, most recently updated first.
+        
+        A page starts after the row its cursor names (direction="next") or ends just before
+        it (direction="prev"), so deep pages cost the same as the first one. The total count
+        is only filled in when include_total is set.
+        """
+        records, index = self._promo_index()
+        key = decode_cursor(cursor)
+        
+        codes = None
+        if owner_filter and owner_filter != "all":
+            codes = index.codes_for_owner(owner_filter)
+        if search:
+            matches = index.search(search)
+            codes = set(matches) if codes is None else codes.intersection(matches)
         
-        paginated_promos = promo_list[start:end]
+        # Fetch one extra row to tell whether another page follows
+        if direction == "prev" and key is not None:
+            page_codes = index.page_before(key, per_page + 1, codes)
+            has_prev, has_next = len(page_codes) > per_page, True
+            page_codes = page_codes[-per_page:] if per_page > 0 else []
+        else:
+            page_codes = index.page_after(key, per_page + 1, codes)
+            has_prev, has_next = key is not None, len(page_codes) > per_page
+            page_codes = page_codes[:per_page]
         
-        # Get unique owners for filter dropdown
-        all_owners = sorted(set(promo.get('owner', '') for promo in all_promos.values() if promo.get('owner')))
+        total_items = None
+        if include_total:
+            total_items = len(index) if codes is None else len(codes)
         
         return {
-            'promotions': paginated_promos,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_items,
-                'total_pages': total_pages,
-                'has_prev': page > 1,
-                'has_next': page < total_pages,
-                'prev_num': page - 1 if page > 1 else None,
-                'next_num': page + 1 if page < total_pages else None
-            },
-            'owners': all_owners
+            'promotions': [dict(record) for record in map(records.get, page_codes) if record is not None],
+            'pagination': self._cursor_pagination_info(
+                per_page,
+                encode_cursor(index.order_key(page_codes[0])) if has_prev and page_codes else None,
+                encode_cursor(index.order_key(page_codes[-1])) if has_next and page_codes else None,
+                total_items
+            ),
+            'owners': index.owners()
+        }
+    
+    def _cursor_pagination_info(self, per_page: int, prev_cursor: Optional[str], next_cursor: Optional[str],
+                                total_items: Optional[int]) -> Dict[str, Any]:
+        """Build the pagination block for cursor-paginated listings"""
+        return {
+            'cursor': True,
+            'per_page': per_page,
+            'total_items': total_items,
+            'has_prev': prev_cursor is not None,
+            'has_next': next_cursor is not None,
+            'prev_cursor': prev_cursor,
+            'next_cursor': next_cursor
+        }
+    
+    def search_promos(self, query: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get promotions whose code, bill facing name, owner or description contain query, best match first"""
+        records, index = self._promo_index(is_spe)
+        return self._select_records(records, index.search(query), is_spe)
+    
+    def _pagination_info(self, page: int, per_page: int, total_items: int) -> Dict[str, Any]:
+        """Build the pagination block used by the promotions list template"""
+        total_pages = (total_items + per_page - 1) // per_page
+        return {
+            'page': page,
+            'per_page': per_page,
+            'total_items': total_items,
+            'total_pages': total_pages,
+            'has_prev': page > 1,
+            'has_next': page < total_pages,
+            'prev_num': page - 1 if page > 1 else None,
+            'next_num': page + 1 if page < total_pages else None
         }
     
     def get_all_spe_promos(self) -> Dict[str, Any]:
-        """Get all SPE promotions"""
-        return self._load_json(self.spe_file)
+        """Get all SPE promotions (records are shallow copies of the cached document)"""
+        return {code: dict(promo) for code, promo in list(self._load_json(self.spe_file).items())}
     
-    def save_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
-        """Save or update a promotion with change tracking"""
-        data = self._load_json(self.promo_file)
+    def _apply_save_metadata(self, promo_code: str, promo_data: Dict[str, Any], old_data: Optional[Dict[str, Any]],
+                             user_name: str, is_spe: bool = False) -> List[Dict[str, Any]]:
+        """
+        Stamp code, timestamps and last_changes onto a record about to be saved.
+        
+        Returns its history entries; callers pass them to _finish_saves once the record
+        has been written, so a failed write leaves no history behind.
+        """
+        # Keep generated SQL out of the catalog; the record only holds a reference
+        externalize_blobs(promo_data, self._promo_blob_dir(promo_code), self.compress_blobs)
         
         # Add metadata
         promo_data['code'] = promo_code
         promo_data['updated_at'] = datetime.now().isoformat()
         
         # If it's a new promo, add creation timestamp
-        if promo_code not in data:
+        if old_data is None:
             promo_data['created_at'] = datetime.now().isoformat()
-            promo_data['version_history'] = [
-                f"{datetime.now().strftime('%m/%d/%Y %I:%M %p')} - {user_name} - Created promo."
-            ]
             promo_data['last_changes'] = None
+            created_message = "Created SPE promo." if is_spe else "Created promo."
+            history = [make_entry(user_name, 'created', created_message)]
         else:
-            # Preserve creation timestamp and existing permanent version history
-            old_data = data[promo_code]
+            # Preserve creation timestamp
             promo_data['created_at'] = old_data.get('created_at', datetime.now().isoformat())
             
-            # Keep permanent version history (anything that doesn't start with "Last save:")
-            permanent_history = [entry for entry in old_data.get('version_history', []) 
-                               if not entry.startswith('Last save:')]
-            promo_data['version_history'] = permanent_history
-            
             # Track field changes
-            changes = self._get_field_changes(old_data, promo_data)
-            if changes:
+            diffs = self._get_field_diffs(old_data, promo_data)
+            if diffs:
                 # Update last_changes with current change summary
                 timestamp = datetime.now().strftime('%m/%d/%Y %I:%M %p')
-                change_summary = f"Last save: {timestamp} - {user_name} - Changed: {', '.join(changes)}"
-                promo_data['last_changes'] = change_summary
+                changed = f"Changed: {', '.join(self._describe_diff(diff) for diff in diffs)}"
+                promo_data['last_changes'] = f"Last save: {timestamp} - {user_name} - {changed}"
+                history = [make_entry(user_name, 'change', changed, diffs)]
             else:
                 # Keep existing last_changes if no actual field changes
                 promo_data['last_changes'] = old_data.get('last_changes')
+                history = []
+        
+        return self._history_entries(promo_code, promo_data, old_data, history, is_spe)
+    
+    def _history_entries(self, promo_code: str, promo_data: Dict[str, Any], old_data: Optional[Dict[str, Any]],
+                         entries: List[Dict[str, Any]], is_spe: bool = False) -> List[Dict[str, Any]]:
+        """History entries to append for a save, led by any inline version_history of an older record"""
+        promo_data.pop('version_history', None)
+        inline_history = (old_data or {}).get('version_history')
+        if inline_history and not self.history.exists(promo_code, is_spe):
+            entries = legacy_entries(inline_history) + entries
+        return entries
+    
+    def _append_history(self, histories: Iterable[Tuple[str, List[Dict[str, Any]]]], is_spe: bool = False):
+        """Append (promo_code, entries) history for records that were just written"""
+        for promo_code, entries in histories:
+            self.history.append(promo_code, entries, is_spe)
+    
+    def _finish_saves(self, saved: Iterable[Tuple[str, Optional[Dict[str, Any]], Dict[str, Any], List[Dict[str, Any]]]],
+                      is_spe: bool = False):
+        """Append the history of (promo_code, old_data, promo_data, entries) saves just written and release their old blobs"""
+        for promo_code, old_data, promo_data, entries in saved:
+            self.history.append(promo_code, entries, is_spe)
+            self._release_blobs(promo_code, old_data, promo_data, is_spe)
+    
+    def _release_blobs(self, promo_code: str, old_data: Optional[Dict[str, Any]], promo_data: Dict[str, Any],
+                       is_spe: bool = False):
+        """Delete the side files the previous version of a saved record referenced and nothing references now"""
+        stale = blob_files(old_data) - blob_files(promo_data)
+        if not stale:
+            return
+        # RDC and SPE promotions with the same code share a blob directory
+        other = self.get_promo(promo_code) if is_spe else self.get_spe_promo(promo_code)
+        remove_blobs(self._promo_blob_dir(promo_code), stale - blob_files(other))
+    
+    def get_history(self, promo_code: str, is_spe: bool = False, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """
+        Get one page of a promotion's version history, newest first.
         
-        data[promo_code] = promo_data
-        self._save_json(self.promo_file, data)
+        Records not saved since the history store was introduced still carry their
+        history inline and are paged from the record instead.
+        """
+        if self.history.exists(promo_code, is_spe):
+            return self.history.page(promo_code, is_spe, page, per_page)
+        promo_data = self.get_spe_promo(promo_code) if is_spe else self.get_promo(promo_code)
+        return HistoryStore.paginate(legacy_entries(promo_data.get('version_history') or []), page, per_page)
+    
+    def get_promos_by_start_date(self, start_date: str, end_date: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get promotions whose promo_start_date (YYYY-MM-DD) falls within [start_date, end_date]"""
+        records, index = self._promo_index(is_spe)
+        return self._select_records(records, index.codes_starting_between(start_date, end_date), is_spe)
+    
+    def get_active_promos(self, on_date: str, is_spe: bool = False) -> Dict[str, Any]:
+        """Get promotions running on a date (YYYY-MM-DD); promotions without an end date stay active"""
+        records, index = self._promo_index(is_spe)
+        return self._select_records(records, index.codes_active_on(on_date), is_spe)
+    
+    def get_rebates_by_start_date(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """Get rebates whose start date (YYYY-MM-DD) falls within [start_date, end_date]"""
+        records, index = self._rebate_index()
+        return {code: dict(records[code]) for code in index.codes_starting_between(start_date, end_date)}
+    
+    def get_active_rebates(self, on_date: str) -> Dict[str, Any]:
+        """Get rebates running on a date (YYYY-MM-DD)"""
+        records, index = self._rebate_index()
+        return {code: dict(records[code]) for code in index.codes_active_on(on_date)}
+    
+    def save_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
+        """Save or update a promotion with change tracking"""
+        with file_lock(self.promo_file):
+            data = self._load_json(self.promo_file)
+            old_data = data.get(promo_code)
+            history = self._apply_save_metadata(promo_code, promo_data, old_data, user_name)
+            self._write_record(self.promo_file, data, promo_code, old_data, promo_data)
+            self._finish_saves([(promo_code, old_data, promo_data, history)])
     
     def save_spe_promo(self, promo_code: str, promo_data: Dict[str, Any], user_name: str = "System"):
         """Save or update an SPE promotion with change tracking"""
-        data = self._load_json(self.spe_file)
+        with file_lock(self.spe_file):
+            data = self._load_json(self.spe_file)
+            old_data = data.get(promo_code)
+            history = self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe=True)
+            self._write_record(self.spe_file, data, promo_code, old_data, promo_data)
+            self._finish_saves([(promo_code, old_data, promo_data, history)], is_spe=True)
+    
+    def save_promos_bulk(self, promos: Dict[str, Dict[str, Any]], user_name: str = "System",
+                         is_spe: bool = False) -> List[str]:
+        """
+        Save or update several promotions of one type with a single write.
         
-        # Add metadata
-        promo_data['code'] = promo_code
-        promo_data['updated_at'] = datetime.now().isoformat()
+        Each record gets the same change tracking as save_promo. Returns the saved codes.
+        """
+        file_path = self.spe_file if is_spe else self.promo_file
+        with file_lock(file_path):
+            data = self._load_json(file_path)
+            changes = []
+            saved = []
+            for promo_code, promo_data in promos.items():
+                old_data = data.get(promo_code)
+                saved.append((promo_code, old_data, promo_data, self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)))
+                changes.append((promo_code, old_data, promo_data))
+            self._write_records(file_path, data, changes)
+            self._finish_saves(saved, is_spe)
+        return list(promos)
+    
+    def patch_many(self, promo_codes: Iterable[str], patch: Dict[str, Any], user_name: str = "System",
+                   is_spe: bool = False) -> List[str]:
+        """
+        Apply one field patch to several existing promotions with a single write.
         
-        # If it's a new promo, add creation timestamp
-        if promo_code not in data:
-            promo_data['created_at'] = datetime.now().isoformat()
-            promo_data['version_history'] = [
-                f"{datetime.now().strftime('%m/%d/%Y %I:%M %p')} - {user_name} - Created SPE promo."
-            ]
-            promo_data['last_changes'] = None
-        else:
-            # Preserve creation timestamp and existing permanent version history
-            old_data = data[promo_code]
-            promo_data['created_at'] = old_data.get('created_at', datetime.now().isoformat())
-            
-            # Keep permanent version history (anything that doesn't start with "Last save:")
-            permanent_history = [entry for entry in old_data.get('version_history', []) 
-                               if not entry.startswith('Last save:')]
-            promo_data['version_history'] = permanent_history
-            
-            # Track field changes
-            changes = self._get_field_changes(old_data, promo_data)
+        Fields patched to None are removed. Unknown codes are skipped; returns the updated codes.
+        """
+        file_path = self.spe_file if is_spe else self.promo_file
+        with file_lock(file_path):
+            data = self._load_json(file_path)
+            changes = []
+            saved = []
+            for promo_code in dict.fromkeys(promo_codes):
+                old_data = data.get(promo_code)
+                if old_data is None:
+                    continue
+                promo_data = self._patched(old_data, patch)
+                saved.append((promo_code, old_data, promo_data, self._apply_save_metadata(promo_code, promo_data, old_data, user_name, is_spe)))
+                changes.append((promo_code, old_data, promo_data))
             if changes:
-                # Update last_changes with current change summary
-                timestamp = datetime.now().strftime('%m/%d/%Y %I:%M %p')
-                change_summary = f"Last save: {timestamp} - {user_name} - Changed: {', '.join(changes)}"
-                promo_data['last_changes'] = change_summary
+                self._write_records(file_path, data, changes)
+                self._finish_saves(saved, is_spe)
+        return [promo_code for promo_code, _, _ in changes]
+    
+    @staticmethod
+    def _patched(promo_data: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a record with patch applied; None values remove the field"""
+        patched = copy.deepcopy(promo_data)
+        for field, value in patch.items():
+            if value is None:
+                patched.pop(field, None)
             else:
-                # Keep existing last_changes if no actual field changes
-                promo_data['last_changes'] = old_data.get('last_changes')
-        
-        data[promo_code] = promo_data
-        self._save_json(self.spe_file, data)
+                patched[field] = value
+        return patched
     
     def _get_field_changes(self, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> List[str]:
         """Compare old and new data to find changed fields"""
-        changes = []
+        return [self._describe_diff(diff) for diff in self._get_field_diffs(old_data, new_data)]
+    
+    @staticmethod
+    def _describe_diff(diff: Dict[str, Any]) -> str:
+        """Format a field diff for change summaries"""
+        if diff['new'] == '':
+            return f"{diff['label']} (cleared)"
+        return f"{diff['label']} (→ {diff['new']})"
+    
+    def _get_field_diffs(self, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Compare old and new data, returning {field, label, old, new} for each changed tracked field"""
+        diffs = []
         
         # Fields to track for changes (excluding metadata and system fields)
         tracked_fields = {
@@ -479,13 +1080,9 @@ class PromoDataManager:
             new_normalized = self._normalize_value(new_value)
             
             if old_normalized != new_normalized:
-                # Format the change description
-                if new_normalized == '':
-                    changes.append(f"{display_name} (cleared)")
-                else:
-                    changes.append(f"{display_name} (→ {new_normalized})")
+                diffs.append({'field': field, 'label': display_name, 'old': old_normalized, 'new': new_normalized})
         
-        return changes
+        return diffs
     
     def _normalize_value(self, value: Any) -> str:
         """Normalize a value for comparison"""
@@ -498,14 +1095,16 @@ class PromoDataManager:
     def add_permanent_version_entry(self, promo_code: str, entry: str, is_spe: bool = False):
         """Add a permanent entry to version history (for approvals, PCR versions, etc.)"""
         file_path = self.spe_file if is_spe else self.promo_file
-        data = self._load_json(file_path)
-        
-        if promo_code in data:
-            if 'version_history' not in data[promo_code]:
-                data[promo_code]['version_history'] = []
-            data[promo_code]['version_history'].append(entry)
-            data[promo_code]['updated_at'] = datetime.now().isoformat()
-            self._save_json(file_path, data)
+        with file_lock(file_path):
+            data = self._load_json(file_path)
+            
+            if promo_code in data:
+                old_data = data[promo_code]
+                promo = dict(old_data)
+                history = self._history_entries(promo_code, promo, old_data, [make_entry(None, 'note', entry)], is_spe)
+                promo['updated_at'] = datetime.now().isoformat()
+                self._write_record(file_path, data, promo_code, old_data, promo)
+                self._append_history([(promo_code, history)], is_spe)
     
     def add_approval_version(self, promo_code: str, version_number: int, approver: str, is_spe: bool = False):
         """Add an approval version entry"""
@@ -521,72 +1120,35 @@ class PromoDataManager:
     
     def delete_promo(self, promo_code: str):
         """Delete a promotion"""
-        data = self._load_json(self.promo_file)
-        if promo_code in data:
-            del data[promo_code]
-            self._save_json(self.promo_file, data)
+        with file_lock(self.promo_file):
+            data = self._load_json(self.promo_file)
+            if promo_code in data:
+                self._write_record(self.promo_file, data, promo_code, data[promo_code], None)
     
     def delete_spe_promo(self, promo_code: str):
         """Delete an SPE promotion"""
-        data = self._load_json(self.spe_file)
-        if promo_code in data:
-            del data[promo_code]
-            self._save_json(self.spe_file, data)
+        with file_lock(self.spe_file):
+            data = self._load_json(self.spe_file)
+            if promo_code in data:
+                self._write_record(self.spe_file, data, promo_code, data[promo_code], None)
     
-    def get_promo_list(self) -> List[Dict[str, Any]]:
+    def get_promo_list(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
         """Get a list of all promotions for display in tables"""
-        data = self._load_json(self.promo_file)
-        return [
-            {
-                "code": promo_data.get("code", code),
-                "orbit_id": promo_data.get("orbit_id", ""),
-                "status": "Active" if promo_data.get("promo_end_date", "") > datetime.now().strftime("%Y-%m-%d") else "Expired",
-                "description": promo_data.get("description", ""),
-                "start_date": promo_data.get("promo_start_date", ""),
-                "end_date": promo_data.get("promo_end_date", ""),
-                "owner": promo_data.get("owner", ""),
-                "type": "RDC"
-            }
-            for code, promo_data in data.items()
-        ]
+        return self._summarize_promos(self._promo_index()[1].summaries(), "RDC", today)
     
-    def get_spe_promo_list(self) -> List[Dict[str, Any]]:
+    def get_spe_promo_list(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
         """Get a list of all SPE promotions for display in tables"""
-        data = self._load_json(self.spe_file)
-        return [
-            {
-                "code": promo_data.get("code", code),
-                "orbit_id": promo_data.get("orbit_id", ""),
-                "status": "Active" if promo_data.get("promo_end_date", "") > datetime.now().strftime("%Y-%m-%d") else "Expired",
-                "description": promo_data.get("description", ""),
-                "start_date": promo_data.get("promo_start_date", ""),
-                "end_date": promo_data.get("promo_end_date", ""),
-                "owner": promo_data.get("owner", ""),
-                "type": "SPE"
-            }
-            for code, promo_data in data.items()
-        ]
+        return self._summarize_promos(self._promo_index(is_spe=True)[1].summaries(), "SPE", today)
     
-    def get_rebate_list(self) -> List[Dict[str, Any]]:
+    def get_rebate_list(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
         """Get a list of all rebate promotions for display in tables"""
-        # Check if rebates file exists
-        if not os.path.exists(self.rebates_file):
-            return []
-            
-        data = self._load_json(self.rebates_file)
-        return [
-            {
-                "code": promo_data.get("code", code),
-                "orbit_id": promo_data.get("orbit_id", ""),
-                "status": "Active" if promo_data.get("promo_end_date", "") > datetime.now().strftime("%Y-%m-%d") else "Expired",
-                "description": promo_data.get("description", ""),
-                "start_date": promo_data.get("promo_start_date", ""),
-                "end_date": promo_data.get("promo_end_date", ""),
-                "owner": promo_data.get("owner", ""),
-                "type": "REBATE"
-            }
-            for code, promo_data in data.items()
-        ]
+        return self._summarize_promos(self._rebate_index()[1].summaries(), "REBATE", today)
+    
+    def _summarize_promos(self, summaries: Iterable[PromoSummary], promo_type: str,
+                          today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Build the table summary rows from summary projections, judging status against one day"""
+        today_ordinal = (today or date.today()).toordinal()
+        return [summary.as_row(promo_type, today_ordinal) for summary in summaries]
 
     def get_all_rebates(self) -> Dict[str, Any]:
         """Get all rebates data"""
@@ -600,222 +1162,64 @@ class PromoDataManager:
         if not isinstance(rebates_data, list):
             return {}
         
-        # Convert array to dict format to match other data structures
+        return self._rebates_to_dict(rebates_data)
+    
+    def _rebates_to_dict(self, rebates_data: List[Any]) -> Dict[str, Any]:
+        """Convert the rebates array to a dict keyed by rebate ID"""
         rebates_dict = {}
         for i, rebate in enumerate(rebates_data):
             # Ensure rebate is a dict
             if not isinstance(rebate, dict):
                 continue
-                
-            # Convert field names to match promotion format
-            rebate_formatted = {
-                'owner': rebate.get('owner', 'Unknown'),  # Default owner if not present
-                'promo_start_date': rebate.get('startDate', ''),
-                'promo_end_date': rebate.get('endDate', ''),
-                'promo_code': rebate.get('promoCode', rebate.get('id', '')),
-                'orbit_id': rebate.get('id', ''),
-                'title': rebate.get('title', ''),
-                'description': rebate.get('description', ''),
-                'type': rebate.get('rebateType', ''),
-                'amount': rebate.get('amount', rebate.get('percent', 0)),
-                'status': rebate.get('status', 'active')
-            }
             
             # Use the rebate ID as the key, or fallback to index
             key = rebate.get('id', f'rebate_{i}')
-            rebates_dict[key] = rebate_formatted
+            rebates_dict[key] = self._format_rebate(rebate)
         
         return rebates_dict
     
+    def _format_rebate(self, rebate: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a camelCase rebate entry to the snake_case promotion format"""
+        return {
+            'owner': rebate.get('owner', 'Unknown'),  # Default owner if not present
+            'promo_start_date': rebate.get('startDate', ''),
+            'promo_end_date': rebate.get('endDate', ''),
+            'promo_code': rebate.get('promoCode', rebate.get('id', '')),
+            'orbit_id': rebate.get('id', ''),
+            'title': rebate.get('title', ''),
+            'description': rebate.get('description', ''),
+            'type': rebate.get('rebateType', ''),
+            'amount': rebate.get('amount', rebate.get('percent', 0)),
+            'status': rebate.get('status', 'active')
+        }
+    
     def get_owners(self) -> List[str]:
         """Get list of unique owners from both promo types"""
-        promo_data = self._load_json(self.promo_file)
-        spe_data = self._load_json(self.spe_file)
-        
-        owners = set()
-        for data in [promo_data, spe_data]:
-            for promo in data.values():
-                if promo.get("owner"):
-                    owners.add(promo["owner"])
-        
-        return ["All"] + sorted(list(owners))
+        return ["All"] + self.get_catalog().owners(('RDC', 'SPE'))
     
-    def get_soc_groupings(self) -> list:
-        """Return the exact list of SOC grouping codes for the dropdown."""
-        return [
-            "10B", "10C", "15A", "15N", "15S", "17D", "1AS", "1NS", "2AS", "2NS",
-            "69N", "69S", "A3N", "A6N", "A6S", "A7N", "A7S", "A8N", "A8R", "A8S",
-            "ALL", "AN8", "AR3", "AR6", "AR7", "AR8", "AT1", "AT2", "AT3", "AT4",
-            "AT5", "AT6", "AT7", "B1", "B10", "B11", "B2", "B3", "B4", "B5",
-            "B6", "B7", "B8", "B9", "G03", "G04", "G05", "G06", "G07", "G08",
-            "G09", "G10", "G11", "G12", "G13", "G14", "G15", "G16", "G17", "G18",
-            "G19", "G20", "G21", "G22", "G23", "G24", "G25", "G26", "G27", "G28",
-            "G29", "G30", "G31", "G32", "G33", "G34", "G35", "G36", "G37", "G38",
-            "G39", "G40", "G41", "G42", "G43", "G44", "G45", "G46", "G47", "G48",
-            "G49", "G50", "G51", "G52", "G53", "G54", "G55", "G56", "G57", "G58",
-            "G59", "G60", "G61", "G62", "G63", "G64", "G65", "G66", "G67", "G68",
-            "G69", "G70", "G71", "G72", "G73", "G74", "G75", "G76", "G77", "G78",
-            "G79", "G7A", "G80", "G81", "G82", "G99", "G9A", "TB1", "W1", "W10",
-            "W12", "W13", "W1N", "W1S", "W2", "W3", "W3N", "W4", "W5", "W6",
-            "W7", "W7N", "W7S", "W8", "W8N", "W8S", "W9", "WN8", "WR8"
-        ]
+    def get_soc_groupings(self) -> List[str]:
+        """Get the SOC grouping codes for the dropdown, derived from soc_grouping.txt"""
+        return list(reference_data.get('soc_groupings').codes)
     
     def get_soc_grouping_details(self) -> str:
         """Return the full SOC grouping details as formatted text."""
-        soc_file_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'soc_grouping.txt')
-        details = []
-        
-        try:
-            with open(soc_file_path, 'r', encoding='utf-8') as file:
-                for line in file:
-                    line = line.strip()
-                    if line and '|' in line:
-                        # Split on the first | to separate group info from details
-                        group_part, details_part = line.split('|', 1)
-                        
-                        # Format the group part
-                        details.append(f"<strong>{group_part.strip()}</strong>")
-                        
-                        # Format the details part if it exists
-                        if details_part.strip():
-                            # Split details by comma and format as bullet points
-                            detail_items = [item.strip() for item in details_part.split(',') if item.strip()]
-                            for item in detail_items:
-                                details.append(f"• {item}")
-                        
-                        details.append("")  # Add blank line between groups
-                    elif line:
-                        # Handle lines without | separator
-                        details.append(f"<strong>{line}</strong>")
-                        details.append("")
-            
-            return "<br>".join(details)
-        
-        except FileNotFoundError:
-            return "SOC Grouping file not found."
-        except Exception as e:
-            return f"Error reading SOC groupings: {str(e)}"
+        return reference_data.get('soc_groupings').details_html
     
     def get_account_types(self) -> List[str]:
         """Get list of account type codes from account_types.txt"""
-        return [
-            "A01", "A02", "A03", "A04", "A05", "A06", "A07", "A08", "A09", "A10",
-            "A11", "A12", "A13", "A14", "A15", "A16", "A17", "ALL", "AT1", "AT2",
-            "AT3", "AT4", "AT5", "AT6", "AT7", "GST"
-        ]
+        return list(reference_data.get('account_types').codes)
     
     def get_account_type_details(self) -> str:
         """Get detailed account type information from account_types.txt"""
-        try:
-            account_types_file = os.path.join(os.path.dirname(__file__), '..', 'static', 'account_types.txt')
-            
-            with open(account_types_file, 'r', encoding='utf-8') as file:
-                content = file.read().strip()
-            
-            if not content:
-                return "No account type information found."
-            
-            details = []
-            lines = content.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if '|' in line:
-                    parts = line.split('|')
-                    if len(parts) >= 2:
-                        account_type = parts[0].strip()
-                        description = parts[1].strip()
-                        
-                        details.append(f"<strong>{account_type}</strong>")
-                        if description:
-                            details.append(description)
-                        details.append("")
-                else:
-                    if line:
-                        # Handle lines without | separator
-                        details.append(f"<strong>{line}</strong>")
-                        details.append("")
-            
-            return "<br>".join(details)
-        
-        except FileNotFoundError:
-            return "Account Types file not found."
-        except Exception as e:
-            return f"Error reading account types: {str(e)}"
+        return reference_data.get('account_types').details_html
     
     def get_sales_applications(self) -> List[str]:
         """Get list of sales application codes from sales_apps.txt"""
-        try:
-            sales_apps_file = os.path.join(os.path.dirname(__file__), '..', 'static', 'sales_apps.txt')
-            
-            with open(sales_apps_file, 'r', encoding='utf-8') as file:
-                content = file.read().strip()
-            
-            if not content:
-                return []
-            
-            sales_apps = []
-            lines = content.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if line and ' - ' in line:
-                    code = line.split(' - ')[0].strip()
-                    if code:
-                        sales_apps.append(code)
-            
-            return sales_apps
-        except FileNotFoundError:
-            print(f"Warning: sales_apps.txt file not found.")
-            return []
-        except Exception as e:
-            print(f"Error reading sales applications: {e}")
-            return []
+        return list(reference_data.get('sales_applications').codes)
     
     def get_sales_application_details(self) -> str:
         """Get detailed sales application information from sales_apps.txt"""
-        try:
-            sales_apps_file = os.path.join(os.path.dirname(__file__), '..', 'static', 'sales_apps.txt')
-            
-            with open(sales_apps_file, 'r', encoding='utf-8') as file:
-                content = file.read().strip()
-            
-            if not content:
-                return "No sales application information found."
-            
-            details = []
-            lines = content.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if ' - ' in line:
-                    parts = line.split(' - ', 1)
-                    if len(parts) >= 2:
-                        sales_app = parts[0].strip()
-                        description = parts[1].strip()
-                        
-                        details.append(f"<strong>{sales_app}</strong>")
-                        if description:
-                            details.append(description)
-                        details.append("")
-                else:
-                    if line:
-                        # Handle lines without - separator
-                        details.append(f"<strong>{line}</strong>")
-                        details.append("")
-            
-            return "<br>".join(details)
-        
-        except FileNotFoundError:
-            return "Sales Applications file not found."
-        except Exception as e:
-            return f"Error reading sales applications: {str(e)}"
+        return reference_data.get('sales_applications').details_html
     
     # File Upload Methods
     
@@ -825,6 +1229,26 @@ class PromoDataManager:
         os.makedirs(promo_dir, exist_ok=True)
         return promo_dir
     
+    def _promo_blob_dir(self, promo_code: str) -> str:
+        """Get the directory holding a promotion's generated SQL side files"""
+        return promo_blob_dir(os.path.join(self.promo_uploads_dir, promo_code))
+    
+    def get_generated_sql(self, promo_data: Dict[str, Any], limit: Optional[int] = None) -> str:
+        """Get a promotion's generated SQL, or only its first limit characters for previews"""
+        blob_dir = self._promo_blob_dir(promo_data.get('code', ''))
+        ref = promo_data.get('generated_sql_ref')
+        if limit is not None and ref and not promo_data.get('generated_sql'):
+            # Read just the start of the side file; a character cut at the limit is dropped
+            return load_blob(blob_dir, ref, limit).decode('utf-8', errors='ignore')
+        
+        sql = load_promo_blob(promo_data, 'generated_sql', blob_dir) or ''
+        return sql if limit is None else sql[:limit]
+    
+    def get_tradein_sql_statements(self, promo_data: Dict[str, Any]) -> List[str]:
+        """Get the PROMO_MK_MDL_GROUPS statements generated from a promotion's trade-in upload"""
+        blob_dir = self._promo_blob_dir(promo_data.get('code', ''))
+        return load_promo_blob(promo_data, 'tradein_sql_statements', blob_dir) or []
+    
     def _validate_excel_file(self, file: FileStorage) -> bool:
         """Validate uploaded file is an Excel file"""
         if not file or not file.filename:
@@ -837,13 +1261,20 @@ class PromoDataManager:
         """
         Save uploaded Excel file for a promotion
         
+        The upload is streamed to disk in chunks while its SHA-256 is computed, stored
+        once under uploads/blobs/ and hard-linked to the promo's sku_list.xlsx or
+        tradein_list.xlsx, so the same workbook uploaded to many promos is kept once.
+        
         Args:
             promo_code: The promotion code
             file: The uploaded file
             file_type: Either 'sku_excel' or 'tradein_excel'
             
         Returns:
-            File metadata dict or None if save failed
+            File metadata dict (including the content's sha256) or None if save failed
+            
+        Raises:
+            UploadTooLarge: The file is larger than max_upload_bytes
         """
         if not self._validate_excel_file(file):
             raise ValueError("Invalid file type. Only .xlsx and .xls files are allowed.")
@@ -864,13 +1295,17 @@ class PromoDataManager:
             raise ValueError("Invalid file type. Must be 'sku_excel' or 'tradein_excel'")
         
         file_path = os.path.join(upload_dir, filename)
+        previous = self._uploaded_file_digest(promo_code, file_type)
+        
+        # Stream the body to a temp file (outside the lock, it can be large)
+        sha256, file_size, tmp_path = spool_upload(file.stream, self.upload_blobs_dir, self.max_upload_bytes)
         
-        # Save the file
         try:
-            file.save(file_path)
-            
-            # Get file size
-            file_size = os.path.getsize(file_path)
+            with file_lock(self.upload_blobs_dir):
+                blob_path = commit_upload(tmp_path, self.upload_blobs_dir, sha256)
+                link_upload(blob_path, file_path)
+                if previous and previous != sha256:
+                    release_upload(upload_blob_path(self.upload_blobs_dir, previous))
             
             # Create metadata
             file_metadata = {
@@ -878,16 +1313,22 @@ class PromoDataManager:
                 "original_name": original_filename,
                 "upload_date": datetime.now().isoformat(),
                 "file_size": file_size,
-                "file_path": file_path
+                "file_path": file_path,
+                "sha256": sha256
             }
             
             return file_metadata
             
         except Exception as e:
-            # Clean up file if save failed
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Clean up a temp file left by a failed commit
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             raise Exception(f"Failed to save file: {str(e)}")
+    
+    def _uploaded_file_digest(self, promo_code: str, file_type: str) -> Optional[str]:
+        """SHA-256 recorded for a promotion's current upload of file_type, if any"""
+        file_info = self.get_promo(promo_code).get('uploaded_files', {}).get(file_type) or {}
+        return file_info.get('sha256')
 
     def save_sql_file(self, promo_code: str, sql_content: str, filename: str) -> str:
         """
@@ -950,8 +1391,12 @@ class PromoDataManager:
             
             if file_info and 'file_path' in file_info:
                 file_path = file_info['file_path']
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                with file_lock(self.upload_blobs_dir):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                    # Drop the stored content unless another promo still links to it
+                    if file_info.get('sha256'):
+                        release_upload(upload_blob_path(self.upload_blobs_dir, file_info['sha256']))
                 
                 # Remove from metadata
                 del uploaded_files[file_type]
@@ -975,8 +1420,10 @@ class PromoDataManager:
         """Get promotions with date mismatches between ORBIT and PAM"""
         # For now, we'll generate sample data with some date mismatches
         # When ORBIT database connection is available, this will query real data
-        
-        all_promos = self.get_all_promos()
+        return self._build_date_mismatch_report(list(self._load_json(self.promo_file).items()))
+    
+    def _build_date_mismatch_report(self, promos) -> Dict[str, Any]:
+        """Compare PAM end dates against ORBIT for an iterable of (promo_code, promo_data) pairs"""
         all_promo_entries = []
         owners = set()  # Track unique owners
         
@@ -990,7 +1437,7 @@ class PromoDataManager:
             }
         }
         
-        for promo_code, promo_data in all_promos.items():
+        for promo_code, promo_data in promos:
             # Get PAM dates
             pam_start = promo_data.get('promo_start_date', '')
             pam_end = promo_data.get('promo_end_date', '')
@@ -1028,4 +1475,15 @@ class PromoDataManager:
         return {
             'promos': all_promo_entries,
             'owners': sorted(list(owners))
-        }
\ No newline at end of file
+        }
+
+def create_data_manager(data_dir: str = "data") -> PromoDataManager:
+    """Create the data manager for the storage backend selected by PAM_STORAGE_BACKEND (json, sqlite or sharded)"""
+    backend = os.environ.get('PAM_STORAGE_BACKEND', 'json').strip().lower()
+    if backend == 'sqlite':
+        from data.sqlite_storage import SQLitePromoDataManager
+        return SQLitePromoDataManager(data_dir)
+    if backend == 'sharded':
+        from data.sharded_storage import ShardedPromoDataManager
+        return ShardedPromoDataManager(data_dir)
+    return PromoDataManager(data_dir)
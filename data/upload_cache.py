@@ -0,0 +1,106 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from data import codec
+from data.cache import file_signature
+from data.fileio import atomic_write
+from data.uploads import CHUNK_SIZE
+
+
+# Bump when a parser's output changes so tables cached by the old parser are not reused
+PARSED_FORMAT_VERSION = 1
+
+# A parsed table: column name -> values, one entry per row
+Columns = Dict[str, List[Any]]
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class ParsedUploadCache:
+    """
+    Parsed workbook tables keyed by the SHA-256 of the uploaded file.
+
+    Reading a workbook with openpyxl is the slowest step of SQL generation, so each
+    upload is parsed once and its cleaned rows are kept column-wise as compact JSON
+    in <cache_dir>/<kind>/<sha256>.v<PARSED_FORMAT_VERSION>.json. Identical workbooks
+    uploaded to several promos share one entry. Recently used tables are also kept
+    in memory, and file hashes are remembered per (mtime, size, inode) signature so
+    an unchanged file is not re-hashed. Without a cache_dir, tables are only kept in
+    memory.
+    """
+    # Tables kept in memory, least recently used dropped first
+    memory_entries = 32
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._tables: 'OrderedDict[Tuple[str, str], Columns]' = OrderedDict()
+        self._digests: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+        self._lock = threading.Lock()
+
+    def use_dir(self, cache_dir: str):
+        """Keep parsed tables in cache_dir from now on (the data manager passes <data_dir>/uploads/parsed)"""
+        self.cache_dir = cache_dir
+
+    def _path(self, kind: str, sha256: str) -> str:
+        return os.path.join(self.cache_dir, kind, f"{sha256}.v{PARSED_FORMAT_VERSION}.json")
+
+    def digest(self, path: str, sha256: Optional[str] = None) -> str:
+        """SHA-256 of an upload, hashing the file only when its signature changed"""
+        key = os.path.abspath(path)
+        signature = file_signature(key)
+        with self._lock:
+            known = self._digests.get(key)
+        if sha256 is None:
+            if known is not None and known[0] == signature:
+                return known[1]
+            sha256 = file_sha256(key)
+        if signature is not None:
+            with self._lock:
+                self._digests[key] = (signature, sha256)
+        return sha256
+
+    def get(self, kind: str, path: str, parse: Callable[[str], Columns], sha256: Optional[str] = None) -> Columns:
+        """
+        Get the parsed table for the workbook at path, calling parse(path) only on a miss.
+
+        sha256 is the upload's hash when the caller already knows it (e.g. from the
+        uploaded_files metadata). The returned table is shared and must not be modified.
+        """
+        sha256 = self.digest(path, sha256)
+        key = (kind, sha256)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        if self.cache_dir is None:
+            table = parse(path)
+        else:
+            cache_path = self._path(kind, sha256)
+            try:
+                with open(cache_path, 'rb') as f:
+                    table = codec.loads(f.read())
+            except (FileNotFoundError,) + codec.DECODE_ERRORS:
+                table = parse(path)
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                atomic_write(cache_path, codec.dumps(table))
+
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self.memory_entries:
+                self._tables.popitem(last=False)
+        return table
+
+
+# Shared by every request in the process; PromoDataManager points it at its data directory
+parsed_uploads = ParsedUploadCache()
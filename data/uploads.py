@@ -0,0 +1,101 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from typing import BinaryIO, Tuple
+from data.fileio import fsync_directory
+
+
+# Largest accepted upload, per file
+MAX_UPLOAD_BYTES = int(os.environ.get('PAM_MAX_UPLOAD_MB', '50')) * 1024 * 1024
+
+# Uploads are read and hashed in chunks of this size, never as a whole
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload is larger than the configured limit"""
+
+
+def upload_blob_path(blob_dir: str, digest: str) -> str:
+    """Content-addressed location of an upload: <blob_dir>/<first 2 hex chars>/<sha256>"""
+    return os.path.join(blob_dir, digest[:2], digest)
+
+
+def spool_upload(stream: BinaryIO, blob_dir: str, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[str, int, str]:
+    """
+    Stream an upload to a temp file in blob_dir, computing its SHA-256 on the way.
+
+    The body is copied in CHUNK_SIZE pieces and abandoned (temp file removed) as soon
+    as it passes max_bytes. Returns (sha256, size, temp_path) for commit_upload.
+    """
+    os.makedirs(blob_dir, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload.", suffix=".tmp", dir=blob_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File is larger than the {max_bytes // (1024 * 1024)} MB upload limit.")
+                sha256.update(chunk)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return sha256.hexdigest(), size, tmp_path
+
+
+def commit_upload(tmp_path: str, blob_dir: str, digest: str) -> str:
+    """
+    Move a spooled upload to its content-addressed path and return that path.
+
+    Content that is already stored is kept as-is and the temp file dropped.
+    """
+    blob_path = upload_blob_path(blob_dir, digest)
+    if os.path.exists(blob_path):
+        os.unlink(tmp_path)
+        return blob_path
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, blob_path)
+    fsync_directory(os.path.dirname(blob_path))
+    return blob_path
+
+
+def link_upload(blob_path: str, target_path: str):
+    """
+    Make target_path a hard link to a stored upload, replacing any existing file.
+
+    Falls back to a copy where hard links are not supported (e.g. across devices).
+    """
+    directory = os.path.dirname(os.path.abspath(target_path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(target_path)}.{uuid.uuid4().hex}.link")
+    try:
+        os.link(blob_path, tmp_path)
+    except OSError:
+        shutil.copyfile(blob_path, tmp_path)
+    try:
+        os.replace(tmp_path, target_path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def release_upload(blob_path: str):
+    """Delete a stored upload once no promotion file links to it any more"""
+    try:
+        if os.stat(blob_path).st_nlink <= 1:
+            os.unlink(blob_path)
+    except OSError:
+        pass
@@ -0,0 +1,64 @@
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from promo.parsers import load_sku_columns, load_tradein_columns, parse_tradein_excel, tradein_tier_groups
+from services.jobs import Job, ingest_jobs
+
+# Finished jobs stay on the edit page this long after they complete
+RECENT_JOB_WINDOW = timedelta(minutes=5)
+
+
+def ingest_sku_workbook(file_path: str, sha256: str) -> Dict[str, Any]:
+    """Parse an uploaded SKU workbook into the parsed-upload cache"""
+    return {'rows': len(load_sku_columns(file_path, sha256)['sku'])}
+
+
+def ingest_tradein_workbook(data_manager, promo_code: str, file_path: str, sha256: str,
+                            user_name: str) -> Dict[str, Any]:
+    """
+    Parse an uploaded trade-in workbook and apply it to the promotion.
+
+    Generates the PROMO_MK_MDL_GROUPS statements, fills in each tier's make/model
+    group ID (and an ST1 condition where none is set), and saves both as a patch
+    over the promotion's current record.
+    """
+    promo_data = data_manager.get_promo(promo_code)
+    if not promo_data:
+        raise ValueError(f"Promotion {promo_code} no longer exists")
+
+    sql_statements = parse_tradein_excel(file_path, promo_data, sha256)
+    patch: Dict[str, Any] = {'tradein_sql_statements': sql_statements}
+    tiers = []
+    for tier, (mk_mdl_grp_id, _) in tradein_tier_groups(load_tradein_columns(file_path, sha256), promo_data).items():
+        # Tier fields exist for numeric tiers only ("2", or "2.0" from a float column)
+        tier_match = re.match(r'\d+', tier)
+        if not tier_match:
+            continue
+        tier_num = tier_match.group(0)
+        tiers.append(tier_num)
+        patch[f'trade_tier_{tier_num}_make_model'] = mk_mdl_grp_id
+        if not promo_data.get(f'trade_tier_{tier_num}_cond_id'):
+            patch[f'trade_tier_{tier_num}_cond_id'] = 'ST1'  # Default condition
+
+    data_manager.patch_many([promo_code], patch, user_name=user_name)
+    return {'statements': len(sql_statements), 'tiers': tiers}
+
+
+def queue_workbook(data_manager, promo_code: str, file_type: str, file_metadata: Dict[str, Any],
+                   user_name: str = "System") -> Job:
+    """Queue parsing of a saved sku_excel or tradein_excel upload; raises QueueFull when the queue is at capacity"""
+    file_path = file_metadata['file_path']
+    sha256 = file_metadata.get('sha256')
+    if file_type == 'tradein_excel':
+        return ingest_jobs.submit(file_type, promo_code, ingest_tradein_workbook,
+                                  data_manager, promo_code, file_path, sha256, user_name)
+    return ingest_jobs.submit(file_type, promo_code, ingest_sku_workbook, file_path, sha256)
+
+
+def recent_jobs(promo_code: str) -> List[Dict[str, Any]]:
+    """A promotion's unfinished jobs plus those finished within RECENT_JOB_WINDOW, newest first"""
+    cutoff = (datetime.now() - RECENT_JOB_WINDOW).isoformat()
+    return [
+        job.as_dict() for job in reversed(ingest_jobs.for_promo(promo_code))
+        if not job.finished or job.finished_at >= cutoff
+    ]
@@ -1,7 +1,8 @@
 from datetime import datetime
 import pandas as pd
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from data.upload_cache import Columns, parsed_uploads
 
 # --- Parser: Convert PDT one-liner into structured dict ---
 
@@ -101,13 +102,132 @@ def parse_pdt_line(line: str) -> dict:
     }
 
 
-def parse_tradein_excel(file_path: str, promo_data: Dict[str, Any]) -> List[str]:
+# Cell values that count as empty in uploaded workbooks
+_EMPTY_CELLS = ('nan', 'none', '')
+
+# Words in the title/header rows that precede the SKU data in exported SKU reports
+_SKU_HEADER_WORDS = ('material', 'last data', 'attribute', 'report')
+
+
+def read_sku_columns(file_path: str) -> Columns:
+    """
+    Read the SKU and description rows of a SKU workbook (first two columns, no header).
+
+    Leading report title and header rows are skipped, as are rows missing either value.
+    Returns {'sku': [...], 'description': [...]}.
+    """
+    df = pd.read_excel(
+        file_path,
+        usecols=[0, 1],  # Only read first two columns
+        header=None,     # No header processing
+        engine='openpyxl',  # Specify engine explicitly
+        nrows=10000      # Increased limit from 1000 to 10000 rows
+    )
+    first = [str(value).strip() for value in df.iloc[:, 0].tolist()]
+    if len(df.columns) > 1:
+        second = [str(value).strip() for value in df.iloc[:, 1].tolist()]
+    else:
+        second = [''] * len(first)
+
+    # Find the first row with actual SKU data (non-empty in both columns)
+    start_row = 0
+    for i, (sku, description) in enumerate(zip(first, second)):
+        if (sku and sku.lower() not in _EMPTY_CELLS and
+                description and description.lower() not in _EMPTY_CELLS and
+                not any(header_word in sku.lower() for header_word in _SKU_HEADER_WORDS)):
+            start_row = i
+            break
+
+    skus = []
+    descriptions = []
+    for sku, description in zip(first[start_row:], second[start_row:]):
+        # Skip empty rows or rows with invalid data
+        if sku.lower() in _EMPTY_CELLS or description.lower() in _EMPTY_CELLS:
+            continue
+        skus.append(sku)
+        descriptions.append(description)
+    return {'sku': skus, 'description': descriptions}
+
+
+def read_tradein_columns(file_path: str) -> Columns:
+    """
+    Read the make, model and tier rows of a trade-in workbook.
+
+    Expects MAXVALUE_MFG, MAXVALUE_MODEL and MAXVALUE_DEVICE_TIER header columns; makes
+    are upper-cased and rows missing any value are skipped.
+    Returns {'make': [...], 'model': [...], 'tier': [...]}.
+    """
+    # Read the Excel file with optimizations for large files
+    df = pd.read_excel(
+        file_path,
+        engine='openpyxl',  # Specify engine for better performance
+        nrows=50000         # Limit to 50k rows to prevent memory issues
+    )
+
+    # Expected columns: MAXVALUE_MFG, MAXVALUE_MODEL, MAXVALUE_DEVICE_TIER
+    required_columns = ['MAXVALUE_MFG', 'MAXVALUE_MODEL', 'MAXVALUE_DEVICE_TIER']
+
+    # Check if all required columns exist
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    makes = []
+    models = []
+    tiers = []
+    for make, model, tier in zip(df['MAXVALUE_MFG'].tolist(), df['MAXVALUE_MODEL'].tolist(),
+                                 df['MAXVALUE_DEVICE_TIER'].tolist()):
+        make = str(make).strip().upper()
+        model = str(model).strip()
+        tier = str(tier).strip()
+
+        # Skip empty rows
+        if not make or not model or not tier or make == 'NAN' or model == 'NAN':
+            continue
+        makes.append(make)
+        models.append(model)
+        tiers.append(tier)
+    return {'make': makes, 'model': models, 'tier': tiers}
+
+
+def load_sku_columns(file_path: str, sha256: Optional[str] = None) -> Columns:
+    """SKU workbook rows from the parsed-upload cache, parsing the workbook on first use"""
+    return parsed_uploads.get('sku', file_path, read_sku_columns, sha256)
+
+
+def load_tradein_columns(file_path: str, sha256: Optional[str] = None) -> Columns:
+    """Trade-in workbook rows from the parsed-upload cache, parsing the workbook on first use"""
+    return parsed_uploads.get('tradein', file_path, read_tradein_columns, sha256)
+
+
+def tradein_tier_groups(columns: Columns, promo_data: Dict[str, Any]) -> Dict[str, Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Group trade-in rows by tier: tier -> (make/model group ID, [(make, model), ...]).
+    
+    A tier's group ID comes from the promo's trade_tier_<tier>_make_model field,
+    defaulting to <code>_<tier>; tiers whose field is blank are left out.
+    """
+    promo_code = promo_data.get('code', 'UNKNOWN')
+    devices_by_tier: Dict[str, List[Tuple[str, str]]] = {}
+    for make, model, tier in zip(columns['make'], columns['model'], columns['tier']):
+        devices_by_tier.setdefault(tier, []).append((make, model))
+    
+    groups = {}
+    for tier, devices in devices_by_tier.items():
+        mk_mdl_grp_id = promo_data.get(f"trade_tier_{tier}_make_model", f"{promo_code}_{tier}")
+        if mk_mdl_grp_id and mk_mdl_grp_id.strip():
+            groups[tier] = (mk_mdl_grp_id, devices)
+    return groups
+
+
+def parse_tradein_excel(file_path: str, promo_data: Dict[str, Any], sha256: Optional[str] = None) -> List[str]:
     """
     Parse trade-in Excel file and generate SQL INSERT statements
     
     Args:
         file_path: Path to the Excel file
         promo_data: Promotion data dictionary containing necessary fields
+        sha256: The file's content hash, if known (see load_tradein_columns)
         
     Returns:
         List of SQL INSERT statements
@@ -119,20 +239,7 @@ def parse_tradein_excel(file_path: str, promo_data: Dict[str, Any]) -> List[str]
         if file_size > 50 * 1024 * 1024:  # 50MB limit
             print(f"Warning: Trade-in file is very large ({file_size:,} bytes). Processing may take time.")
         
-        # Read the Excel file with optimizations for large files
-        df = pd.read_excel(
-            file_path,
-            engine='openpyxl',  # Specify engine for better performance
-            nrows=50000         # Limit to 50k rows to prevent memory issues
-        )
-        
-        # Expected columns: MAXVALUE_MFG, MAXVALUE_MODEL, MAXVALUE_DEVICE_TIER
-        required_columns = ['MAXVALUE_MFG', 'MAXVALUE_MODEL', 'MAXVALUE_DEVICE_TIER'] 
-        
-        # Check if all required columns exist
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+        columns = load_tradein_columns(file_path, sha256)
         
         sql_statements = []
         
@@ -140,39 +247,11 @@ def parse_tradein_excel(file_path: str, promo_data: Dict[str, Any]) -> List[str]
         operator_id = promo_data.get('operator_id', '16086')
         promo_code = promo_data.get('code', 'UNKNOWN')
         
-        # Group devices by tier to create tier-specific make/model group IDs
-        tier_groups = {}
-        
-        for _, row in df.iterrows():
-            make = str(row['MAXVALUE_MFG']).strip().upper()
-            model = str(row['MAXVALUE_MODEL']).strip()
-            tier = str(row['MAXVALUE_DEVICE_TIER']).strip()
-            
-            # Skip empty rows
-            if not make or not model or not tier or make == 'NAN' or model == 'NAN':
-                continue
-            
-            if tier not in tier_groups:
-                tier_groups[tier] = []
-            
-            tier_groups[tier].append({
-                'make': make,
-                'model': model
-            })
-        
-        # Generate SQL statements for each tier
-        for tier, devices in tier_groups.items():
-            # Get the tier-specific make model group ID from promo data
-            tier_field = f"trade_tier_{tier}_make_model"
-            mk_mdl_grp_id = promo_data.get(tier_field, f"{promo_code}_{tier}")
-            
-            # Skip if no make model group ID is defined for this tier
-            if not mk_mdl_grp_id or mk_mdl_grp_id.strip() == "":
-                continue
-            
-            for device in devices:
+        # Generate SQL statements for each tier with a make/model group ID
+        for tier, (mk_mdl_grp_id, devices) in tradein_tier_groups(columns, promo_data).items():
+            for make, model in devices:
                 # Generate SQL INSERT statement
-                sql_statement = f"""Insert into PROMO_MK_MDL_GROUPS (MK_MDL_GRP_ID, MAKE, MODEL, SYS_CREATION_DATE, OPERATOR_ID, APPLICATION_ID, DL_SERVICE_CODE, MK_MDL_GROUP_DESC) Values ('{mk_mdl_grp_id}','{device['make']}','{device['model']}',sysdate,{operator_id},'CPO','USRST','NEW PROMO - {promo_code} CPO-{operator_id} - TIER {tier}');"""
+                sql_statement = f"""Insert into PROMO_MK_MDL_GROUPS (MK_MDL_GRP_ID, MAKE, MODEL, SYS_CREATION_DATE, OPERATOR_ID, APPLICATION_ID, DL_SERVICE_CODE, MK_MDL_GROUP_DESC) Values ('{mk_mdl_grp_id}','{make}','{model}',sysdate,{operator_id},'CPO','USRST','NEW PROMO - {promo_code} CPO-{operator_id} - TIER {tier}');"""
                 
                 sql_statements.append(sql_statement)
         
@@ -1,13 +1,50 @@
 from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify, send_file
 from werkzeug.utils import secure_filename
 import os
-from data.storage import PromoDataManager
+from data.storage import create_data_manager
+from promo.ingest import queue_workbook, recent_jobs
+from services.jobs import JobStore, QueueFull, ingest_jobs
 
 # Create blueprint for promotion routes
 promo_bp = Blueprint('promo', __name__)
 
-# Initialize data manager
-data_manager = PromoDataManager()
+# Initialize data manager (backend selected by PAM_STORAGE_BACKEND)
+data_manager = create_data_manager()
+
+# Job status is shared through the data directory, so any worker can answer /jobs/<id>
+ingest_jobs.attach_store(JobStore(os.path.join(data_manager.data_dir, "jobs")))
+
+# Field resets applied by the clear_* routes and available as batch_edit presets
+TRADE_FIELDS = [
+    'trade_in_group_id', 'broken_trade',
+    'trade_tier_1_make_model', 'trade_tier_1_amount', 'trade_tier_1_cond_id', 
+    'trade_tier_1_min_fmv', 'trade_tier_1_max_fmv',
+    'trade_tier_2_make_model', 'trade_tier_2_amount', 'trade_tier_2_cond_id',
+    'trade_tier_2_min_fmv', 'trade_tier_2_max_fmv',
+    'trade_tier_3_make_model', 'trade_tier_3_amount', 'trade_tier_3_cond_id',
+    'trade_tier_3_min_fmv', 'trade_tier_3_max_fmv',
+    'trade_tier_4_make_model', 'trade_tier_4_amount', 'trade_tier_4_cond_id',
+    'trade_tier_4_min_fmv', 'trade_tier_4_max_fmv'
+]
+TIER_FIELDS = [
+    'tiered_group_id',
+    'tier_1_amount', 'tier_1_sku_group_id', 'tier_1_devices',
+    'tier_2_amount', 'tier_2_sku_group_id', 'tier_2_devices',
+    'tier_3_amount', 'tier_3_sku_group_id', 'tier_3_devices',
+    'tier_4_amount', 'tier_4_sku_group_id', 'tier_4_devices'
+]
+SEGMENT_FIELDS = [
+    'segment_name', 'sub_segment', 'segment_group_id', 'segment_level'
+]
+RESET_PATCHES = {
+    # broken_trade resets to its default value rather than blank
+    'trade': {**{field: '' for field in TRADE_FIELDS}, 'broken_trade': 'N'},
+    'tiers': {field: '' for field in TIER_FIELDS},
+    'segment': {field: '' for field in SEGMENT_FIELDS},
+}
+
+# Fields maintained by the data manager that batch edits may not set
+PROTECTED_FIELDS = {'code', 'created_at', 'updated_at', 'version_history', 'last_changes'}
 
 @promo_bp.route('/edit_promo/<promo_code>', methods=['GET', 'POST'])
 def edit_promo(promo_code):
@@ -16,8 +53,11 @@ def edit_promo(promo_code):
         # Get the active tab
         active_tab = request.form.get('active_tab', 'Details')
         
+        # Stage the saves made while handling this request; the promo is written once at the end
+        session = data_manager.session(user_name="Cade Holtzen")
+        
         # Get current promo data
-        promo_data = data_manager.get_promo(promo_code)
+        promo_data = session.get_promo(promo_code)
         if not promo_data:
             flash(f"Promotion {promo_code} not found", "error")
             return redirect(url_for('index'))
@@ -32,7 +72,7 @@ def edit_promo(promo_code):
                 start_time = time.time()
                 
                 # Generate SQL using the dictionary data
-                sql_content = generate_promo_eligibility_sql(promo_data)
+                sql_content = generate_promo_eligibility_sql(promo_data, data_manager)
                 
                 # End timing
                 end_time = time.time()
@@ -46,7 +86,7 @@ def edit_promo(promo_code):
                 promo_data['sql_generated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 promo_data['sql_generation_time'] = f"{generation_time:.4f}"
                 promo_data['sql_length'] = len(sql_content)
-                data_manager.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
+                session.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
                 
                 # Flash message with performance info
                 flash(f"SQL generated successfully in {generation_time:.2f} seconds ({len(sql_content):,} characters)", "success")
@@ -61,6 +101,7 @@ def edit_promo(promo_code):
                 flash(f"Error generating SQL: {str(e)}", "error")
         
         # Handle file uploads
+        uploaded = []
         for file_key in ['sku_excel', 'tradein_excel']:
             if file_key in request.files:
                 file = request.files[file_key]
@@ -73,52 +114,10 @@ def edit_promo(promo_code):
                                 promo_data['uploaded_files'] = {}
                             promo_data['uploaded_files'][file_key] = file_metadata
                             
-                            # Process trade-in Excel file to populate trade tier data
-                            if file_key == 'tradein_excel':
-                                from promo.parsers import parse_tradein_excel
-                                try:
-                                    sql_statements = parse_tradein_excel(file_metadata['file_path'], promo_data)
-                                    
-                                    # Parse the SQL statements to extract tier information and populate form fields
-                                    tier_data = {}
-                                    for sql in sql_statements:
-                                        # Extract tier and model information from SQL
-                                        if 'TIER' in sql:
-                                            # Find tier number in the SQL statement
-                                            import re
-                                            tier_match = re.search(r'TIER (\d+)', sql)
-                                            make_match = re.search(r",'([^']+)','([^']+)',", sql)
-                                            grp_id_match = re.search(r"Values \('([^']+)'", sql)
-                                            
-                                            if tier_match and make_match and grp_id_match:
-                                                tier_num = tier_match.group(1)
-                                                make = make_match.group(1)
-                                                model = make_match.group(2)
-                                                grp_id = grp_id_match.group(1)
-                                                
-                                                if tier_num not in tier_data:
-                                                    tier_data[tier_num] = {
-                                                        'make_model': grp_id,
-                                                        'devices': []
-                                                    }
-                                                tier_data[tier_num]['devices'].append(f"{make} - {model}")
-                                    
-                                    # Update promo data with tier information
-                                    for tier_num, data in tier_data.items():
-                                        promo_data[f'trade_tier_{tier_num}_make_model'] = data['make_model']
-                                        # You can also set default amounts, conditions, etc. based on your business logic
-                                        if not promo_data.get(f'trade_tier_{tier_num}_cond_id'):
-                                            promo_data[f'trade_tier_{tier_num}_cond_id'] = 'ST1'  # Default condition
-                                    
-                                    # Store the generated SQL statements for later use
-                                    promo_data['tradein_sql_statements'] = sql_statements  
-                                    
-                                    flash(f"Trade-in Excel processed successfully. {len(sql_statements)} SQL statements generated.", "success")
-                                    
-                                except Exception as e:
-                                    flash(f"Error processing trade-in Excel: {str(e)}", "warning")
+                            # Workbooks are parsed by the background ingestion queue once this request is saved
+                            uploaded.append((file_key, file_metadata))
                             
-                            data_manager.save_promo(promo_code, promo_data)
+                            session.save_promo(promo_code, promo_data)
                             flash(f"{file_key.replace('_', ' ').title()} uploaded successfully", "success")
                         else:
                             flash(f"Failed to save {file_key.replace('_', ' ')}", "error")
@@ -139,9 +138,19 @@ def edit_promo(promo_code):
         # Save changes
         if updated_fields:
             promo_data['last_changes'] = f"Updated {', '.join(updated_fields)} on {active_tab} tab"
-            data_manager.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
+            session.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
             flash(f"Saved {active_tab} successfully", "success")
         
+        session.flush()
+        
+        # Queue workbook parsing only after the upload metadata is saved, so the job patches the saved record
+        for file_key, file_metadata in uploaded:
+            try:
+                job = queue_workbook(data_manager, promo_code, file_key, file_metadata, user_name="Cade Holtzen")
+                flash(f"{file_key.replace('_', ' ').title()} queued for processing (job {job.id[:8]})", "info")
+            except QueueFull as e:
+                flash(f"{file_key.replace('_', ' ').title()} was saved but could not be queued for processing: {str(e)}", "warning")
+        
         # Redirect to maintain the active tab
         return redirect(url_for('promo.edit_promo', promo_code=promo_code, tab=active_tab))
     
@@ -155,12 +164,15 @@ def edit_promo(promo_code):
     return render_template('edit_promo.html', 
                          promo=promo_data, 
                          active_tab=tab,
+                         sql_preview=data_manager.get_generated_sql(promo_data, limit=1001),
+                         history=data_manager.get_history(promo_code, page=request.args.get('history_page', 1, type=int)),
                          soc_groupings=data_manager.get_soc_groupings(),
                          soc_grouping_details=data_manager.get_soc_grouping_details(),
                          account_types=data_manager.get_account_types(),
                          account_type_details=data_manager.get_account_type_details(),
                          sales_applications=data_manager.get_sales_applications(),
                          sales_application_details=data_manager.get_sales_application_details(),
+                         ingest_jobs=recent_jobs(promo_code),
                          user_name="Cade Holtzen")
 
 @promo_bp.route('/clear_trade_data/<promo_code>', methods=['POST'])
@@ -172,23 +184,7 @@ def clear_trade_data(promo_code):
             return jsonify({'success': False, 'error': 'Promotion not found'})
         
         # Clear trade-related fields
-        trade_fields = [
-            'trade_in_group_id', 'broken_trade',
-            'trade_tier_1_make_model', 'trade_tier_1_amount', 'trade_tier_1_cond_id', 
-            'trade_tier_1_min_fmv', 'trade_tier_1_max_fmv',
-            'trade_tier_2_make_model', 'trade_tier_2_amount', 'trade_tier_2_cond_id',
-            'trade_tier_2_min_fmv', 'trade_tier_2_max_fmv',
-            'trade_tier_3_make_model', 'trade_tier_3_amount', 'trade_tier_3_cond_id',
-            'trade_tier_3_min_fmv', 'trade_tier_3_max_fmv',
-            'trade_tier_4_make_model', 'trade_tier_4_amount', 'trade_tier_4_cond_id',
-            'trade_tier_4_min_fmv', 'trade_tier_4_max_fmv'
-        ]
-        
-        for field in trade_fields:
-            if field == 'broken_trade':
-                promo_data[field] = 'N'  # Reset to default value
-            else:
-                promo_data[field] = ''  # Clear the field
+        promo_data.update(RESET_PATCHES['trade'])
         
         # Save the updated promo data
         data_manager.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
@@ -207,16 +203,7 @@ def clear_tiers_data(promo_code):
             return jsonify({'success': False, 'error': 'Promotion not found'})
         
         # Clear tiers-related fields
-        tier_fields = [
-            'tiered_group_id',
-            'tier_1_amount', 'tier_1_sku_group_id', 'tier_1_devices',
-            'tier_2_amount', 'tier_2_sku_group_id', 'tier_2_devices',
-            'tier_3_amount', 'tier_3_sku_group_id', 'tier_3_devices',
-            'tier_4_amount', 'tier_4_sku_group_id', 'tier_4_devices'
-        ]
-        
-        for field in tier_fields:
-            promo_data[field] = ''  # Clear the field
+        promo_data.update(RESET_PATCHES['tiers'])
         
         # Save the updated promo data
         data_manager.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
@@ -234,12 +221,7 @@ def clear_segment_data(promo_code):
             return jsonify({'success': False, 'error': 'Promotion not found'})
         
         # Clear segmentation-related fields
-        segment_fields = [
-            'segment_name', 'sub_segment', 'segment_group_id', 'segment_level'
-        ]
-        
-        for field in segment_fields:
-            promo_data[field] = ''  # Clear the field
+        promo_data.update(RESET_PATCHES['segment'])
         
         # Save the updated promo data
         data_manager.save_promo(promo_code, promo_data, user_name="Cade Holtzen")
@@ -248,6 +230,69 @@ def clear_segment_data(promo_code):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def _code_list(value):
+    """Promo codes from a JSON list or a comma/newline separated form value"""
+    if isinstance(value, str):
+        value = value.replace('\n', ',').split(',')
+    return [str(code).strip() for code in value or [] if str(code).strip()]
+
+@promo_bp.route('/batch_edit', methods=['POST'])
+def batch_edit():
+    """
+    Apply one field patch to many RDC and SPE promotions.
+    
+    Accepts JSON {"promo_codes": [...], "spe_codes": [...], "fields": {...}, "reset": [...]}
+    or the same keys as form values. "reset" names RESET_PATCHES presets applied before
+    "fields"; a field set to null is removed. Each promotion type is written once.
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {
+            'promo_codes': request.form.get('promo_codes', ''),
+            'spe_codes': request.form.get('spe_codes', ''),
+            'reset': request.form.getlist('reset'),
+            'fields': {key: value for key, value in request.form.items()
+                       if key not in ('promo_codes', 'spe_codes', 'reset')}
+        }
+    
+    promo_codes = _code_list(payload.get('promo_codes'))
+    spe_codes = _code_list(payload.get('spe_codes'))
+    fields = payload.get('fields') or {}
+    resets = payload.get('reset') or []
+    if isinstance(resets, str):
+        resets = [resets]
+    
+    unknown_resets = [name for name in resets if name not in RESET_PATCHES]
+    if unknown_resets:
+        return jsonify({'success': False, 'error': f"Unknown reset: {', '.join(unknown_resets)}"}), 400
+    if not isinstance(fields, dict) or PROTECTED_FIELDS.intersection(fields):
+        return jsonify({'success': False, 'error': 'Fields must be an object of editable promo fields'}), 400
+    
+    patch = {}
+    for name in resets:
+        patch.update(RESET_PATCHES[name])
+    patch.update(fields)
+    if not patch or not (promo_codes or spe_codes):
+        return jsonify({'success': False, 'error': 'Nothing to update'}), 400
+    
+    try:
+        updated = data_manager.patch_many(promo_codes, patch, user_name="Cade Holtzen") if promo_codes else []
+        updated_spe = (data_manager.patch_many(spe_codes, patch, user_name="Cade Holtzen", is_spe=True)
+                       if spe_codes else [])
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    updated_codes, updated_spe_codes = set(updated), set(updated_spe)
+    not_found = ([code for code in promo_codes if code not in updated_codes] +
+                 [code for code in spe_codes if code not in updated_spe_codes])
+    return jsonify({
+        'success': True,
+        'updated': updated,
+        'updated_spe': updated_spe,
+        'not_found': not_found,
+        'fields': sorted(patch)
+    })
+
 @promo_bp.route('/delete_file/<promo_code>/<file_type>', methods=['POST'])
 def delete_file(promo_code, file_type):
     """Delete an uploaded file for a promotion"""
@@ -260,6 +305,17 @@ def delete_file(promo_code, file_type):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@promo_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status of a background workbook ingestion job; ?wait=<seconds> (max 30) long-polls, ?promo=<code> skips the file search"""
+    wait = min(max(request.args.get('wait', 0, type=float), 0), 30)
+    promo_code = request.args.get('promo') or None
+    job = ingest_jobs.wait(job_id, wait, promo_code) if wait else ingest_jobs.get(job_id, promo_code)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.as_dict())
+
+
 @promo_bp.route('/download_file/<promo_code>/<file_type>')
 def download_file(promo_code, file_type):
     """Download uploaded files for a promotion"""
@@ -294,14 +350,15 @@ def download_sql(promo_code):
             flash("Promotion not found", "error")
             return redirect(url_for('index'))
         
-        if not promo_data.get('generated_sql'):
+        sql = data_manager.get_generated_sql(promo_data)
+        if not sql:
             flash("No SQL generated yet", "error")
             return redirect(url_for('promo.edit_promo', promo_code=promo_code))
         
         # Create temporary SQL file
         import tempfile
         with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
-            f.write(promo_data['generated_sql'])
+            f.write(sql)
             temp_path = f.name
         
         filename = f"{promo_code}_promo_eligibility_rules.sql"
@@ -326,7 +383,7 @@ def get_full_sql(promo_code):
         if not promo_data:
             return jsonify({'success': False, 'error': 'Promotion not found'})
         
-        sql = promo_data.get('generated_sql', '')
+        sql = data_manager.get_generated_sql(promo_data)
         if not sql:
             return jsonify({'success': False, 'error': 'No SQL found for this promotion'})
         
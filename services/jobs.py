@@ -0,0 +1,314 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from data import codec
+from data.fileio import atomic_write, safe_record_name
+
+# Job IDs are uuid4 hex strings; anything else cannot name a status file
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# How often a worker re-reads the status file of a job running in another process
+_POLL_SECONDS = 0.25
+
+
+class QueueFull(RuntimeError):
+    """Raised when a job is submitted while max_pending jobs are already waiting or running"""
+
+
+class Job:
+    """One unit of background work and its outcome"""
+    __slots__ = ('id', 'kind', 'promo_code', 'status', 'submitted_at', 'started_at',
+                 'finished_at', 'result', 'error', 'pid', '_done')
+
+    def __init__(self, kind: str, promo_code: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.promo_code = promo_code
+        self.status = 'queued'
+        self.submitted_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # The process running the job
+        self.pid = os.getpid()
+        self._done = threading.Event()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Job':
+        """Rebuild a job from its status file"""
+        job = cls(data.get('kind', ''), data.get('promo_code', ''))
+        for field in ('id', 'status', 'submitted_at', 'started_at', 'finished_at', 'result', 'error', 'pid'):
+            setattr(job, field, data.get(field))
+        if job.finished:
+            job._done.set()
+        return job
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes or timeout seconds pass; returns whether it finished"""
+        return self._done.wait(timeout)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'promo_code': self.promo_code,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+def _process_alive(pid: Any) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Job status files shared by every worker process on one data directory.
+
+    Each job is a small JSON file (<jobs_dir>/<promo_code>/<id>.json) rewritten
+    atomically when its status changes, so a status poll can be answered by any worker,
+    finished jobs survive restarts, and listing a promotion's jobs reads only its own
+    directory. A job left queued or running by a process that has exited is reported,
+    and recorded, as failed.
+    """
+    # Status files kept per promotion by prune(); above max_pending, so live jobs are never among the oldest
+    keep_per_promo = 32
+
+    def __init__(self, jobs_dir: str):
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _promo_dir(self, promo_code: str) -> str:
+        return os.path.join(self.jobs_dir, safe_record_name(promo_code or '_'))
+
+    def _path(self, job_id: str, promo_code: str) -> str:
+        return os.path.join(self._promo_dir(promo_code), f"{job_id}.json")
+
+    def save(self, job: Job):
+        try:
+            os.makedirs(self._promo_dir(job.promo_code), exist_ok=True)
+            atomic_write(self._path(job.id, job.promo_code), codec.dumps({**job.as_dict(), 'pid': job.pid}))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not save status of job {job.id}: {e}")
+
+    def _find(self, job_id: str) -> Optional[str]:
+        """Status file of a job whose promotion is not known (one stat per promotion directory)"""
+        try:
+            with os.scandir(self.jobs_dir) as entries:
+                for entry in entries:
+                    path = os.path.join(entry.path, f"{job_id}.json")
+                    if entry.is_dir() and os.path.exists(path):
+                        return path
+        except FileNotFoundError:
+            pass
+        return None
+
+    def load(self, job_id: str, promo_code: Optional[str] = None) -> Optional[Job]:
+        """A job from its status file, or None if there is none; pass promo_code to skip searching for it"""
+        if not _JOB_ID.match(job_id or ''):
+            return None
+        path = self._path(job_id, promo_code) if promo_code else self._find(job_id)
+        return self._load(path) if path else None
+
+    def _load(self, path: str) -> Optional[Job]:
+        try:
+            with open(path, 'rb') as f:
+                data = codec.loads(f.read())
+        except (FileNotFoundError,) + codec.DECODE_ERRORS:
+            return None
+        if not isinstance(data, dict):
+            return None
+        job = Job.from_dict(data)
+        # Jobs of this process are looked up in memory first, so one only found on disk was orphaned too
+        if not job.finished and (job.pid == os.getpid() or not _process_alive(job.pid)):
+            job.status = 'failed'
+            job.error = "The worker running this job stopped before it finished"
+            job.finished_at = datetime.now().isoformat()
+            job._done.set()
+            # Recorded, so later reads need no process check
+            self.save(job)
+        return job
+
+    def jobs(self, promo_code: str, skip: Iterable[str] = ()) -> List[Job]:
+        """A promotion's stored jobs except the skip IDs, oldest first"""
+        directory = self._promo_dir(promo_code)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        skip = set(skip)
+        jobs = [self._load(os.path.join(directory, name)) for name in names
+                if name.endswith('.json') and name[:-len('.json')] not in skip]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.submitted_at or '')
+
+    def prune(self):
+        """Keep the keep_per_promo most recently written status files of each promotion, going by mtime alone"""
+        try:
+            with os.scandir(self.jobs_dir) as entries:
+                directories = [entry.path for entry in entries if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for directory in directories:
+            try:
+                names = [name for name in os.listdir(directory) if name.endswith('.json')]
+            except FileNotFoundError:
+                continue
+            if len(names) <= self.keep_per_promo:
+                continue
+            written = []
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    written.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    continue
+            written.sort()
+            for _, path in written[:max(0, len(written) - self.keep_per_promo)]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+class JobQueue:
+    """
+    Bounded background worker pool with pollable job status.
+
+    At most max_workers jobs run at once and at most max_pending are accepted
+    (queued plus running); submit() raises QueueFull beyond that so a burst of
+    uploads cannot pile up unbounded work. The newest keep_finished finished jobs
+    stay available for status lookups. With a JobStore attached, every status change
+    is also written to disk, lookups fall back to it for jobs of other workers, and
+    it is pruned once every prune_every finished jobs.
+    """
+    # Finished jobs between prunes of the attached store
+    prune_every = 50
+
+    def __init__(self, name: str, max_workers: int = 2, max_pending: int = 16, keep_finished: int = 200):
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._store: Optional[JobStore] = None
+        self._finished_since_prune = 0
+
+    def attach_store(self, store: JobStore):
+        """Persist job status to store from now on"""
+        self._store = store
+
+    def _save(self, job: Job):
+        if self._store is not None:
+            self._store.save(job)
+
+    def submit(self, kind: str, promo_code: str, func: Callable[..., Any], *args: Any) -> Job:
+        """Queue func(*args); its return value becomes the job result"""
+        job = Job(kind, promo_code)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs are already queued; try again shortly.")
+            self._pending += 1
+            self._jobs[job.id] = job
+        self._save(job)
+        try:
+            self._executor.submit(self._run, job, func, args)
+        except RuntimeError:
+            self._finish(job, 'failed', error="Job queue is shut down")
+            raise
+        return job
+
+    def _run(self, job: Job, func: Callable[..., Any], args: tuple):
+        job.status = 'running'
+        job.started_at = datetime.now().isoformat()
+        self._save(job)
+        try:
+            result = func(*args)
+        except Exception as e:
+            self._finish(job, 'failed', error=str(e))
+        else:
+            self._finish(job, 'done', result=result)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None):
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now().isoformat()
+        job.status = status
+        self._save(job)
+        with self._lock:
+            self._pending -= 1
+            finished = [job_id for job_id, queued in self._jobs.items() if queued.finished]
+            for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self._jobs[job_id]
+            self._finished_since_prune += 1
+            prune = self._store is not None and self._finished_since_prune >= self.prune_every
+            if prune:
+                self._finished_since_prune = 0
+        if prune:
+            self._store.prune()
+        job._done.set()
+
+    def get(self, job_id: str, promo_code: Optional[str] = None) -> Optional[Job]:
+        """A job of this process, or of any worker sharing the attached store (found faster given its promo_code)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            job = self._store.load(job_id, promo_code)
+        return job
+
+    def wait(self, job_id: str, timeout: float, promo_code: Optional[str] = None) -> Optional[Job]:
+        """Wait up to timeout seconds for a job to finish; returns its latest state (None if unknown)"""
+        job = self.get(job_id, promo_code)
+        if job is None or job.finished:
+            return job
+        with self._lock:
+            local = job_id in self._jobs
+        if local:
+            job.wait(timeout)
+            return job
+        # Running in another worker: follow its status file
+        deadline = time.monotonic() + timeout
+        while not job.finished and time.monotonic() < deadline:
+            time.sleep(min(_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+            job = self.get(job_id, job.promo_code) or job
+        return job
+
+    def for_promo(self, promo_code: str) -> List[Job]:
+        """Known jobs for a promotion (from every worker when a store is attached), oldest first"""
+        with self._lock:
+            jobs = {job.id: job for job in self._jobs.values() if job.promo_code == promo_code}
+        if self._store is not None:
+            for job in self._store.jobs(promo_code, skip=jobs):
+                jobs.setdefault(job.id, job)
+        return sorted(jobs.values(), key=lambda job: job.submitted_at or '')
+
+
+# Workbook parsing queue shared by every request in the process
+ingest_jobs = JobQueue(
+    'ingest',
+    max_workers=int(os.environ.get('PAM_INGEST_WORKERS', '2')),
+    max_pending=int(os.environ.get('PAM_INGEST_MAX_PENDING', '16'))
+)
@@ -0,0 +1,47 @@
+import os
+import sys
+import pytest
+
+# Run from the repository root without installing anything
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage import PromoDataManager, create_data_manager  # noqa: E402
+
+
+def promo(code: str, **fields):
+    """A minimal RDC promotion record"""
+    record = {
+        "code": code,
+        "owner": "Cade Holtzen",
+        "bill_facing_name": f"Trade In {code}",
+        "description": f"Trade in offer {code}",
+        "promo_start_date": "2025-01-01",
+        "promo_end_date": "2025-12-31",
+        "sku_list": ["123456789012"]
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture(autouse=True)
+def no_catalog_snapshot(monkeypatch):
+    # Temporary data directories are gone by the time the exit hook would write a snapshot
+    monkeypatch.setattr(PromoDataManager, 'snapshot_enabled', False)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return str(tmp_path / "data")
+
+
+@pytest.fixture
+def manager(data_dir):
+    """A JSON backend manager over a fresh data directory"""
+    return PromoDataManager(data_dir)
+
+
+@pytest.fixture(params=['json', 'sqlite', 'sharded'])
+def backend_manager(request, data_dir, monkeypatch):
+    """A manager for each storage backend over a fresh data directory"""
+    monkeypatch.setenv('PAM_STORAGE_BACKEND', request.param)
+    return create_data_manager(data_dir)
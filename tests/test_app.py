@@ -0,0 +1,83 @@
+import os
+import pytest
+from data.storage import PromoDataManager
+from services.jobs import JobStore, ingest_jobs
+from tests.conftest import promo
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    """The app module, with its data managers pointed at a scratch data directory"""
+    workdir = tmp_path_factory.mktemp("app")
+    cwd = os.getcwd()
+    snapshot_enabled = PromoDataManager.snapshot_enabled
+    # The app and blueprint create their managers on "data" relative to the working directory
+    os.chdir(workdir)
+    PromoDataManager.snapshot_enabled = False
+    try:
+        import app
+        import promo.routes as routes
+    finally:
+        os.chdir(cwd)
+        PromoDataManager.snapshot_enabled = snapshot_enabled
+
+    manager = PromoDataManager(str(workdir / "data"))
+    app.data_manager = routes.data_manager = manager
+    ingest_jobs.attach_store(JobStore(str(workdir / "data" / "jobs")))
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def manager(app_module):
+    return app_module.data_manager
+
+
+@pytest.mark.parametrize("path", ["/promotions", "/promotions?owner=Jordan+Lee", "/api/promotions?cursor=", "/spe", "/capacity"])
+def test_unchanged_pages_revalidate_with_304(client, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    repeat = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+    assert repeat.status_code == 304 and repeat.headers['ETag'] == first.headers['ETag']
+
+
+def test_etag_changes_when_data_changes(client, manager):
+    first = client.get("/promotions")
+    manager.save_promo("ETAG1", promo("ETAG1"))
+
+    after_save = client.get("/promotions", headers={'If-None-Match': first.headers['ETag']})
+    assert after_save.status_code == 200
+    assert after_save.headers['ETag'] != first.headers['ETag']
+    assert b"ETAG1" in after_save.data
+
+
+def test_etag_depends_on_the_query(client):
+    assert client.get("/promotions?page=1").headers['ETag'] != client.get("/promotions?page=2").headers['ETag']
+
+
+@pytest.mark.parametrize("path, failing", [("/spe", "get_promo_records"), ("/capacity", "get_catalog")])
+def test_error_pages_are_not_cached(client, manager, monkeypatch, path, failing):
+    etag = client.get(path).headers['ETag']
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("storage unavailable")
+
+    monkeypatch.setattr(manager, failing, broken)
+    response = client.get(path, headers={'If-None-Match': etag + "-stale"})
+    assert response.status_code == 500
+    assert 'ETag' not in response.headers
+
+
+def test_spe_owner_filter_lists_spe_owners(client, manager):
+    manager.save_promo("OWN1", promo("OWN1", owner="Rdc Only Owner"))
+    manager.save_spe_promo("OWN2", promo("OWN2", owner="Spe Only Owner"))
+    page = client.get("/spe").data.decode()
+    assert "Spe Only Owner" in page
+    assert "Rdc Only Owner" not in page
@@ -0,0 +1,50 @@
+import os
+from data.storage import create_data_manager
+from tests.conftest import promo
+
+BACKENDS = ('json', 'sqlite', 'sharded')
+# Stamped with the wall clock at save time
+VOLATILE_FIELDS = ('created_at', 'updated_at', 'last_changes')
+
+
+def stable(record):
+    return {field: value for field, value in record.items() if field not in VOLATILE_FIELDS}
+
+
+def exercise(manager):
+    """Run the same edits against a manager and collect what its read API reports"""
+    for i in range(30):
+        owner = "Jordan Lee" if i % 3 else "Sam Patel"
+        manager.save_promo(f"P{i:03d}", promo(f"P{i:03d}", owner=owner, orbit_id=str(100 + i)))
+    manager.save_spe_promo("SP001", promo("SP001", owner="Alex Kim"))
+    manager.patch_many(["P001", "P002", "MISSING"], {"bill_facing_name": "Patched"})
+    manager.delete_promo("P003")
+    manager.save_promo("P004", promo("P004", owner="Taylor Reed", description="Trade in offer renamed"))
+
+    return {
+        'promo': stable(manager.get_promo("P001")),
+        'spe_promo': stable(manager.get_spe_promo("SP001")),
+        'deleted': manager.get_promo("P003"),
+        'page': [promo['code'] for promo in manager.get_paginated_promos(page=2, per_page=10)['promotions']],
+        'search': sorted(promo['code'] for promo in manager.get_paginated_promos(search="renamed")['promotions']),
+        'owner': sorted(promo['code'] for promo in
+                        manager.get_paginated_promos(per_page=100, owner_filter="Sam Patel")['promotions']),
+        'owners': manager.get_owners(),
+        'promo_list': sorted(promo['code'] for promo in manager.get_promo_list()),
+        'spe_list': sorted(promo['code'] for promo in manager.get_spe_promo_list()),
+        'catalog_owners': manager.get_catalog().owners(('SPE',)),
+        'history': [entry['kind'] for entry in manager.history.read("P001")]
+    }
+
+
+def test_backends_report_the_same_data(tmp_path, monkeypatch):
+    results = {}
+    for backend in BACKENDS:
+        monkeypatch.setenv('PAM_STORAGE_BACKEND', backend)
+        results[backend] = exercise(create_data_manager(os.path.join(str(tmp_path), backend)))
+
+    assert results['json']['deleted'] == {}
+    assert results['json']['search'] == ["P004"]
+    for backend in BACKENDS[1:]:
+        for key, value in results['json'].items():
+            assert results[backend][key] == value, (backend, key)
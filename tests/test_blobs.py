@@ -0,0 +1,35 @@
+import os
+from tests.conftest import promo
+
+
+def blob_names(manager, code):
+    blob_dir = manager._promo_blob_dir(code)
+    return sorted(os.listdir(blob_dir)) if os.path.isdir(blob_dir) else []
+
+
+def test_superseded_blobs_are_removed(backend_manager):
+    backend_manager.save_promo("G1", promo("G1", generated_sql="SELECT 1;"))
+    first = backend_manager.get_promo("G1")['generated_sql_ref']['file']
+    assert blob_names(backend_manager, "G1") == [first]
+
+    backend_manager.save_promo("G1", promo("G1", generated_sql="SELECT 2;"))
+    second = backend_manager.get_promo("G1")['generated_sql_ref']['file']
+    assert blob_names(backend_manager, "G1") == [second]
+
+    # A save that keeps the reference leaves its file alone
+    backend_manager.patch_many(["G1"], {"bill_facing_name": "Patched"})
+    assert blob_names(backend_manager, "G1") == [second]
+    assert backend_manager.get_generated_sql(backend_manager.get_promo("G1")) == "SELECT 2;"
+
+    backend_manager.save_promo("G1", promo("G1", generated_sql=""))
+    assert blob_names(backend_manager, "G1") == []
+
+
+def test_blob_still_referenced_by_the_other_type_is_kept(backend_manager):
+    backend_manager.save_promo("G1", promo("G1", generated_sql="SELECT 1;"))
+    backend_manager.save_spe_promo("G1", promo("G1", generated_sql="SELECT 1;"))
+    shared = backend_manager.get_spe_promo("G1")['generated_sql_ref']['file']
+
+    backend_manager.save_promo("G1", promo("G1", generated_sql="SELECT 2;"))
+    assert shared in blob_names(backend_manager, "G1")
+    assert backend_manager.get_generated_sql(backend_manager.get_spe_promo("G1")) == "SELECT 1;"
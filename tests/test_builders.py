@@ -0,0 +1,36 @@
+import json
+import os
+import pytest
+from promo.builders import generate_eligibility_insert, generate_promo_eligibility_sql, render_eligibility_rules
+from tests.conftest import promo
+
+# Output of the column-by-column renderer that ELIGIBILITY_COLUMNS replaced
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "eligibility_sql.json"), encoding="utf-8") as f:
+    FIXTURE = json.load(f)
+
+
+@pytest.mark.parametrize("case", FIXTURE["generate_eligibility_insert"], ids=lambda case: case["name"])
+def test_eligibility_insert_matches_previous_renderer(case):
+    assert generate_eligibility_insert(dict(case["data"])) == case["sql"]
+
+
+@pytest.mark.parametrize("case", FIXTURE["generate_promo_eligibility_sql"], ids=lambda case: case["name"])
+def test_promo_eligibility_sql_matches_previous_renderer(case):
+    assert generate_promo_eligibility_sql(dict(case["promo"])) == case["sql"]
+
+
+def test_bulk_rendering_matches_single_promo_sql():
+    promos = [dict(case["promo"]) for case in FIXTURE["generate_promo_eligibility_sql"]]
+    for promo_data, rule in zip(promos, render_eligibility_rules(promos)):
+        assert rule in generate_promo_eligibility_sql(dict(promo_data))
+
+
+def test_tradein_sql_is_read_from_the_managers_blob_dir(manager, tmp_path, monkeypatch):
+    statements = ["Insert into PROMO_MK_MDL_GROUPS (MK_MDL_GRP_ID) values ('T1');"]
+    manager.save_promo("TR1", promo("TR1", tradein_sql_statements=statements))
+    saved = manager.get_promo("TR1")
+    assert 'tradein_sql_statements' not in saved and saved['tradein_sql_ref']
+
+    # Nothing under the working directory's data/ to fall back on
+    monkeypatch.chdir(tmp_path)
+    assert statements[0] in generate_promo_eligibility_sql(saved, manager)
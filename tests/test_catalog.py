@@ -0,0 +1,41 @@
+import os
+from data import codec
+from data.catalog import PromotionCatalog
+from data.indexes import PromoIndex
+from data.storage import PromoDataManager
+from tests.conftest import promo
+
+
+def catalog(rdc, spe=None):
+    return PromotionCatalog([('RDC', PromoIndex.build(rdc)), ('SPE', PromoIndex.build(spe or {}))])
+
+
+def test_entries_are_keyed_by_document_key():
+    # Imported data whose code fields differ from, or repeat across, their keys
+    view = catalog({
+        "A1": promo("a1", promo_start_date="2025-03-01", promo_end_date="2025-03-31"),
+        "A2": promo("a1", promo_start_date="2025-03-05", promo_end_date="2025-04-30"),
+    })
+    assert len(view) == 2
+    assert {entry.code for entry in view} == {"a1"}
+    assert len(view.starting_between("2025-03-01", "2025-03-31")) == 2
+    assert len(view.active_on("2025-04-15")) == 1
+    assert view.get("A2").promo_start_date == "2025-03-05"
+    assert view.get("a1") is None
+
+
+def test_lookups_span_types():
+    view = catalog({"P1": promo("P1", owner="Sam Patel")}, {"P1": promo("P1", owner="Alex Kim")})
+    assert [entry.type for entry in view.find("P1")] == ['RDC', 'SPE']
+    assert view.get("P1", 'SPE').owner == "Alex Kim"
+    assert view.owners(('SPE',)) == ["Alex Kim"]
+    assert [entry.type for entry in view.for_owner("Sam Patel")] == ['RDC']
+
+
+def test_manager_catalog_over_mismatched_codes(data_dir):
+    os.makedirs(data_dir)
+    with open(os.path.join(data_dir, "promotions.json"), 'wb') as f:
+        f.write(codec.dumps({"A1": promo("a1", promo_start_date="2025-01-01", promo_end_date="2099-01-01")}))
+    manager = PromoDataManager(data_dir)
+    assert [entry.code for entry in manager.get_catalog().starting_between("2025-01-01", "2025-01-31", ('RDC',))] == ["a1"]
+    assert [entry.code for entry in manager.get_catalog().active_on("2026-01-01", ('RDC',))] == ["a1"]
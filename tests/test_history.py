@@ -0,0 +1,51 @@
+import os
+import pytest
+from data.history import HistoryStore, make_entry
+from tests.conftest import promo
+
+# The method each backend writes a saved record through
+RECORD_WRITERS = {
+    'PromoDataManager': '_write_record',
+    'ShardedPromoDataManager': '_write_shard',
+    'SQLitePromoDataManager': '_upsert_record',
+}
+
+
+def test_failed_save_leaves_no_history(backend_manager, monkeypatch):
+    backend_manager.save_promo("NEW1", promo("NEW1"))
+    before = backend_manager.history.read("NEW1")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(backend_manager, RECORD_WRITERS[type(backend_manager).__name__], fail)
+    with pytest.raises(OSError):
+        backend_manager.save_promo("NEW1", promo("NEW1", bill_facing_name="Never written"))
+
+    assert backend_manager.history.read("NEW1") == before
+    assert backend_manager.get_promo("NEW1")["bill_facing_name"] == "Trade In NEW1"
+
+
+def test_saves_are_recorded_in_history(backend_manager):
+    backend_manager.save_promo("NEW1", promo("NEW1"))
+    backend_manager.save_promo("NEW1", promo("NEW1", bill_facing_name="Edited"))
+    backend_manager.patch_many(["NEW1"], {"bill_facing_name": "Patched"})
+    kinds = [entry['kind'] for entry in backend_manager.history.read("NEW1")]
+    assert kinds[0] == 'created' and kinds.count('change') >= 2
+
+
+def test_compaction_is_not_repeated_on_every_append(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    monkeypatch.setattr(HistoryStore, 'compact_bytes', 4096)
+    monkeypatch.setattr(HistoryStore, 'max_changes', 5)
+    # Retained notes alone keep the file past compact_bytes
+    store.append("P1", [make_entry("Jordan Lee", 'note', "x" * 200) for _ in range(40)])
+
+    compactions = []
+    compact = store._compact
+    monkeypatch.setattr(store, '_compact', lambda path: compactions.append(path) or compact(path))
+    for i in range(100):
+        store.append("P1", [make_entry("Jordan Lee", 'change', f"Updated description {i}")])
+
+    assert 1 <= len(compactions) <= 3
+    size = os.path.getsize(store._path("P1", False))
+    assert size < store.compact_growth * store._compacted_sizes[store._path("P1", False)]
@@ -0,0 +1,92 @@
+import pickle
+import random
+from data.indexes import PromoIndex, TrigramIndex
+from tests.conftest import promo
+
+OWNERS = ["Cade Holtzen", "Jordan Lee", "Sam Patel", ""]
+
+
+def random_promo(rng: random.Random, code: str):
+    return promo(
+        code,
+        owner=rng.choice(OWNERS),
+        description=rng.choice(["Samsung trade", "Pixel upgrade", "Line on us"]) + f" {rng.randint(1, 9)}",
+        promo_start_date=f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        promo_end_date=rng.choice(["", "not a date", f"2026-{rng.randint(1, 12):02d}-01"]),
+        updated_at=f"2025-06-{rng.randint(1, 28):02d}T12:00:00"
+    )
+
+
+def index_state(index: PromoIndex):
+    return (
+        sorted((s.code, s.owner, s.start, s.end, s.order) for s in index.summaries()),
+        index.owners(),
+        {owner: index.codes_for_owner(owner) for owner in OWNERS},
+        index.newest_codes(0, len(index)),
+        index.codes_starting_between('2025-03-01', '2025-09-30'),
+        index.codes_active_on('2025-12-15'),
+        index.search('samsung'),
+        index.search('pi')
+    )
+
+
+def test_in_place_updates_match_a_rebuild():
+    rng = random.Random(3)
+    records = {f"P{i:03d}": random_promo(rng, f"P{i:03d}") for i in range(200)}
+    index = PromoIndex.build(records)
+    index.search('samsung')  # build the search index so it is updated too
+
+    for step in range(500):
+        code = f"P{rng.randrange(260):03d}"
+        if rng.random() < 0.2:
+            records.pop(code, None)
+        else:
+            records[code] = random_promo(rng, code)
+        version = index.version
+        index.update(code, records.get(code))
+        assert index.version == version + 1
+
+    assert index_state(index) == index_state(PromoIndex.build(records))
+
+
+def test_update_keeps_index_object_and_drops_stale_search_results():
+    records = {"A1": promo("A1", description="Samsung trade")}
+    index = PromoIndex.build(records)
+    assert index.search('samsung') == ["A1"]
+
+    records["A2"] = promo("A2", description="Samsung upgrade")
+    index.update("A2", records["A2"])
+    assert index.search('samsung') == ["A1", "A2"]
+
+    del records["A1"]
+    index.update("A1", None)
+    assert index.search('samsung') == ["A2"]
+    assert len(index) == 1
+
+
+def test_trigram_update_matches_build():
+    rng = random.Random(5)
+    records = {f"P{i:03d}": random_promo(rng, f"P{i:03d}") for i in range(50)}
+    text = TrigramIndex.build(records)
+    for code in list(records)[:20]:
+        records[code] = random_promo(rng, code)
+        text.update(code, records[code])
+    text.update("P049", None)
+    del records["P049"]
+
+    rebuilt = TrigramIndex.build(records)
+    for query in ("sam", "pixel upgrade", "line on", "p04"):
+        assert text.search(query) == rebuilt.search(query)
+
+
+def test_pickled_index_is_a_copy_that_can_be_reattached():
+    records = {"A1": promo("A1"), "A2": promo("A2", owner="Jordan Lee")}
+    index = PromoIndex.build(records)
+    index.search('trade')
+
+    restored = pickle.loads(pickle.dumps(index))
+    index.update("A1", None)
+    restored.attach(dict(records))
+    assert sorted(s.code for s in restored.summaries()) == ["A1", "A2"]
+    assert restored.owners() == ["Cade Holtzen", "Jordan Lee"]
+    assert restored.search('a2') == ["A2"]
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from services.jobs import Job, JobQueue, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs"))
+
+
+def other_worker_job(store: JobStore, status: str, pid: int) -> Job:
+    """Write the status file of a job owned by another process"""
+    job = Job('sku_excel', 'PC1')
+    job.status = status
+    job.pid = pid
+    store.save(job)
+    return job
+
+
+def test_finished_jobs_are_visible_to_other_workers(store):
+    queue = JobQueue('test', keep_finished=10)
+    queue.attach_store(store)
+    job = queue.submit('sku_excel', 'PC1', lambda rows: {'rows': rows}, 3)
+    assert job.wait(5)
+
+    other = JobQueue('other')
+    other.attach_store(store)
+    seen = other.get(job.id)
+    assert seen.status == 'done' and seen.result == {'rows': 3}
+    assert [found.id for found in other.for_promo('PC1')] == [job.id]
+    assert other.for_promo('PC2') == []
+
+
+def test_failed_job_keeps_its_error(store):
+    queue = JobQueue('test')
+    queue.attach_store(store)
+
+    def fail():
+        raise ValueError("bad workbook")
+
+    job = queue.submit('sku_excel', 'PC1', fail)
+    job.wait(5)
+    assert store.load(job.id).as_dict()['error'] == "bad workbook"
+
+
+def test_job_of_an_exited_worker_is_reported_failed(store):
+    exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                            capture_output=True, text=True, check=True)
+    job = other_worker_job(store, 'running', int(exited.stdout))
+    loaded = store.load(job.id)
+    assert loaded.status == 'failed' and loaded.finished
+
+
+def test_wait_follows_a_job_running_in_another_worker(store):
+    job = other_worker_job(store, 'running', os.getppid())
+    queue = JobQueue('test')
+    queue.attach_store(store)
+
+    def finish():
+        job.status = 'done'
+        job.result = {'rows': 1}
+        store.save(job)
+
+    timer = threading.Timer(0.3, finish)
+    timer.start()
+    try:
+        assert queue.wait(job.id, 5).result == {'rows': 1}
+    finally:
+        timer.cancel()
+
+
+def test_old_status_files_are_pruned_periodically(store, monkeypatch):
+    monkeypatch.setattr(JobStore, 'keep_per_promo', 2)
+    monkeypatch.setattr(JobQueue, 'prune_every', 3)
+    queue = JobQueue('test', keep_finished=2)
+    queue.attach_store(store)
+    other_worker_job(store, 'done', os.getppid())
+
+    jobs = [queue.submit('sku_excel', 'PC1', lambda: None) for _ in range(2)]
+    for job in jobs:
+        job.wait(5)
+    # Not pruned on every completion
+    assert len(store.jobs('PC1')) == 3
+
+    queue.submit('sku_excel', 'PC1', lambda: None).wait(5)
+    assert len(store.jobs('PC1')) == 2
+
+
+def test_jobs_are_listed_from_their_promotion_directory(store, monkeypatch):
+    other_worker_job(store, 'done', os.getppid())
+    loads = []
+    load = store._load
+    monkeypatch.setattr(store, '_load', lambda path: loads.append(path) or load(path))
+    queue = JobQueue('test')
+    queue.attach_store(store)
+    other = Job('sku_excel', 'PC2')
+    store.save(other)
+
+    assert [job.promo_code for job in queue.for_promo('PC2')] == ['PC2']
+    assert len(loads) == 1
+    assert queue.get(other.id, 'PC2').id == other.id
+    assert queue.get(other.id).id == other.id
+
+
+def test_orphaned_job_is_recorded_as_failed(store, monkeypatch):
+    job = other_worker_job(store, 'running', 2 ** 22 + 1)
+    monkeypatch.setattr('services.jobs._process_alive', lambda pid: False)
+    assert store.load(job.id, 'PC1').status == 'failed'
+    checks = []
+    monkeypatch.setattr('services.jobs._process_alive', lambda pid: checks.append(pid))
+    loaded = store.load(job.id, 'PC1')
+    assert loaded.status == 'failed' and loaded.finished_at and checks == []
+
+
+def test_unknown_or_malformed_ids(store):
+    queue = JobQueue('test')
+    queue.attach_store(store)
+    assert queue.get('0' * 32) is None
+    assert queue.get('../promotions') is None
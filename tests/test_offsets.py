@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+from data import codec
+from data.cache import document_cache
+from data.offsets import load_offsets, offsets_path
+from data.storage import PromoDataManager
+from tests.conftest import promo
+
+
+@pytest.fixture
+def parsed_bytes(monkeypatch):
+    """Bytes handed to the JSON codec from here on (every storage read goes through codec.loads)"""
+    counted = []
+    loads = codec.loads
+
+    def counting_loads(data):
+        counted.append(len(data))
+        return loads(data)
+
+    monkeypatch.setattr(codec, 'loads', counting_loads)
+    return counted
+
+
+def existing_catalog(data_dir: str, count: int = 300) -> int:
+    """Write a catalog the way older code did (indented, no sidecar); returns its size"""
+    os.makedirs(data_dir, exist_ok=True)
+    catalog = {f"P{i:04d}": promo(f"P{i:04d}", description="x" * 200) for i in range(count)}
+    path = os.path.join(data_dir, "promotions.json")
+    with open(path, 'w') as f:
+        json.dump(catalog, f, indent=2)
+    return os.path.getsize(path)
+
+
+def fresh_worker(data_dir: str) -> PromoDataManager:
+    document_cache.invalidate()
+    return PromoDataManager(data_dir)
+
+
+def test_sidecar_is_built_for_an_existing_catalog(data_dir, parsed_bytes):
+    catalog_bytes = existing_catalog(data_dir)
+    manager = PromoDataManager(data_dir)
+    assert load_offsets(manager.promo_file) is not None
+
+    worker = fresh_worker(data_dir)
+    parsed_bytes.clear()
+    assert worker.get_promo("P0123")["code"] == "P0123"
+    # The sidecar and one record, not the catalog
+    assert 0 < sum(parsed_bytes) < catalog_bytes // 10
+
+    parsed_bytes.clear()
+    assert worker.get_promo("P0200")["code"] == "P0200"
+    assert 0 < sum(parsed_bytes) < 1000
+
+
+def test_single_record_reads_apply_the_journal(manager, data_dir, parsed_bytes):
+    manager.save_promo("NEW1", promo("NEW1"))
+    manager.save_promo("NEW2", promo("NEW2"))
+    manager.compact_journals()
+    manager.save_promo("NEW1", dict(manager.get_promo("NEW1"), description="Edited"))
+    manager.delete_promo("NEW2")
+    manager.save_promo("NEW3", promo("NEW3"))
+
+    worker = fresh_worker(data_dir)
+    assert worker.get_promo("NEW1")["description"] == "Edited"
+    assert worker.get_promo("NEW2") == {}
+    assert worker.get_promo("NEW3")["code"] == "NEW3"
+    assert worker.get_promo("MISSING") == {}
+    assert document_cache.peek(worker._journals[worker.promo_file].path) is None
+
+
+def test_stale_sidecar_falls_back_to_the_whole_file(manager, data_dir):
+    manager.save_promo("NEW1", promo("NEW1"))
+    manager.compact_journals()
+    with open(offsets_path(manager.promo_file), 'rb') as f:
+        sidecar = f.read()
+
+    # Replace the catalog behind the sidecar's back, keeping the old sidecar
+    with open(manager.promo_file, 'wb') as f:
+        f.write(codec.dumps({"OTHER": promo("OTHER"), "NEW1": promo("NEW1", description="Replaced")}))
+    with open(offsets_path(manager.promo_file), 'wb') as f:
+        f.write(sidecar)
+
+    document_cache.invalidate()
+    assert load_offsets(manager.promo_file) is None
+    assert manager.get_promo("NEW1")["description"] == "Replaced"
+    assert manager.get_promo("OTHER")["code"] == "OTHER"
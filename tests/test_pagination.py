@@ -0,0 +1,70 @@
+import os
+import pytest
+from data import codec
+from data.storage import create_data_manager
+from tests.conftest import promo
+
+
+@pytest.fixture(params=['json', 'sqlite', 'sharded'])
+def paged_manager(request, data_dir, monkeypatch):
+    """A manager per backend over a catalog mixing dated and undated records"""
+    os.makedirs(data_dir)
+    records = {}
+    for i in range(23):
+        code = f"P{i:03d}"
+        if i % 4 == 0:
+            updated_at = None
+        elif i % 4 == 1:
+            updated_at = ""
+        else:
+            # Shared timestamps, so ties are broken on the code
+            updated_at = f"2025-06-{i % 3 + 1:02d}T09:00:00"
+        records[code] = promo(code, owner="Sam Patel" if i % 2 else "Jordan Lee", updated_at=updated_at)
+    # One record with no updated_at key at all
+    records["Q999"] = promo("Q999")
+    with open(os.path.join(data_dir, "promotions.json"), 'wb') as f:
+        f.write(codec.dumps(records))
+    monkeypatch.setenv('PAM_STORAGE_BACKEND', request.param)
+    manager = create_data_manager(data_dir)
+    manager.expected = sorted(records, key=lambda code: (records[code].get('updated_at') or code, code), reverse=True)
+    return manager
+
+
+def walk(manager, direction="next", cursor=None, **filters):
+    """Follow the cursors from one end of the listing to the other, collecting the pages"""
+    pages = []
+    while True:
+        result = manager.get_promos_page(cursor=cursor, per_page=5, direction=direction, **filters)
+        pages.append([record['code'] for record in result['promotions']])
+        cursor = result['pagination'][f"{direction}_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_the_catalog_newest_first(paged_manager):
+    pages = walk(paged_manager)
+    assert [code for page in pages for code in page] == paged_manager.expected
+    assert all(len(page) == 5 for page in pages[:-1])
+
+
+def test_prev_cursor_walks_back_over_the_same_pages(paged_manager):
+    forward = walk(paged_manager)
+    last = paged_manager.get_promos_page(per_page=5)
+    for _ in range(len(forward) - 1):
+        last = paged_manager.get_promos_page(cursor=last['pagination']['next_cursor'], per_page=5)
+    backward = walk(paged_manager, "prev", last['pagination']['prev_cursor'])
+    assert backward[::-1] == forward[:-1]
+
+
+def test_cursor_pages_respect_the_owner_filter(paged_manager):
+    pages = walk(paged_manager, owner_filter="Sam Patel")
+    expected = [code for code in paged_manager.expected if paged_manager.get_promo(code)['owner'] == "Sam Patel"]
+    assert [code for page in pages for code in page] == expected
+
+
+def test_saved_record_moves_ahead_of_the_dated_records(paged_manager):
+    paged_manager.save_promo("P000", promo("P000"))
+    codes = [code for page in walk(paged_manager) for code in page]
+    # Undated records sort on their code, which stays ahead of any ISO timestamp
+    undated = [code for code in paged_manager.expected if code != "P000"][:12]
+    assert codes == undated + ["P000"] + [code for code in paged_manager.expected if code not in undated + ["P000"]]
@@ -0,0 +1,26 @@
+import os
+import pytest
+from data.cache import document_cache
+from data.sharded_storage import ShardedPromoDataManager
+from tests.conftest import promo
+
+
+@pytest.fixture
+def sharded_manager(data_dir):
+    return ShardedPromoDataManager(data_dir)
+
+
+def test_missing_manifest_migrates_only_its_catalog(sharded_manager, data_dir):
+    sharded_manager.save_promo("NEW1", promo("NEW1"))
+    sharded_manager.save_spe_promo("SP1", promo("SP1"))
+    for path in (sharded_manager.spe_manifest_file, sharded_manager.spe_manifest_file + ".journal"):
+        os.remove(path)
+    promo_manifest_mtime = os.stat(sharded_manager.promo_manifest_file).st_mtime_ns
+
+    document_cache.invalidate()
+    restarted = ShardedPromoDataManager(data_dir)
+
+    # The RDC catalog holds edits promotions.json never saw; it must not be re-split
+    assert os.stat(restarted.promo_manifest_file).st_mtime_ns == promo_manifest_mtime
+    assert "NEW1" in [summary['code'] for summary in restarted.get_promo_list()]
+    assert os.path.exists(restarted.spe_manifest_file)
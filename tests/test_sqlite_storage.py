@@ -0,0 +1,26 @@
+import pytest
+from data.indexes import PromoIndex
+from data.sqlite_storage import SQLitePromoDataManager
+from tests.conftest import promo
+
+
+@pytest.fixture
+def sqlite_manager(data_dir):
+    return SQLitePromoDataManager(data_dir)
+
+
+def test_catalog_indexes_are_built_once_per_generation(sqlite_manager, monkeypatch):
+    builds = []
+    build = PromoIndex.build
+    monkeypatch.setattr(PromoIndex, 'build', staticmethod(lambda records: builds.append(1) or build(records)))
+
+    first = sqlite_manager.get_catalog()
+    built = len(builds)
+    assert sqlite_manager.get_catalog() is first
+    assert len(builds) == built
+
+    sqlite_manager.save_promo("NEW1", promo("NEW1", owner="Jordan Lee"))
+    assert len(builds) == built
+    catalog = sqlite_manager.get_catalog()
+    assert len(builds) == 2 * built
+    assert "Jordan Lee" in catalog.owners(('RDC',))
@@ -0,0 +1,108 @@
+import os
+from data import codec
+from data.cache import document_cache
+from data.storage import PromoDataManager
+from tests.conftest import promo
+
+
+def restart(data_dir: str) -> PromoDataManager:
+    """A manager that sees only what is on disk, as a new worker process would"""
+    document_cache.invalidate()
+    return PromoDataManager(data_dir)
+
+
+def test_save_updates_cached_document_and_index_in_place(manager):
+    document = manager._load_json(manager.promo_file)
+    index = manager._promo_index()[1]
+
+    manager.save_promo("NEW1", promo("NEW1", owner="Jordan Lee"))
+    manager.delete_promo("NEW1")
+    manager.save_promo("NEW2", promo("NEW2", owner="Jordan Lee"))
+
+    assert manager._load_json(manager.promo_file) is document
+    assert manager._promo_index()[1] is index
+    assert "NEW1" not in document and document["NEW2"]["owner"] == "Jordan Lee"
+    assert index.codes_for_owner("Jordan Lee") == {"NEW2"}
+
+
+def test_saved_record_is_a_private_copy(manager):
+    record = promo("NEW1")
+    manager.save_promo("NEW1", record)
+    record["description"] = "changed after saving"
+    assert manager.get_promo("NEW1")["description"] == "Trade in offer NEW1"
+
+
+def test_journal_is_replayed_over_the_snapshot(manager, data_dir):
+    with open(manager.promo_file, 'rb') as f:
+        snapshot = f.read()
+    manager.save_promo("NEW1", promo("NEW1"))
+    manager.save_promo("NEW2", promo("NEW2"))
+    manager.patch_many(["NEW1", "MISSING"], {"description": "Patched", "sku_list": None})
+    manager.delete_promo("NEW2")
+
+    with open(manager.promo_file, 'rb') as f:
+        assert f.read() == snapshot
+    assert os.path.getsize(manager._journals[manager.promo_file].path) > 0
+
+    reopened = restart(data_dir)
+    saved = reopened.get_promo("NEW1")
+    assert saved["description"] == "Patched" and "sku_list" not in saved
+    assert reopened.get_promo("NEW2") == {}
+    assert set(reopened.get_all_promos()) == set(manager.get_all_promos())
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(manager, data_dir):
+    manager.save_promo("NEW1", promo("NEW1"))
+    manager.delete_promo("NEW1")
+    manager.save_promo("NEW2", promo("NEW2"))
+    expected = manager.get_all_promos()
+
+    manager.compact_journals()
+    assert manager._journals[manager.promo_file].size() == 0
+    with open(manager.promo_file, 'rb') as f:
+        on_disk = codec.loads(f.read())
+    assert set(on_disk) == set(expected) and "NEW1" not in on_disk
+
+    reopened = restart(data_dir)
+    assert reopened.get_all_promos() == expected
+
+
+def test_journal_past_the_threshold_is_compacted(manager, monkeypatch):
+    monkeypatch.setattr(PromoDataManager, 'journal_compact_bytes', 1)
+    # Compact on the calling thread so the test can check the result
+    monkeypatch.setattr(PromoDataManager, '_compact_in_background', PromoDataManager._compact)
+    manager.save_promo("NEW1", promo("NEW1"))
+    assert manager._journals[manager.promo_file].size() == 0
+    with open(manager.promo_file, 'rb') as f:
+        assert "NEW1" in codec.loads(f.read())
+
+
+def test_readers_run_alongside_in_place_saves(manager):
+    import threading
+    errors = []
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                manager.get_all_promos()
+                manager.get_paginated_promos(owner_filter="Jordan Lee")
+                manager.get_promos_page(search="trade")
+                manager.get_promo_records()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(60):
+            manager.save_promo(f"NEW{i}", promo(f"NEW{i}", owner="Jordan Lee"))
+            if i % 3 == 0:
+                manager.delete_promo(f"NEW{i}")
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+    assert len(manager.get_paginated_promos(owner_filter="Jordan Lee", per_page=500)['promotions']) == 40
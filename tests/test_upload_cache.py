@@ -0,0 +1,32 @@
+import os
+from data.upload_cache import ParsedUploadCache, parsed_uploads
+
+
+def test_manager_keeps_parsed_tables_in_its_data_dir(manager, data_dir):
+    assert parsed_uploads.cache_dir == os.path.join(data_dir, "uploads", "parsed")
+
+
+def test_tables_are_parsed_once_per_content(tmp_path):
+    upload = tmp_path / "skus.xlsx"
+    upload.write_bytes(b"workbook bytes")
+    cache = ParsedUploadCache(str(tmp_path / "parsed"))
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return {'sku': ['123']}
+
+    assert cache.get('sku', str(upload), parse) == {'sku': ['123']}
+    # A fresh process finds the table on disk
+    assert ParsedUploadCache(str(tmp_path / "parsed")).get('sku', str(upload), parse) == {'sku': ['123']}
+    assert len(calls) == 1
+    assert len(os.listdir(tmp_path / "parsed" / "sku")) == 1
+
+
+def test_without_a_directory_tables_stay_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    upload = tmp_path / "skus.xlsx"
+    upload.write_bytes(b"workbook bytes")
+    cache = ParsedUploadCache()
+    assert cache.get('sku', str(upload), lambda path: {'sku': []}) == {'sku': []}
+    assert os.listdir(tmp_path) == ["skus.xlsx"]